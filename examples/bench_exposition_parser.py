@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: kube_watcher.exposition against the previous HAMi and Longhorn parsers.
+
+Usage:
+    python examples/bench_exposition_parser.py [recorded_scrape.txt]
+
+Without a file, a scrape is synthesised with HAMi and Longhorn families buried
+among a large number of unrelated families (as exposed by a busy exporter).
+"""
+import sys
+import time
+import random
+from collections import defaultdict
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from kube_watcher.exposition import index_samples
+from kube_watcher.scrapers import HAMI_FAMILIES
+from kube_watcher.utils import extract_longhorn_metric_from_prometheus
+
+
+LONGHORN_FAMILIES = ["longhorn_volume_actual_size", "longhorn_volume_capacity_bytes"]
+
+
+def synthesise_scrape(n_gpus=64, n_volumes=500, n_other_families=300, samples_per_family=50):
+    random.seed(0)
+    lines = []
+    for family in HAMI_FAMILIES:
+        lines += [f"# HELP {family} HAMi metric", f"# TYPE {family} gauge"]
+        for i in range(n_gpus):
+            lines.append(
+                f'{family}{{device_uuid="GPU-{i:04d}",device_type="NVIDIA-A100",node="node-{i // 8}",shared_containers="2"}} {random.randint(0, 80 * 1024 ** 3)}'
+            )
+    for family in LONGHORN_FAMILIES:
+        lines += [f"# HELP {family} Longhorn metric", f"# TYPE {family} gauge"]
+        for i in range(n_volumes):
+            lines.append(f'{family}{{pvc="pvc-{i}",volume="vol-{i}",node="node-{i % 8}"}} {random.randint(0, 100 * 1024 ** 3)}')
+    for f in range(n_other_families):
+        family = f"exporter_metric_{f}_seconds"
+        lines += [f"# HELP {family} Unrelated metric", f"# TYPE {family} gauge"]
+        for i in range(samples_per_family):
+            lines.append(f'{family}{{instance="10.0.0.{i}:9100",job="node",mode="idle"}} {random.random()}')
+    return "\n".join(lines) + "\n"
+
+
+def old_hami(text):
+    gpu_metrics = {}
+    for family in text_string_to_metric_families(text):
+        gpu_metrics[family.name] = []
+        for sample in family.samples:
+            gpu_metrics[family.name].append({"name": sample.name, "value": sample.value, "labels": sample.labels})
+    return gpu_metrics
+
+
+def old_longhorn(text):
+    objects = defaultdict(dict)
+    for line in text.splitlines():
+        for m_key in LONGHORN_FAMILIES:
+            if line.startswith(m_key):
+                parts = line.split()
+                key = parts[0]
+                size = float(parts[1]) / (1024 ** 2)
+                volume_name = key.split('pvc="')[1].split('"')[0]
+                objects[volume_name][m_key] = size
+    return objects
+
+
+def bench(label, fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t)
+    print(f"{label:<40} best {min(timings) * 1000:9.2f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            text = f.read()
+    else:
+        text = synthesise_scrape()
+    print(f"Scrape: {len(text) / 1024:.0f} KiB, {text.count(chr(10))} lines\n")
+
+    old = bench("HAMi: text_string_to_metric_families", lambda: old_hami(text))
+    new = bench("HAMi: exposition.index_samples", lambda: index_samples(text.splitlines(), HAMI_FAMILIES, "device_uuid"))
+    for family in HAMI_FAMILIES:
+        assert {s["labels"]["device_uuid"]: s["value"] for s in old.get(family, [])} == {k: s.value for k, s in new[family].items()}
+
+    old = bench("Longhorn: line split + startswith", lambda: old_longhorn(text))
+    new = bench("Longhorn: exposition.iter_samples", lambda: extract_longhorn_metric_from_prometheus(LONGHORN_FAMILIES, text, None))
+    assert old == new
+    print("\nResults match")
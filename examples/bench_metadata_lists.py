@@ -0,0 +1,114 @@
+"""
+Benchmark: full-object lists against metadata-only (PartialObjectMetadata)
+lists for name/label queries, reporting bytes transferred and parse time.
+
+Without arguments a synthetic node list (status, images, annotations) and
+secret list (data) are used. With --live, nodes and secrets are listed from
+the cluster in the current kubeconfig both ways.
+
+Usage:
+    python examples/bench_metadata_lists.py [--nodes 500] [--secrets 2000]
+    python examples/bench_metadata_lists.py --live
+"""
+import json
+import time
+import argparse
+
+from kube_watcher import raw
+
+
+def synthesise_metadata(i, prefix):
+    return {
+        "name": f"{prefix}-{i}",
+        "uid": f"00000000-0000-0000-0000-{i:012d}",
+        "resourceVersion": str(100000 + i),
+        "creationTimestamp": "2024-05-01T10:00:00Z",
+        "labels": {"kalavai.cluster.name": "default", "kubernetes.io/hostname": f"{prefix}-{i}", "node-role.kubernetes.io/worker": "true"},
+        "annotations": {"hami.io/node-nvidia-register": "GPU-0,10,24576,100,NVIDIA-RTX-4090,0,true:" * 4}
+    }
+
+
+def synthesise_nodes(n_nodes):
+    return [{
+        "metadata": synthesise_metadata(i, "node"),
+        "spec": {"podCIDR": f"10.42.{i % 250}.0/24", "providerID": f"k3s://node-{i}"},
+        "status": {
+            "capacity": {"cpu": "32", "memory": "131072Mi", "nvidia.com/gpu": "4", "pods": "110"},
+            "allocatable": {"cpu": "32", "memory": "131072Mi", "nvidia.com/gpu": "4", "pods": "110"},
+            "conditions": [{"type": t, "status": "False", "reason": f"Kubelet{t}", "message": "kubelet is posting ready status " * 2, "lastHeartbeatTime": "2024-05-01T10:00:05Z"} for t in ("MemoryPressure", "DiskPressure", "PIDPressure", "Ready")],
+            "addresses": [{"type": "InternalIP", "address": f"192.168.0.{i % 250}"}, {"type": "Hostname", "address": f"node-{i}"}],
+            "images": [{"names": [f"docker.io/kalavai/image-{k}@sha256:{'ab' * 32}", f"docker.io/kalavai/image-{k}:v{k}"], "sizeBytes": 1000000 * k} for k in range(40)],
+            "nodeInfo": {"kubeletVersion": "v1.29.4+k3s1", "osImage": "Ubuntu 22.04", "containerRuntimeVersion": "containerd://1.7.15"}
+        }
+    } for i in range(n_nodes)]
+
+
+def synthesise_secrets(n_secrets):
+    return [{
+        "metadata": synthesise_metadata(i, "secret"),
+        "type": "Opaque",
+        "data": {f"key-{k}": "c2VjcmV0" * 64 for k in range(8)}
+    } for i in range(n_secrets)]
+
+
+def as_lists(items, kind):
+    full = json.dumps({"apiVersion": "v1", "kind": kind, "items": items}).encode()
+    metadata = json.dumps({
+        "apiVersion": "meta.k8s.io/v1",
+        "kind": "PartialObjectMetadataList",
+        "items": [{"apiVersion": "meta.k8s.io/v1", "kind": "PartialObjectMetadata", "metadata": item["metadata"]} for item in items]
+    }).encode()
+    return full, metadata
+
+
+def parse_names(data, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        names = [item["metadata"]["name"] for item in raw.loads(data)["items"]]
+        timings.append(time.perf_counter() - t)
+    return names, min(timings)
+
+
+def report(label, full, metadata):
+    full_names, full_time = parse_names(full)
+    metadata_names, metadata_time = parse_names(metadata)
+    assert full_names == metadata_names, "name mismatch"
+    print(f"{label:<12} full {len(full) / 1024:10.1f} KiB {full_time * 1000:8.2f} ms   "
+          f"metadata {len(metadata) / 1024:10.1f} KiB {metadata_time * 1000:8.2f} ms   "
+          f"({len(full) / max(len(metadata), 1):.1f}x bytes)")
+
+
+def live():
+    from kubernetes import client, config
+    config.load_kube_config()
+    api_client = client.ApiClient()
+    for resource in ("node", "secret"):
+        full = api_client.call_api(
+            raw.resource_path(resource), "GET",
+            header_params={"Accept": "application/json"},
+            auth_settings=["BearerToken"], _return_http_data_only=True, _preload_content=False
+        ).data
+        metadata = api_client.call_api(
+            raw.resource_path(resource), "GET",
+            header_params={"Accept": raw.METADATA_ACCEPT},
+            auth_settings=["BearerToken"], _return_http_data_only=True, _preload_content=False
+        ).data
+        if raw.loads(metadata).get("kind") != "PartialObjectMetadataList":
+            print(f"{resource}: server returned full objects for the metadata-only request")
+        report(resource, full, metadata)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--secrets", type=int, default=2000)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    print(f"orjson: {raw.orjson is not None}\n")
+    if args.live:
+        live()
+    else:
+        report("nodes", *as_lists(synthesise_nodes(args.nodes), "NodeList"))
+        report("secrets", *as_lists(synthesise_secrets(args.secrets), "SecretList"))
@@ -0,0 +1,113 @@
+"""
+Benchmark: peak memory of reading every running pod of a cluster in one list
+(raw.read_items) against paged, incremental reads (raw.iter_items), for
+growing cluster sizes. Pages are served from memory by a fake apiserver, so
+only the reader's allocations and time are measured.
+
+Paged reads should keep a roughly constant peak however many pods there are.
+
+Usage:
+    python examples/bench_paginated_lists.py [page_size]
+"""
+import io
+import sys
+import json
+import time
+import tracemalloc
+
+from kube_watcher import raw
+from kube_watcher.utils import cast_resource_value
+
+
+def synthesise_pod(i):
+    return {
+        "metadata": {
+            "name": f"job-{i // 4}-worker-{i % 4}",
+            "namespace": f"user-{i % 50}",
+            "uid": f"00000000-0000-0000-0000-{i:012d}",
+            "labels": {"app": f"job-{i // 4}", "role": "worker"},
+            "annotations": {"kalavai.net/owner": "user", "prometheus.io/scrape": "true"},
+            "managedFields": [{"manager": "kube-controller-manager", "operation": "Update", "fieldsV1": {"f:metadata": {"f:labels": {".": {}}}}}]
+        },
+        "spec": {
+            "nodeName": f"node-{i % 100}",
+            "containers": [{
+                "name": "worker",
+                "image": "kalavai/worker:latest",
+                "env": [{"name": f"ENV_{k}", "value": str(k)} for k in range(10)],
+                "resources": {"limits": {"cpu": "2", "memory": "4Gi"}, "requests": {"cpu": "1", "memory": "2Gi"}}
+            }]
+        },
+        "status": {
+            "phase": "Running",
+            "conditions": [{"type": t, "status": "True", "lastTransitionTime": "2024-05-01T10:00:05Z"} for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")]
+        }
+    }
+
+
+class FakeResponse(io.BytesIO):
+    @property
+    def data(self):
+        return self.getvalue()
+
+    def release_conn(self):
+        pass
+
+
+class FakePodList():
+    """list_pod_for_all_namespaces over n_pods synthetic pods, honouring limit/continue.
+    Pages are built once and cached, so timed and traced runs only measure the reader."""
+    def __init__(self, n_pods):
+        self.n_pods = n_pods
+        self.requests = 0
+        self.pages = {}
+
+    def __call__(self, limit=None, _continue=None, _preload_content=True, **kwargs):
+        self.requests += 1
+        start = int(_continue or 0)
+        end = self.n_pods if limit is None else min(self.n_pods, start + limit)
+        if (start, end) not in self.pages:
+            metadata = {"resourceVersion": "1"}
+            if end < self.n_pods:
+                metadata["continue"] = str(end)
+            body = {"apiVersion": "v1", "kind": "PodList", "metadata": metadata, "items": [synthesise_pod(i) for i in range(start, end)]}
+            self.pages[(start, end)] = json.dumps(body).encode()
+        return FakeResponse(self.pages[(start, end)])
+
+
+def account(pods):
+    """The accounting loop of get_available_resources"""
+    available = {"cpu": 0, "memory": 0, "pods": 0}
+    for pod in pods:
+        available["pods"] -= 1
+        for container in pod.get("spec", {}).get("containers", []):
+            reqs = container.get("resources", {}).get("requests", {})
+            for resource in ("cpu", "memory"):
+                if resource in reqs:
+                    available[resource] -= cast_resource_value(reqs[resource])
+    return available
+
+
+def measure(read):
+    account(read())  # warm up the fake apiserver's page cache
+    t = time.perf_counter()
+    result = account(read())
+    elapsed = time.perf_counter() - t
+    tracemalloc.start()
+    account(read())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+if __name__ == "__main__":
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else raw.LIST_PAGE_SIZE
+    print(f"page size {page_size} (orjson: {raw.orjson is not None}, ijson: {raw.ijson is not None})\n")
+    for n_pods in (1000, 5000, 20000):
+        pod_list = FakePodList(n_pods)
+        single, single_peak, single_time = measure(lambda: raw.read_items(pod_list))
+        pod_list = FakePodList(n_pods)
+        paged, paged_peak, paged_time = measure(lambda: raw.iter_items(pod_list, page_size=page_size))
+        assert single == paged, "accounting mismatch"
+        print(f"{n_pods:>6} pods   one list: peak {single_peak / 1024 ** 2:7.1f} MiB {single_time:6.2f} s   "
+              f"paged ({pod_list.requests // 3} requests): peak {paged_peak / 1024 ** 2:7.1f} MiB {paged_time:6.2f} s")
@@ -0,0 +1,93 @@
+"""
+Benchmark: node filtering of the PromQL queries of /v1/fetch_nodes_stats with
+one node=~"n1|...|nN" regex (as before the planner) against chunked name lists
+and the kube_node_labels join. Reports
+
+- the size of the largest query each plan sends, as the pool grows
+- the cost of merging chunked responses (merge_series) against the single
+  response, and checks both give the same series
+
+Responses are replayed from a recording: the JSON `data.result` of a per node
+range query, e.g. saved with
+    curl -G $PROMETHEUS/api/v1/query_range --data-urlencode 'query=kube_node_status_condition{condition="Ready",status="true"}' \
+        --data-urlencode start=... --data-urlencode end=... --data-urlencode step=1h | jq .data.result > recorded.json
+Without one, a recording of synthetic nodes is generated.
+
+Run from the repository root:
+    python examples/bench_promql_planner.py [recorded.json] [repeat]
+"""
+import sys
+import json
+import time
+
+from kube_watcher.promql import plan_node_filters, merge_series, NODE_CHUNK_SIZE
+
+
+def synthetic_recording(nodes, samples=72):
+    return [
+        {
+            "metric": {"__name__": "kube_node_status_condition", "node": f"kalavai-pool-{i}-{i * 7919 % 65536:04x}.example"},
+            "values": [[1700000000 + step * 3600, "1"] for step in range(samples)]
+        }
+        for i in range(nodes)
+    ]
+
+
+READY = ('condition="Ready"', 'status="true"')
+
+
+def node_status_query(nodes):
+    return nodes.restrict(f"avg_over_time(kube_node_status_condition{nodes.selector(*READY)}[1h])")
+
+
+def largest_query(node_filters):
+    return max(len(node_status_query(node_filter)) for node_filter in node_filters)
+
+
+def replay(recording, node_filter):
+    """Series of the recording a query with this filter would have returned"""
+    names = set(node_filter.names)
+    return [series for series in recording if series["metric"]["node"] in names]
+
+
+def timed(fn, repeat):
+    fn()  # warm up
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def as_floats(result):
+    return sorted(
+        (tuple(sorted(series["metric"].items())), tuple((ts, float(value)) for ts, value in series["values"]))
+        for series in result
+    )
+
+
+if __name__ == "__main__":
+    recording = None
+    repeat = 20
+    for arg in sys.argv[1:]:
+        if arg.isdigit():
+            repeat = int(arg)
+        else:
+            with open(arg) as f:
+                recording = json.load(f)
+
+    print(f"largest query sent (bytes), chunks of {NODE_CHUNK_SIZE} names\n")
+    for nodes in (20, 60, 200, 1000, 5000):
+        names = [series["metric"]["node"] for series in synthetic_recording(nodes, samples=0)]
+        single = largest_query(plan_node_filters(names=names, chunk_size=len(names)))
+        chunked_filters = plan_node_filters(names=names)
+        chunked = largest_query(chunked_filters)
+        joined = largest_query(plan_node_filters(labels={"kalavai.net/pool": "gpu"}))
+        print(f"  {nodes:>5} nodes   regex {single:>8}   chunked {chunked:>6} x{len(chunked_filters):<4}   label join {joined:>4}")
+
+    recording = recording or synthetic_recording(1000)
+    names = [series["metric"]["node"] for series in recording]
+    chunks = [replay(recording, node_filter) for node_filter in plan_node_filters(names=names)]
+    assert as_floats(merge_series(chunks)) == as_floats(recording), "merged chunks differ from the single response"
+    samples = sum(len(series["values"]) for series in recording)
+    merge = timed(lambda: merge_series(chunks), repeat)
+    print(f"\nmerge of {len(chunks)} chunk responses ({len(recording)} series, {samples} samples): {merge:.2f} ms, same series as one query")
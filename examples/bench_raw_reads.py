@@ -0,0 +1,132 @@
+"""
+Benchmark: typed reads (model deserialisation + to_dict/force_serialisation)
+against raw reads (kube_watcher.raw: fast JSON + projection) on a synthetic
+5k-pod list, reporting CPU time and peak allocated memory per call.
+
+Also checks that raw.snake_case_keys yields the same keys as to_dict()
+(ignoring fields that to_dict() reports as None).
+
+Usage:
+    python examples/bench_raw_reads.py [n_pods]
+"""
+import sys
+import json
+import time
+import tracemalloc
+
+from kubernetes import client
+
+from kube_watcher import raw
+from kube_watcher.kube_core import POD_STATUS_FIELDS
+from kube_watcher.utils import force_serialisation
+
+
+class FakeResponse():
+    def __init__(self, data):
+        self.data = data
+
+
+def synthesise_pod_list(n_pods):
+    pods = []
+    for i in range(n_pods):
+        pods.append({
+            "metadata": {
+                "name": f"job-{i // 4}-worker-{i % 4}",
+                "namespace": f"user-{i % 50}",
+                "uid": f"00000000-0000-0000-0000-{i:012d}",
+                "resourceVersion": str(100000 + i),
+                "creationTimestamp": "2024-05-01T10:00:00Z",
+                "labels": {"app": f"job-{i // 4}", "kalavai.job.name": f"job-{i // 4}", "role": "worker"},
+                "annotations": {"kalavai.net/owner": "user", "prometheus.io/scrape": "true"},
+                "ownerReferences": [{"apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"job-{i // 4}-rs", "uid": "x", "controller": True}],
+                "managedFields": [{"manager": "kube-controller-manager", "operation": "Update", "apiVersion": "v1", "fieldsType": "FieldsV1", "fieldsV1": {"f:metadata": {"f:labels": {".": {}}}}}]
+            },
+            "spec": {
+                "nodeName": f"node-{i % 100}",
+                "serviceAccountName": "default",
+                "restartPolicy": "Always",
+                "containers": [{
+                    "name": "worker",
+                    "image": "kalavai/worker:latest",
+                    "args": ["--port", "8080"],
+                    "env": [{"name": f"ENV_{k}", "value": str(k)} for k in range(10)],
+                    "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                    "resources": {"limits": {"cpu": "2", "memory": "4Gi", "nvidia.com/gpu": "1"}, "requests": {"cpu": "1", "memory": "2Gi"}},
+                    "volumeMounts": [{"name": "cache", "mountPath": "/cache"}]
+                }],
+                "volumes": [{"name": "cache", "emptyDir": {}}],
+                "tolerations": [{"key": "node.kubernetes.io/not-ready", "operator": "Exists", "effect": "NoExecute", "tolerationSeconds": 300}]
+            },
+            "status": {
+                "phase": "Running",
+                "podIP": f"10.42.{i % 250}.{i % 200}",
+                "hostIP": f"192.168.0.{i % 100}",
+                "startTime": "2024-05-01T10:00:01Z",
+                "conditions": [{"type": t, "status": "True", "lastTransitionTime": "2024-05-01T10:00:05Z"} for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+                "containerStatuses": [{
+                    "name": "worker", "ready": True, "restartCount": 0, "image": "kalavai/worker:latest",
+                    "imageID": "docker.io/kalavai/worker@sha256:abc", "containerID": "containerd://abc", "started": True,
+                    "state": {"running": {"startedAt": "2024-05-01T10:00:04Z"}}
+                }]
+            }
+        })
+    return json.dumps({"apiVersion": "v1", "kind": "PodList", "metadata": {"resourceVersion": "1"}, "items": pods}).encode()
+
+
+def typed_read(data):
+    pods = client.ApiClient().deserialize(FakeResponse(data), "V1PodList")
+    return [force_serialisation(pod.to_dict()) for pod in pods.items]
+
+
+def typed_projection(data):
+    pods = client.ApiClient().deserialize(FakeResponse(data), "V1PodList")
+    return [
+        {"name": pod.metadata.name, "node_name": pod.spec.node_name, "phase": pod.status.phase}
+        for pod in pods.items
+    ]
+
+
+def raw_full(data):
+    return [raw.snake_case_keys(pod) for pod in raw.loads(data)["items"]]
+
+
+def raw_projection(data):
+    return [raw.project(pod, POD_STATUS_FIELDS) for pod in raw.loads(data)["items"]]
+
+
+def measure(label, fn, data, repeat=3):
+    cpu = []
+    for _ in range(repeat):
+        t = time.process_time()
+        fn(data)
+        cpu.append(time.process_time() - t)
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36} cpu {min(cpu) * 1000:9.1f} ms   peak {peak / 1024 ** 2:8.1f} MiB")
+
+
+def drop_none(obj):
+    if isinstance(obj, dict):
+        return {k: drop_none(v) for k, v in obj.items() if v is not None}
+    if isinstance(obj, list):
+        return [drop_none(v) for v in obj]
+    return obj
+
+
+if __name__ == "__main__":
+    n_pods = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = synthesise_pod_list(n_pods)
+    print(f"{n_pods} pods, {len(data) / 1024 ** 2:.1f} MiB of JSON (orjson: {raw.orjson is not None})\n")
+
+    measure("typed + to_dict + force_serialisation", typed_read, data)
+    measure("raw + snake_case_keys (full object)", raw_full, data)
+    measure("typed, selected fields", typed_projection, data)
+    measure("raw + projection", raw_projection, data)
+
+    sample = synthesise_pod_list(1)
+    typed, converted = drop_none(typed_read(sample)[0]), raw_full(sample)[0]
+    # timestamps differ in format only (+00:00 vs Z)
+    assert json.dumps(typed, sort_keys=True).replace("+00:00", "Z") == json.dumps(converted, sort_keys=True), "key mismatch"
+    print("\nsnake_case_keys matches to_dict() keys")
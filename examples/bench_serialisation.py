@@ -0,0 +1,86 @@
+"""
+Benchmark: encoding API responses the old way (json.dumps/json.loads round
+trip in force_serialisation, then FastAPI's jsonable_encoder and JSONResponse)
+against a single to_jsonable pass rendered once by FastJSONResponse, reporting
+time and peak allocated memory per response. Also checks both produce the
+same JSON document.
+
+Payloads: typed pod models (as returned by typed describe calls), a typed
+namespace (create_namespace) and the per-node resources of a large pool
+(get_node_resources).
+
+Usage:
+    python examples/bench_serialisation.py [n_pods]
+"""
+import sys
+import json
+import time
+import datetime
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from kubernetes import client
+
+from kube_watcher.responses import FastJSONResponse, orjson
+from kube_watcher.utils import to_jsonable, serialize_datetime
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0])
+from bench_raw_reads import FakeResponse, synthesise_pod_list
+
+
+def round_trip(data):
+    # force_serialisation before to_jsonable
+    return json.loads(json.dumps(data, default=serialize_datetime))
+
+
+def old_encode(data):
+    return JSONResponse(jsonable_encoder(round_trip(data))).body
+
+
+def new_encode(data):
+    return FastJSONResponse(to_jsonable(data)).body
+
+
+def measure(label, fn, data, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<44} {min(timings) * 1000:9.1f} ms   peak {peak / 1024 ** 2:8.1f} MiB")
+
+
+def payloads(n_pods):
+    pods = client.ApiClient().deserialize(FakeResponse(synthesise_pod_list(n_pods)), "V1PodList").items
+    namespace = client.V1Namespace(
+        metadata=client.V1ObjectMeta(
+            name="user-1",
+            labels={"kalavai.cluster.user": "user-1"},
+            creation_timestamp=datetime.datetime(2024, 5, 1, 10, tzinfo=datetime.timezone.utc)
+        ),
+        status=client.V1NamespaceStatus(phase="Active")
+    )
+    node_resources = {
+        f"node-{i}": {"cpu": 32, "memory": 137438953472, "nvidia.com/gpu": 4, "pods": 110, "gpus": [{"gpu_id": f"GPU-{i}-{k}", "vram": 25769803776} for k in range(4)]}
+        for i in range(n_pods // 5)
+    }
+    return {
+        f"{n_pods} typed pods": {"pods": {pod.metadata.name: pod for pod in pods}},
+        "typed namespace": {"namespace": namespace},
+        f"{len(node_resources)} node resources": node_resources
+    }
+
+
+if __name__ == "__main__":
+    n_pods = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"orjson: {orjson is not None}\n")
+    for label, data in payloads(n_pods).items():
+        assert json.loads(old_encode(data)) == json.loads(new_encode(data)), f"{label}: output mismatch"
+        print(label)
+        measure("round trip + jsonable_encoder + JSONResponse", old_encode, data)
+        measure("to_jsonable + FastJSONResponse", new_encode, data)
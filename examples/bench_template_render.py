@@ -0,0 +1,90 @@
+"""
+Benchmark: rendering a job the old way (template.yaml and values.yaml read
+from disk and a new jinja Template compiled on every Job) against the shared
+TemplateRegistry (compiled once, defaults parsed once). Reports the latency of
+one Job construction + populate per template, as /v1/deploy_job does for every
+replica, and checks both produce the same manifest.
+
+Run from the repository root:
+    python examples/bench_template_render.py [repeat]
+"""
+import sys
+import time
+
+import yaml
+from jinja2 import Template
+
+from kube_watcher.jobs import Job, TemplateRegistry, TEMPLATE_ID_FIELD, get_template_path, get_defaults_path
+from kube_watcher.models import JobTemplate
+
+
+class OldJob(Job):
+    """Job as it was before the registry: everything read and compiled per instance"""
+    def __init__(self, template):
+        self.job_name = None
+        self.job_label = None
+        self.ports = []
+        self.template = JobTemplate[template]
+        with open(get_template_path(self.template), "r") as f:
+            self.template_str = f.read()
+
+    def get_defaults(self):
+        with open(get_defaults_path(template=self.template), "r") as f:
+            return yaml.safe_load(f)
+
+    @property
+    def compiled(self):
+        return Template(self.template_str, lstrip_blocks=True, trim_blocks=True)
+
+
+def values_for(defaults):
+    # the template's id field names the value holding the job name
+    for default in defaults:
+        if default["name"] == TEMPLATE_ID_FIELD:
+            return {default["default"]: "bench-job"}
+    return {}
+
+
+def render(job_class, name, values):
+    job = job_class(template=name)
+    return job.populate(values=values, random_suffix=False, user_id="bench", priority="user-spot-priority", target_labels={"gpu": "yes"})
+
+
+def timed(fn, repeat):
+    fn()  # warm up
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    registry = TemplateRegistry()
+    t = time.perf_counter()
+    registry.preload()
+    print(f"preload of {len(registry.names())} templates: {(time.perf_counter() - t) * 1000:.1f} ms\n")
+
+    class RegistryJob(Job):
+        def __init__(self, template):
+            super().__init__(template=template, registry=registry)
+
+    total_old, total_new = 0, 0
+    for template in JobTemplate:
+        if template == JobTemplate.custom:
+            continue
+        name = template.name
+        values = values_for(registry.get_defaults(name))
+        try:
+            expected = render(OldJob, name, values)
+        except Exception as e:
+            # needs values the defaults don't provide
+            print(f"  {name:<12} skipped: {e}")
+            continue
+        assert expected == render(RegistryJob, name, values), f"{name}: output mismatch"
+        old = timed(lambda: render(OldJob, name, values), repeat)
+        new = timed(lambda: render(RegistryJob, name, values), repeat)
+        total_old += old
+        total_new += new
+        print(f"  {name:<12} old {old:8.3f} ms   registry {new:8.3f} ms   x{old / new:6.1f}")
+    print(f"\n  {'all':<12} old {total_old:8.3f} ms   registry {total_new:8.3f} ms   x{total_old / total_new:6.1f}")
@@ -0,0 +1,83 @@
+"""
+Load test: /v1/health latency while slow upstream calls are in flight.
+
+Measures /v1/health latency on its own, then again while a number of
+concurrent clients keep calling a heavy endpoint. With blocking calls
+offloaded from the event loop, p99 should stay flat.
+
+Usage (against a running kube-watcher):
+    IN_CLUSTER=False KW_USE_AUTH=False uvicorn kube_watcher.api:app --port 8000
+    python examples/load_test_health.py --url http://localhost:8000 --api_key <read key>
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+
+HEAVY_CALLS = {
+    "logs": ("POST", "/v1/get_logs_for_label", {"labels": {"app": None}}),
+    "helm_schema": ("GET", "/v1/helm_pull_schema?chart_name=bitnami/nginx", None),
+    "node_stats": ("POST", "/v1/fetch_nodes_stats", {"node_names": ["none"], "start_time": "1h", "end_time": "now", "step": "1m"}),
+    "storage": ("POST", "/v1/get_storage_usage", {})
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def probe_health(client, n_requests, interval):
+    latencies = []
+    for _ in range(n_requests):
+        t = time.perf_counter()
+        await client.get("/v1/health")
+        latencies.append((time.perf_counter() - t) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def heavy_worker(client, method, path, body, stop):
+    count = 0
+    while not stop.is_set():
+        try:
+            await client.request(method, path, json=body)
+        except httpx.HTTPError:
+            pass
+        count += 1
+    return count
+
+
+def report(label, latencies):
+    print(f"{label:<28} p50 {statistics.median(latencies):8.2f} ms   p99 {percentile(latencies, 99):8.2f} ms   max {max(latencies):8.2f} ms")
+
+
+async def main(args):
+    headers = {"X-API-KEY": args.api_key} if args.api_key else {}
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=120, limits=limits) as client:
+        report("health (idle)", await probe_health(client, args.requests, args.interval))
+
+        method, path, body = HEAVY_CALLS[args.heavy]
+        stop = asyncio.Event()
+        workers = [asyncio.create_task(heavy_worker(client, method, path, body, stop)) for _ in range(args.concurrency)]
+        await asyncio.sleep(1)
+        latencies = await probe_health(client, args.requests, args.interval)
+        stop.set()
+        calls = sum(await asyncio.gather(*workers))
+        report(f"health ({args.concurrency}x {args.heavy})", latencies)
+        print(f"{calls} heavy calls completed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, default="http://localhost:8000")
+    parser.add_argument("--api_key", type=str, default=None)
+    parser.add_argument("--heavy", type=str, default="logs", choices=list(HEAVY_CALLS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
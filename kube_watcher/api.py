@@ -1,17 +1,23 @@
 import os
+import hashlib
 import argparse
 from typing import List
 import logging
 import requests
 import yaml
 from collections import defaultdict
+from contextlib import asynccontextmanager
 
 import uvicorn
 from starlette.requests import Request
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi_mcp import FastApiMCP
 
 from kube_watcher.cost_core import OpenCostAPI
+from kube_watcher.promql import NODE_LABEL_JOIN
 
 from kube_watcher.models import (
     NodeStatusRequest,
@@ -21,6 +27,7 @@ from kube_watcher.models import (
     GenericDeploymentRequest,
     DeleteLabelledResourcesRequest,
     GetLabelledResourcesRequest,
+    StreamLogsRequest,
     JobTemplateRequest,
     CustomJobTemplateRequest,
     TemplateDeploymentRequest,
@@ -45,11 +52,18 @@ from kube_watcher.kube_core import (
     KubeAPI
 )
 from kube_watcher.utils import extract_auth_token
+from kube_watcher.responses import FastJSONResponse, dumps
+from kube_watcher.response_cache import ResponseCache, request_key, etag_matches
+from kube_watcher.operations import OperationRegistry
+from kube_watcher.log_stream import LogMultiplexer, LOG_STREAM_MAX_BYTES, LOG_STREAM_MAX_PODS, follow_limit
+from kube_watcher.snapshot import ClusterSnapshot
+from kube_watcher.apply import ApplyConflictError
+from kube_watcher import executor, sessions
 from kube_watcher.prometheus_core import PrometheusAPI
 from kube_watcher.jobs import (
     Job,
-    JobTemplate,
-    get_template_types
+    template_registry,
+    template_catalog
 )
 
 
@@ -74,6 +88,13 @@ READ_ONLY_KEY = os.getenv("KW_READ_ONLY_KEY") # read permissions
 KALAVAI_USER_KEY = os.getenv("KALAVAI_USER_KEY", "kalavai.cluster.user")
 
 kube_api = KubeAPI(in_cluster=IN_CLUSTER)
+response_cache = ResponseCache()
+operations = OperationRegistry()
+# shared by all requests; connections are pooled per upstream (see sessions.py)
+prometheus_api = PrometheusAPI(url=PROMETHEUS_ENDPOINT)
+# works as long as we are port forwarding from control plane
+insecure_prometheus_api = PrometheusAPI(url=PROMETHEUS_ENDPOINT, disable_ssl=True)
+opencost_api = OpenCostAPI(base_url=OPENCOST_ENDPOINT)
 app = FastAPI()
 
     
@@ -84,6 +105,79 @@ if USE_AUTH:
 else:
     logger.warning("Warning: Authentication is disabled. This should only be used for testing.")
 
+
+@app.on_event("startup")
+async def start_background_caches():
+    kube_api.start_informers()
+    kube_api.start_scrapers()
+    template_registry.preload()
+    template_catalog.start()
+
+@app.on_event("shutdown")
+async def stop_background_caches():
+    kube_api.stop_informers()
+    kube_api.stop_scrapers()
+    template_catalog.stop()
+    executor.shutdown()
+    sessions.close()
+
+@asynccontextmanager
+async def cluster_snapshot():
+    """Async counterpart of KubeAPI.cluster_snapshot: the snapshot is fetched off the event loop"""
+    snapshot = await executor.kube(ClusterSnapshot, kube_api=kube_api)
+    token = snapshot.activate()
+    try:
+        yield snapshot
+    finally:
+        snapshot.deactivate(token)
+
+async def cached_response(http_request: Request, endpoint, compute, sources=(), body=None, scope=None):
+    """Serve compute() through the response cache, with an ETag and 304s on If-None-Match
+
+    Args:
+        endpoint (str): Endpoint name (see KW_RESPONSE_CACHE_TTLS)
+        compute: Coroutine function returning the response content
+        sources (tuple): Data sources the content derives from (see KubeAPI.source_versions)
+        body: Request body, part of the cache key
+        scope (list): Namespaces visible to the caller, part of the cache key
+    """
+    status, content, etag = await response_cache.get(
+        endpoint=endpoint,
+        key=request_key(body=body, scope=scope),
+        compute=compute,
+        encode=dumps,
+        versions=kube_api.source_versions(sources) if sources else None,
+        if_none_match=http_request.headers.get("if-none-match")
+    )
+    headers = {"Cache-Control": "no-cache"}
+    if etag is not None:
+        headers["ETag"] = etag
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def versioned_response(http_request: Request, content, version, key=None):
+    """JSON response with an ETag derived from the version of its source, or a 304 on If-None-Match"""
+    etag = f'W/"{hashlib.blake2b(request_key(body=key, scope=[version]).encode(), digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content, headers=headers)
+
+async def invalidate_response_cache(request: Request):
+    """Dependency of mutating endpoints: cached responses are dropped once the write is done"""
+    request.state.invalidate_response_cache = True
+
+@app.middleware("http")
+async def invalidate_response_cache_after_writes(request: Request, call_next):
+    # teardowns of yield dependencies run after the response is sent: invalidate
+    # here instead, before the client can read back its write from the cache
+    try:
+        return await call_next(request)
+    finally:
+        if getattr(request.state, "invalidate_response_cache", False):
+            response_cache.invalidate()
+
 ################################
 ## API Key Validation methods ##
 ################################
@@ -120,7 +214,7 @@ async def verify_write_key(request: Request):
 async def verify_read_namespaces(request: Request):
     """If shared pool, all users see each other's work"""
     if IS_SHARED_POOL:
-        return kube_api.list_namespaces()
+        return await executor.kube(kube_api.list_namespaces)
     if STATIC_WORKSPACE is not None and len(STATIC_WORKSPACE.strip()) > 0:
         return [STATIC_WORKSPACE]
     
@@ -180,15 +274,16 @@ async def verify_force_namespace(request: Request):
     description="Gets information regarding all resources (CPU, GPU, memory, etc.) in the kalavai pool. This helps identify resource availability",
     response_description="Resource information for the kalavai pool")
 async def total_resources(request: NodesRequest, api_key: str = Depends(verify_read_key)):
-    if request.node_labels is not None:
-        request.node_names = kube_api.get_nodes_with_labels(
-            labels=request.node_labels)
-        if request.node_names is None or len(request.node_names) == 0:
-            return {}
-    if request.detailed:
-        return kube_api.get_node_resources(node_names=request.node_names)
-    else:
-        return kube_api.get_total_allocatable_resources(node_names=request.node_names)
+    async with cluster_snapshot():
+        if request.node_labels is not None:
+            request.node_names = await executor.kube(kube_api.get_nodes_with_labels,
+                labels=request.node_labels)
+            if request.node_names is None or len(request.node_names) == 0:
+                return {}
+        if request.detailed:
+            return FastJSONResponse(await executor.kube(kube_api.get_node_resources, node_names=request.node_names))
+        else:
+            return await executor.kube(kube_api.get_total_allocatable_resources, node_names=request.node_names)
 
 @app.post("/v1/get_cluster_available_resources", 
     operation_id="get_cluster_available_resources",
@@ -196,16 +291,33 @@ async def total_resources(request: NodesRequest, api_key: str = Depends(verify_r
     tags=["pool_info"],
     description="Gets information regarding available resources (CPU, GPU, memory, etc.) in the kalavai pool. This helps identify if there are resources available for deployments",
     response_description="Resource information for the kalavai pool")
-async def available_resources(request: NodesRequest, api_key: str = Depends(verify_read_key)):
-    if request.node_labels is not None:
-        request.node_names = kube_api.get_nodes_with_labels(
-            labels=request.node_labels)
-        if request.node_names is None or len(request.node_names) == 0:
-            return {}
-    if request.detailed:
-        return kube_api.get_node_available_resources(node_names=request.node_names)
-    else:
-        return kube_api.get_available_resources(node_names=request.node_names)
+async def available_resources(request: NodesRequest, http_request: Request, api_key: str = Depends(verify_read_key)):
+    async def compute():
+        async with cluster_snapshot():
+            node_names = request.node_names
+            if request.node_labels is not None:
+                node_names = await executor.kube(kube_api.get_nodes_with_labels,
+                    labels=request.node_labels)
+                if node_names is None or len(node_names) == 0:
+                    return {}
+            if request.detailed:
+                return await executor.kube(kube_api.get_node_available_resources, node_names=node_names)
+            else:
+                return await executor.kube(kube_api.get_available_resources, node_names=node_names)
+    return await cached_response(http_request, "get_cluster_available_resources", compute,
+        sources=("nodes", "pods", "gpu_metrics"),
+        body=request)
+
+@app.get("/v1/get_cache_status", 
+    operation_id="get_cache_status",
+    summary="Get the state of the in-memory cluster caches",
+    tags=["pool_info"],
+    description="Gets the health of the node and pod watches and the drift counters of the resource ledger used to answer resource queries",
+    response_description="Cache health and ledger drift counters")
+async def cache_status(api_key: str = Depends(verify_read_key)):
+    status = await executor.kube(kube_api.get_cache_status)
+    status["responses"] = response_cache.status()
+    return status
 
 @app.get("/v1/get_available_user_spaces", 
     operation_id="get_available_user_spaces",
@@ -222,9 +334,10 @@ async def get_user_spaces(api_key: str = Depends(verify_read_key), namespaces: s
     tags=["pool_info"],
     description="Gets labels for the kalavai pool",
     response_description="Labels for the kalavai pool")
-async def cluster_labels(api_key: str = Depends(verify_read_key)):
-    labels = kube_api.extract_cluster_labels()
-    return labels
+async def cluster_labels(http_request: Request, api_key: str = Depends(verify_read_key)):
+    async def compute():
+        return await executor.kube(kube_api.extract_cluster_labels)
+    return await cached_response(http_request, "get_cluster_labels", compute, sources=("nodes",))
 
 @app.post("/v1/get_node_labels", 
     operation_id="get_node_labels",
@@ -233,7 +346,7 @@ async def cluster_labels(api_key: str = Depends(verify_read_key)):
     description="Gets labels associated with a set of nodes in the kalavai pool",
     response_description="Labels for the nodes in the kalavai pool")
 async def node_labels(request: NodesRequest, api_key: str = Depends(verify_read_key)):
-    labels = kube_api.get_node_labels(
+    labels = await executor.kube(kube_api.get_node_labels,
         node_names=request.node_names,
         label_filter=request.node_labels
     )
@@ -245,16 +358,21 @@ async def node_labels(request: NodesRequest, api_key: str = Depends(verify_read_
     tags=["pool_info"],
     description="Gets GPU details associated with a set of nodes in the kalavai pool",
     response_description="GPUs for the nodes in the kalavai pool")
-async def node_gpus(request: NodesRequest, api_key: str = Depends(verify_read_key)):
-    if request.node_labels is not None:
-        node_names = kube_api.get_nodes_with_labels(
-            labels=request.node_labels)
-        if request.node_names is not None:
-            request.node_names = [node for node in node_names if node in request.node_names]
-        else:
-            request.node_names = node_names
-    gpus = kube_api.get_node_gpus(node_names=request.node_names)
-    return gpus
+async def node_gpus(request: NodesRequest, http_request: Request, api_key: str = Depends(verify_read_key)):
+    async def compute():
+        async with cluster_snapshot():
+            node_names = request.node_names
+            if request.node_labels is not None:
+                labelled_nodes = await executor.kube(kube_api.get_nodes_with_labels,
+                    labels=request.node_labels)
+                if node_names is not None:
+                    node_names = [node for node in labelled_nodes if node in node_names]
+                else:
+                    node_names = labelled_nodes
+            return await executor.kube(kube_api.get_node_gpus, node_names=node_names)
+    return await cached_response(http_request, "get_node_gpus", compute,
+        sources=("nodes", "pods", "gpu_metrics"),
+        body=request)
 
 @app.get("/v1/get_gpu_metrics", 
     operation_id="get_gpu_metrics",
@@ -263,7 +381,7 @@ async def node_gpus(request: NodesRequest, api_key: str = Depends(verify_read_ke
     description="Gets GPU utilisation metrics, such as gpu count and vRAM memory utilisation, for all nodes in the Kalavai pool",
     response_description="GPU utilisation metrics for the nodes in the kalavai pool")
 async def gpu_metrics(api_key: str = Depends(verify_read_key)):
-    return kube_api.get_gpu_utilisation()
+    return await executor.kube(kube_api.get_gpu_utilisation)
 
 @app.post("/v1/get_pods_with_status", 
     operation_id="get_pods_with_status",
@@ -272,12 +390,13 @@ async def gpu_metrics(api_key: str = Depends(verify_read_key)):
     description="Gets pods with a given status within a set of nodes in the kalavai pool",
     response_description="Pods with the given status for the nodes in the kalavai pool")
 async def pods_with_status(request: PodsWithStatusRequest, api_key: str = Depends(verify_read_key)):
-    if request.node_names is None:
-        node_names = kube_api.get_nodes()
+    node_names = request.node_names
+    if node_names is None:
+        node_names = await executor.kube(kube_api.get_nodes)
     pods = []
     for name in node_names:
         pods.extend(
-            kube_api.get_pods_with_status(
+            await executor.kube(kube_api.get_pods_with_status,
                 node_name=name,
                 statuses=request.statuses
             )
@@ -290,8 +409,10 @@ async def pods_with_status(request: PodsWithStatusRequest, api_key: str = Depend
     tags=["pool_info"],
     description="Gets connected nodes in the kalavai pool. Can filter by labels using request body",
     response_description="Nodes in the kalavai pool")
-async def get_nodes(request: FetchNodesRequest, api_key: str = Depends(verify_read_key)):
-    return kube_api.get_nodes_states(node_labels=request.node_labels)
+async def get_nodes(request: FetchNodesRequest, http_request: Request, api_key: str = Depends(verify_read_key)):
+    async def compute():
+        return await executor.kube(kube_api.get_nodes_states, node_labels=request.node_labels)
+    return await cached_response(http_request, "fetch_nodes", compute, sources=("nodes",), body=request)
 
 @app.post("/v1/fetch_nodes_stats", 
     operation_id="fetch_nodes_stats",
@@ -299,30 +420,42 @@ async def get_nodes(request: FetchNodesRequest, api_key: str = Depends(verify_re
     tags=["pool_info"],
     description="Gets node runtime stats for a set of nodes in the kalavai pool; time series",
     response_description="Node runtime stats for the nodes in the kalavai pool")
-async def node_stats(request: NodeStatusRequest, api_key: str = Depends(verify_read_key)):
-    client = PrometheusAPI(url=PROMETHEUS_ENDPOINT, disable_ssl=True) # works as long as we are port forwarding from control plane
+async def node_stats(request: NodeStatusRequest, response: Response, api_key: str = Depends(verify_read_key)):
+    client = insecure_prometheus_api
 
+    # labels are matched by prometheus itself when joining on kube_node_labels
+    node_labels = None
     if request.node_names is None:
         if request.node_labels is None:
             raise HTTPException(status_code=400, detail="node_names or node_labels must be provided")
         
-        request.node_names = kube_api.get_nodes_with_labels(
-            labels=request.node_labels)
+        if NODE_LABEL_JOIN:
+            node_labels = request.node_labels
+        else:
+            request.node_names = await executor.kube(kube_api.get_nodes_with_labels,
+                labels=request.node_labels)
         
-    if request.namespaces is None and (request.node_names is None or len(request.node_names) == 0):
+    if request.namespaces is None and node_labels is None and (request.node_names is None or len(request.node_names) == 0):
         return {}
     
-    return client.get_nodes_stats(
+    timings = {}
+    stats = await executor.prometheus(client.get_nodes_stats,
         node_ids=request.node_names,
+        node_labels=node_labels,
         start_time=request.start_time,
         end_time=request.end_time,
         step=request.step,
         aggregate_node_results=request.aggregate_results,
         resources=request.resources,
-        namespaces=request.namespaces
+        namespaces=request.namespaces,
+        timings=timings
     )
+    # per query durations, e.g. "node_status;dur=812.4, capacity;dur=640.1, used;dur=1503.9"
+    response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+    return stats
 
 @app.post("/v1/delete_nodes", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="delete_nodes",
     summary="Delete, or disconnects, a set of nodes from the Kalavai compute pool",
     tags=["pool_management"],
@@ -330,11 +463,12 @@ async def node_stats(request: NodeStatusRequest, api_key: str = Depends(verify_r
     response_description="None")
 async def delete_nodes(request: NodesRequest, api_key: str = Depends(verify_admin_key)):
     for node in request.node_names:
-        kube_api.delete_node(node)
+        await executor.kube(kube_api.delete_node, node)
     return None
 
 
 @app.post("/v1/set_node_schedulable", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="set_node_schedulable",
     summary="Set the schedulable state of a set of nodes in the Kalavai compute pool",
     tags=["pool_management"],
@@ -342,10 +476,11 @@ async def delete_nodes(request: NodesRequest, api_key: str = Depends(verify_admi
     response_description="None")
 async def set_nodes_schedulable(request: NodesRequest, api_key: str = Depends(verify_admin_key)):
     for node in request.node_names:
-        kube_api.set_node_schedulable(node_name=node, state=request.schedulable)
+        await executor.kube(kube_api.set_node_schedulable, node_name=node, state=request.schedulable)
     return None
 
 @app.post("/v1/add_labels_to_node", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="add_labels_to_node",
     summary="Add labels (key-value pairs) to a specific node",
     tags=["pool_management"],
@@ -355,7 +490,7 @@ async def add_labels_to_node(request: NodeLabelsRequest, api_key: str = Depends(
     """
     Add labels to a specific node by its name.
     """
-    success = kube_api.add_labels_to_node(
+    success = await executor.kube(kube_api.add_labels_to_node,
         node_name=request.node_name,
         new_labels=request.labels
     )
@@ -372,10 +507,7 @@ async def add_labels_to_node(request: NodeLabelsRequest, api_key: str = Depends(
     description="Gets storage usage for a set of namespaces in the kalavai pool",
     response_description="Storage usage for the namespaces in the kalavai pool")
 async def get_storage_usage(request: StorageRequest, api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_objects = {}
-    for namespace in namespaces:
-        ns_objects[namespace] = kube_api.get_storage_usage(namespace=namespace, target_storages=request.names)
-    return ns_objects
+    return await executor.kube(kube_api.get_storage_usage_for_namespaces, namespaces=namespaces, target_storages=request.names)
 
 @app.post("/v1/get_objects_of_type", 
     operation_id="get_objects_of_type",
@@ -384,19 +516,15 @@ async def get_storage_usage(request: StorageRequest, api_key: str = Depends(veri
     description="Gets objects of a given type in a set of namespaces in the kalavai pool",
     response_description="Objects of the given type in the namespaces in the kalavai pool")
 async def get_deployment_type(request: CustomObjectRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_objects = {}
     if can_force_namespace and request.force_namespace is not None:
         namespaces = [request.force_namespace]
 
-    for namespace in namespaces:
-        objects = kube_api.kube_get_custom_objects(
-            group=request.group,
-            namespace=namespace,
-            api_version=request.api_version,
-            plural=request.plural)
-        if len(objects) > 0:
-            ns_objects[namespace] = objects
-    return ns_objects
+    ns_objects = await executor.kube(kube_api.kube_get_custom_objects_for_namespaces,
+        group=request.group,
+        namespaces=namespaces,
+        api_version=request.api_version,
+        plural=request.plural)
+    return FastJSONResponse(ns_objects)
 
 
 @app.post("/v1/get_status_for_object", 
@@ -406,19 +534,15 @@ async def get_deployment_type(request: CustomObjectRequest, can_force_namespace:
     description="Gets status for a given object in a set of namespaces in the kalavai pool",
     response_description="Status for the given object in the namespaces in the kalavai pool")
 async def get_status_for_object(request: CustomObjectRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_objects = {}
     if can_force_namespace and request.force_namespace is not None:
         namespaces = [request.force_namespace]
     
-    for namespace in namespaces:
-        objects = kube_api.kube_get_status_custom_object(
-            group=request.group,
-            api_version=request.api_version,
-            plural=request.plural,
-            namespace=namespace,
-            name=request.name)
-        if objects is not None:
-            ns_objects[namespace] = objects
+    ns_objects = await executor.kube(kube_api.kube_get_status_custom_object_for_namespaces,
+        group=request.group,
+        api_version=request.api_version,
+        plural=request.plural,
+        namespaces=namespaces,
+        name=request.name)
     return ns_objects
 
 
@@ -431,11 +555,47 @@ async def get_status_for_object(request: CustomObjectRequest, can_force_namespac
 async def get_logs_for_label(request: GetLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    logs = kube_api.get_logs_for_labels(
+    logs = await executor.kube(kube_api.get_logs_for_labels,
         namespace=namespace,
         labels=request.labels,
         tail_lines=request.tail_lines)
-    return logs
+    return FastJSONResponse(logs)
+
+@app.post("/v1/stream_logs_for_label", 
+    operation_id="stream_logs_for_label",
+    summary="Follow logs of every pod matching a label in the Kalavai compute pool",
+    tags=["log_streaming"],
+    description="Streams the logs of every pod matching a label as they are written, multiplexed into one response with the pod name on every line (text or server-sent events). The stream ends when all pods stop logging, when max_bytes have been sent or when the client disconnects.",
+    response_description="Stream of log lines prefixed by pod name")
+async def stream_logs_for_label(request: StreamLogsRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespace: str = Depends(verify_write_namespace)):
+    if can_force_namespace and request.force_namespace is not None:
+        namespace = request.force_namespace
+    match = await executor.kube(kube_api.find_pods_with_label,
+        namespace=namespace,
+        labels=request.labels)
+    pods = [
+        (pod["metadata"].get("namespace") or namespace, pod_name)
+        for label_pods in match.values()
+        for pod_name, pod in label_pods.items()
+    ]
+    if len(pods) > LOG_STREAM_MAX_PODS:
+        raise HTTPException(status_code=400, detail=f"{len(pods)} pods match, at most {LOG_STREAM_MAX_PODS} can be followed at once")
+    if not follow_limit.acquire(len(pods)):
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many log streams open ({follow_limit.followed} of {follow_limit.limit} pods followed), retry later",
+            headers={"Retry-After": "10"}
+        )
+    multiplexer = LogMultiplexer(
+        core_api=kube_api.core_api,
+        pods=pods,
+        tail_lines=request.tail_lines,
+        max_bytes=min(request.max_bytes or LOG_STREAM_MAX_BYTES, LOG_STREAM_MAX_BYTES),
+        sse=request.format == "sse",
+        limit=follow_limit
+    )
+    # close (and give the pods back) even if the stream is never iterated
+    return StreamingResponse(multiplexer.stream(), media_type=multiplexer.media_type, background=BackgroundTask(multiplexer.close))
 
 @app.post("/v1/get_job_details", 
     operation_id="get_job_details",
@@ -446,11 +606,12 @@ async def get_logs_for_label(request: GetLabelledResourcesRequest, can_force_nam
 async def get_job_details_for_label(request: GetLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    logs = kube_api.get_job_info_for_labels(
+    logs = await executor.kube(kube_api.get_job_info_for_labels,
         namespace=namespace,
         labels=request.labels,
-        tail_lines=request.tail_lines)
-    return logs
+        tail_lines=request.tail_lines,
+        include_events=request.include_events)
+    return FastJSONResponse(logs)
 
 @app.post("/v1/get_jobs_overview", 
     operation_id="get_jobs_overview",
@@ -458,27 +619,28 @@ async def get_job_details_for_label(request: GetLabelledResourcesRequest, can_fo
     tags=["workload_info"],
     description="Gets pods status and service endpoints for a given list of jobs in a set of namespaces in the kalavai pool",
     response_description="Pods status and services for the given labels in the namespaces in the kalavai pool")
-async def get_jobs_overview(request: GetJobsOverviewRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
+async def get_jobs_overview(request: GetJobsOverviewRequest, http_request: Request, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
     if can_force_namespace and request.force_namespace is not None:
         namespaces = [request.force_namespace]
-    ns_logs = defaultdict(dict)
 
-    # KalavaiJob monitoring
-    # get pods and services info from the kalava job
-    for namespace in namespaces:
+    async def compute():
+        ns_logs = defaultdict(dict)
+
+        # KalavaiJob monitoring
+        # get pods and services info from the kalava job
         # get all KalavaiJobs
-        try:
-            jobs = kube_api.list_namespaced_kalavaijob(namespace=namespace, label_selector=None)
+        ns_jobs = await executor.kube(kube_api.list_kalavaijobs_for_namespaces, namespaces=namespaces, label_selector=None)
+        for namespace, jobs in ns_jobs.items():
             ns_logs[namespace] = defaultdict(dict)
             for job in jobs["items"]:
                 job_id = job.get("metadata", {}).get("labels", {}).get("jobId", None)
                 ns_logs[namespace][job_id]["status"] = job.get("status", {})
                 ns_logs[namespace][job_id]["spec"] = job.get("spec", {})
                 ns_logs[namespace][job_id]["metadata"] = job.get("metadata", {})
-        except:
-            return {}
+        return ns_logs
 
-    return ns_logs
+    # kalavai jobs are not watched: ETag from the response content
+    return await cached_response(http_request, "get_jobs_overview", compute, body=request, scope=namespaces)
 
 @app.post("/v1/get_services_for_label", 
     operation_id="get_services_for_label",
@@ -487,15 +649,12 @@ async def get_jobs_overview(request: GetJobsOverviewRequest, can_force_namespace
     description="Get services with a given set of labels in a set of namespaces in the Kalavai compute pool",
     response_description="List of services matching the labels given in the namespaces in the kalavai pool")
 async def get_services_for_label(request: GetLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_services = defaultdict(dict)
     if can_force_namespace and request.force_namespace is not None:
         namespaces = [request.force_namespace]
 
-    for namespace in namespaces:
-        services = kube_api.get_services_with_labels(
-            labels=request.labels,
-            namespace=namespace)
-        ns_services[namespace] = services
+    ns_services = await executor.kube(kube_api.get_services_with_labels_for_namespaces,
+        labels=request.labels,
+        namespaces=namespaces)
 
     return ns_services
 
@@ -508,10 +667,10 @@ async def get_services_for_label(request: GetLabelledResourcesRequest, can_force
 async def describe_pods_for_label(request: GetLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    logs = kube_api.describe_pods_for_labels(
+    logs = await executor.kube(kube_api.describe_pods_for_labels,
         namespace=namespace,
         labels=request.labels)
-    return logs
+    return FastJSONResponse(logs)
 
 @app.post("/v1/get_pods_status_for_label", 
     operation_id="get_pods_status_for_label",
@@ -520,17 +679,14 @@ async def describe_pods_for_label(request: GetLabelledResourcesRequest, can_forc
     description="Gets pods status for a given label in a set of namespaces in the kalavai pool",
     response_description="Pods status for the given label in the namespaces in the kalavai pool")
 async def get_pods_status_for_label(request: GetLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_logs = defaultdict(dict)
     if can_force_namespace and request.force_namespace is not None:
         namespaces = [request.force_namespace]
 
-    for namespace in namespaces:
-        pods_status = kube_api.get_pods_status_for_label(
-            labels=request.labels,
-            namespace=namespace)
-        ns_logs[namespace] = pods_status
+    ns_logs = await executor.kube(kube_api.get_pods_status_for_label_for_namespaces,
+        labels=request.labels,
+        namespaces=namespaces)
 
-    return ns_logs
+    return FastJSONResponse(ns_logs)
 
 
 @app.post("/v1/get_ports_for_services", 
@@ -540,7 +696,7 @@ async def get_pods_status_for_label(request: GetLabelledResourcesRequest, can_fo
     description="Gets ports for services for a given label in a set of namespaces in the kalavai pool",
     response_description="Ports for the services for the given label in the namespaces in the kalavai pool")
 async def get_ports_for_services(request: ServiceWithLabelRequest, api_key: str = Depends(verify_read_key)):
-    services = kube_api.get_ports_for_services(
+    services = await executor.kube(kube_api.get_ports_for_services,
         label_key=request.label,
         label_value=request.value,
         types=request.types,
@@ -557,12 +713,10 @@ async def get_ports_for_services(request: ServiceWithLabelRequest, api_key: str
 async def get_deployments(api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
 
     # legacy
-    ns_deployments = {}
-    for namespace in namespaces:
-        ns_deployments[namespace] = kube_api.list_deployments(
-            namespace=namespace
-        )
-    return ns_deployments
+    ns_deployments = await executor.kube(kube_api.list_deployments_for_namespaces,
+        namespaces=namespaces
+    )
+    return FastJSONResponse(ns_deployments)
 
 @app.post("/v1/fetch_compute_usage", 
     operation_id="fetch_compute_usage",
@@ -571,24 +725,29 @@ async def get_deployments(api_key: str = Depends(verify_read_key), namespaces: s
     description="Gets the compute usage for a set of nodes/namespaces in the kalavai pool as monitored by prometheus.",
     response_description="Compute usage for the nodes/namespaces in the kalavai pool")
 async def compute_usage(request: ComputeUsageRequest, api_key: str = Depends(verify_read_key)):
-    prometheus = PrometheusAPI(url=PROMETHEUS_ENDPOINT)
+    prometheus = prometheus_api
 
     if request.node_names is None and request.node_labels is None and request.namespaces is None:
         raise HTTPException(status_code=400, detail="node_names or node_labels or namespaces must be provided")
         
+    node_labels = None
     if request.node_labels is not None:
-        request.node_names = kube_api.get_nodes_with_labels(
-            labels=request.node_labels
-        )
+        if NODE_LABEL_JOIN and request.node_names is None:
+            node_labels = request.node_labels
+        else:
+            request.node_names = await executor.kube(kube_api.get_nodes_with_labels,
+                labels=request.node_labels
+            )
     
-    if request.namespaces is None and (request.node_names is None or len(request.node_names) == 0):
+    if request.namespaces is None and node_labels is None and (request.node_names is None or len(request.node_names) == 0):
         metrics = {resource: 0 for resource in request.resources}
     else:
-        metrics = prometheus.get_cumulative_compute_usage(
+        metrics = await executor.prometheus(prometheus.get_cumulative_compute_usage,
             resources=request.resources,
             start_time=request.start_time,
             end_time=request.end_time,
             node_ids=request.node_names,
+            node_labels=node_labels,
             namespaces=request.namespaces,
             normalize=request.normalize,
             step_seconds=request.step_seconds)
@@ -609,18 +768,18 @@ async def compute_usage(request: ComputeUsageRequest, api_key: str = Depends(ver
     description="Gets cost (from node usage) for a set of nodes in the kalavai pool as monitored by kubecost.",
     response_description="Cost for the nodes in the kalavai pool")
 async def node_cost(request: NodeCostRequest, api_key: str = Depends(verify_read_key)):
-    opencost = OpenCostAPI(base_url=OPENCOST_ENDPOINT)
+    opencost = opencost_api
 
     if request.node_names is None:
         if request.node_labels is None:
             raise HTTPException(status_code=400, detail="node_names or node_labels must be provided")
         
-        request.node_names = kube_api.get_nodes_with_labels(
+        request.node_names = await executor.kube(kube_api.get_nodes_with_labels,
             labels=request.node_labels
         )
     print(f"Getting cost for nodes: {request.node_names}")
 
-    return opencost.get_nodes_computation(
+    return await executor.opencost(opencost.get_nodes_computation,
         nodes=request.node_names,
         aggregate_results=request.aggregate_results,
         **request.kubecost_params.model_dump())
@@ -632,13 +791,14 @@ async def node_cost(request: NodeCostRequest, api_key: str = Depends(verify_read
     description="Gets cost (from namespace usage) for a set of namespaces in the kalavai pool as monitored by kubecost.",
     response_description="Cost for the namespaces in the kalavai pool")
 async def namespace_cost(request: NamespacesCostRequest, api_key: str = Depends(verify_read_key)):
-    opencost = OpenCostAPI(base_url=OPENCOST_ENDPOINT)
+    opencost = opencost_api
 
-    return opencost.get_namespaces_cost(
+    return await executor.opencost(opencost.get_namespaces_cost,
         namespaces=request.namespace_names,
         **request.kubecost_params.model_dump())
 
 @app.post("/v1/create_user_space", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="create_user_space",
     summary="Create a user workspace in the Kalavai compute pool",
     tags=["pool_management"],
@@ -650,7 +810,7 @@ async def create_user_space(request: UserWorkspaceRequest, can_force_namespace:
         namespace = request.force_namespace
 
     try:
-        result = kube_api.create_userspace(
+        result = await executor.kube(kube_api.create_userspace,
             name=namespace,
             extra_labels=request.labels,
             resource_quota=request.quota
@@ -658,7 +818,7 @@ async def create_user_space(request: UserWorkspaceRequest, can_force_namespace:
         
         # add annotation to user node if required
         if request.user_id is not None and request.node_name is not None:
-            kube_api.add_annotation_to_node(
+            await executor.kube(kube_api.add_annotation_to_node,
                 node_labels={"kubernetes.io/hostname": request.node_name},
                 annotation={KALAVAI_USER_KEY: request.user_id}
             )
@@ -668,6 +828,7 @@ async def create_user_space(request: UserWorkspaceRequest, can_force_namespace:
     return {"status": "success"}
 
 @app.post("/v1/delete_user_space", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="delete_user_space",
     summary="Delete a user workspace in the Kalavai compute pool",
     tags=["pool_management"],
@@ -679,7 +840,7 @@ async def delete_user_space(request: UserWorkspaceRequest, can_force_namespace:
         namespace = request.force_namespace
 
     try:
-        kube_api.delete_namespace(
+        await executor.kube(kube_api.delete_namespace,
             name=namespace)
 
     except Exception as e:
@@ -687,6 +848,7 @@ async def delete_user_space(request: UserWorkspaceRequest, can_force_namespace:
     return {"status": "success"}
 
 @app.post("/v1/set_space_quota", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="set_space_quota",
     summary="Set the resource quota for a given namespace",
     tags=["pool_management"],
@@ -697,11 +859,11 @@ async def set_user_quota(request: UserWorkspaceRequest, can_force_namespace: boo
     if request.quota is None:
         raise HTTPException(status_code=400, detail="quota must be provided")
     
-    kube_api.create_namespace(
+    await executor.kube(kube_api.create_namespace,
         name=request.user_id,
         labels=request.labels)
     try:
-        kube_api.set_resource_quota(
+        await executor.kube(kube_api.set_resource_quota,
             namespace=request.user_id,
             quotas=request.quota,
             labels=request.labels)
@@ -717,30 +879,35 @@ async def set_user_quota(request: UserWorkspaceRequest, can_force_namespace: boo
     response_description="None")
 async def get_user_quota(user_id: str, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_read_key), namespace: str = Depends(verify_write_namespace)):
     # get resource quota for the user
-    quotas = kube_api.get_resource_quotas(
+    quotas = await executor.kube(kube_api.get_resource_quotas,
         namespace=user_id)
 
     return quotas
 
 @app.post("/v1/create_or_update_user_data", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="create_or_update_user_data",
     summary="Create or update user data (Secret or ConfigMap) in the Kalavai compute pool",
     tags=["pool_management"],
-    description="Creates a Secret if encrypted=True or ConfigMap if encrypted=False. Creates the resource if it doesn't exist or updates it if it does. Secrets are base64 encoded and stored as Opaque type, ConfigMaps store plain text configuration data.",
+    description="Creates a Secret if encrypted=True or ConfigMap if encrypted=False. Creates the resource if it doesn't exist or updates it if it does, with server-side apply: keys written by a previous update and missing from data are removed, and keys managed by others are reported as conflicts (409) unless force_conflicts=True. Secrets are base64 encoded and stored as Opaque type, ConfigMaps store plain text configuration data.",
     response_description="Result of the operation")
 async def create_or_update_user_data(request: UserDataRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_write_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
     
     try:
-        resource = kube_api.create_or_update_user_data(
+        resource = await executor.kube(kube_api.create_or_update_user_data,
             name=request.name,
             namespace=namespace,
             data=request.data,
-            encrypted=request.encrypted
+            encrypted=request.encrypted,
+            force_conflicts=request.force_conflicts
         )
         resource_type = "Secret" if request.encrypted else "ConfigMap"
         return {"status": "success", "message": f"{resource_type} '{request.name}' created/updated successfully in namespace '{namespace}'"}
+    except ApplyConflictError as e:
+        resource_type = "Secret" if request.encrypted else "ConfigMap"
+        raise HTTPException(status_code=409, detail={"message": f"Conflicts updating {resource_type}: {str(e)}", "conflicts": e.conflicts})
     except Exception as e:
         resource_type = "Secret" if request.encrypted else "ConfigMap"
         raise HTTPException(status_code=500, detail=f"Failed to create/update {resource_type}: {str(e)}")
@@ -758,7 +925,7 @@ async def fetch_user_data(request: UserDataRequest, can_force_namespace: bool =
         # Use the first available namespace for read operations
         namespace = namespaces[0] if isinstance(namespaces, list) else namespaces
     try:
-        resource = kube_api.get_user_data(
+        resource = await executor.kube(kube_api.get_user_data,
             name=request.name,
             namespace=namespace,
             encrypted=request.encrypted
@@ -776,18 +943,12 @@ async def fetch_user_data(request: UserDataRequest, can_force_namespace: bool =
     tags=["workload_info"],
     description="Gets available job and model engine templates in the kalavai pool",
     response_description="Job templates in the kalavai pool")
-async def get_job_templates(type: str=None, api_key: str = Depends(verify_read_key)):
-    model_templates = []
-    for e in JobTemplate:
-        if type is None:
-            model_templates.append(e.name)
-        else:
-            job = await get_job_defaults(request=JobTemplateRequest(template=e.name))
-            if "error" in job:
-                continue
-            if job["metadata"]["type"] == type:
-                model_templates.append(e.name)
-    return model_templates
+async def get_job_templates(http_request: Request, type: str=None, api_key: str = Depends(verify_read_key)):
+    return versioned_response(
+        http_request,
+        template_catalog.templates(type=type),
+        version=template_catalog.version,
+        key={"endpoint": "get_job_templates", "type": type})
 
 @app.get("/v1/get_template_types", 
     operation_id="get_template_types",
@@ -795,8 +956,12 @@ async def get_job_templates(type: str=None, api_key: str = Depends(verify_read_k
     tags=["workload_info"],
     description="Gets templates by type with the option to filter them by a specific type",
     response_description="Job templates and types")
-async def template_types_get(filter: list[str] | None = Query(default=None), api_key: str = Depends(verify_read_key)):
-    return get_template_types(filter=filter)
+async def template_types_get(http_request: Request, filter: list[str] | None = Query(default=None), api_key: str = Depends(verify_read_key)):
+    return versioned_response(
+        http_request,
+        template_catalog.template_types(filter=filter),
+        version=template_catalog.version,
+        key={"endpoint": "get_template_types", "filter": filter})
 
 @app.get("/v1/job_defaults", 
     operation_id="get_job_defaults",
@@ -805,17 +970,42 @@ async def template_types_get(filter: list[str] | None = Query(default=None), api
     description="Gets default values for a job template in the kalavai pool",
     response_description="Default values for the job template in the kalavai pool")
 async def get_job_defaults(template_name: str, api_key: str = Depends(verify_read_key)):
-    try:
-        job = Job(template=template_name)
-        return {
-            "defaults": job.get_defaults(),
-            "metadata": job.get_metadata()
-        }
-    except Exception as e:
-        return {"error": str(e)}
-
+    entry = template_catalog.get(template_name)
+    if entry is None:
+        return {"error": f"Template '{template_name}' not found"}
+    return {
+        "defaults": entry["defaults"],
+        "metadata": entry["metadata"]
+    }
+
+
+async def deploy_job_replicas(job, request, namespace, default_values=None):
+    """Render every replica of a job from its compiled template, then deploy them as one concurrent batch"""
+    if request.rollback_on_failure and request.server_side_apply:
+        raise HTTPException(status_code=400, detail="rollback_on_failure is not supported with server_side_apply")
+    deployments = []
+    for replica in range(request.replicas):
+        deployment = job.populate(
+            values=request.template_values,
+            default_values=default_values,
+            target_labels=request.target_labels,
+            target_labels_ops=request.target_labels_ops,
+            replica=replica if request.replicas > 1 else None,
+            # applied objects keep their name, so redeploys update the same job
+            random_suffix=request.random_suffix and not request.server_side_apply,
+            user_id=namespace,
+            priority=request.priority)
+        print(f"-> [{replica}] Deployment parsed: ", deployment)
+        deployments.append((job.job_name, deployment))
+    return await executor.kube(kube_api.deploy_replicas,
+        deployments=deployments,
+        namespace=namespace,
+        server_side_apply=request.server_side_apply,
+        force_conflicts=request.force_conflicts,
+        rollback_on_failure=request.rollback_on_failure)
 
 @app.post("/v1/deploy_job", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_job",
     summary="Deploy a job from a job or model engine template in the Kalavai compute pool",
     tags=["workload_management"],
@@ -825,33 +1015,14 @@ async def deploy_job(request: JobTemplateRequest, can_force_namespace: bool = De
     # populate template with values
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    responses = []
     print(">>>> Deploy to NAMESPACE: ", namespace)
-    
-    for replica in range(request.replicas):
-        job = Job(template=request.template)
-        deployment = job.populate(
-            values=request.template_values,
-            target_labels=request.target_labels,
-            target_labels_ops=request.target_labels_ops,
-            replica=replica if request.replicas > 1 else None,
-            random_suffix=request.random_suffix,
-            user_id=namespace,
-            priority=request.priority)
-        
-        print(f"-> [{replica}] Deployment parsed: ", deployment)
-        
-        # deploy job
-        responses.append({
-            "job_id": job.job_name,
-            "result":kube_api.kube_deploy_plus(
-                yaml_strs=deployment,
-                force_namespace=namespace
-            )
-        })
-    return responses
+    return await deploy_job_replicas(
+        job=Job(template=request.template),
+        request=request,
+        namespace=namespace)
 
 @app.post("/v1/deploy_custom_job", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_custom_job",
     summary="Deploy a job from a custom job template in the Kalavai compute pool",
     tags=["workload_management"],
@@ -862,32 +1033,14 @@ async def deploy_job_dev(request: CustomJobTemplateRequest, can_force_namespace:
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
     print("> Deploy to NAMESPACE: ", namespace)
-    yaml_defaults = yaml.safe_load(request.default_values)
-    responses = []
-    for replica in range(request.replicas):
-        job = Job.from_yaml(template_str=request.template)
-        deployment = job.populate(
-            values=request.template_values,
-            default_values=yaml_defaults,
-            target_labels=request.target_labels,
-            target_labels_ops=request.target_labels_ops,
-            replica=replica if request.replicas > 1 else None,
-            random_suffix=request.random_suffix,
-            user_id=namespace,
-            priority=request.priority)
-        print("--->", deployment)
-        
-        # deploy job
-        responses.append({
-            "job_id": job.job_name,
-            "result":kube_api.kube_deploy_plus(
-                yaml_strs=deployment,
-                force_namespace=namespace
-            )
-        })
-    return responses
+    return await deploy_job_replicas(
+        job=Job.from_yaml(template_str=request.template),
+        request=request,
+        namespace=namespace,
+        default_values=yaml.safe_load(request.default_values))
 
 @app.post("/v1/deploy_template", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_template",
     summary="Deploy a job from a template in the Kalavai compute pool",
     tags=["workload_management"],
@@ -899,7 +1052,7 @@ async def deploy_template(request: TemplateDeploymentRequest, can_force_namespac
 
     print(">>>> Deploy template to NAMESPACE: ", namespace)
 
-    result = kube_api.deploy_template(
+    result = await executor.kube(kube_api.deploy_template,
         name=request.name,
         template_repo=request.template_repo,
         template_chart=request.template_chart,
@@ -912,13 +1065,16 @@ async def deploy_template(request: TemplateDeploymentRequest, can_force_namespac
         namespace=namespace,
         is_update=request.is_update,
         resources=request.resources,
-        random_suffix=request.random_suffix
+        random_suffix=request.random_suffix,
+        server_side_apply=request.server_side_apply,
+        force_conflicts=request.force_conflicts
     )
     print("*******************", result)
     
     return result
 
 @app.post("/v1/patch_template", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="patch_template",
     summary="Patch a job from a template in the Kalavai compute pool",
     tags=["workload_management"],
@@ -930,7 +1086,7 @@ async def patch_template(request: TemplateUpdateRequest, can_force_namespace: bo
 
     print(">>>> Patch template on NAMESPACE: ", namespace)
 
-    result = kube_api.patch_template(
+    result = await executor.kube(kube_api.patch_template,
         name=request.name,
         namespace=namespace,
         spec=request.spec
@@ -940,6 +1096,7 @@ async def patch_template(request: TemplateUpdateRequest, can_force_namespace: bo
     return result
 
 @app.delete("/v1/delete_template", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="delete_template",
     summary="Delete job template from the Kalavai compute pool",
     tags=["workload_management"],
@@ -950,7 +1107,7 @@ async def delete_template(request: TemplateDeleteRequest, can_force_namespace: b
         namespace = request.force_namespace
     print(f"DELETE {request.name} on namespace {namespace}")
     try:
-        deleted = kube_api.delete_namespaced_kalavaijob(
+        deleted = await executor.kube(kube_api.delete_namespaced_kalavaijob,
             name=request.name,
             namespace=namespace
         )
@@ -962,6 +1119,7 @@ async def delete_template(request: TemplateDeleteRequest, can_force_namespace: b
 
 #### GENERIC_DEPLOYMENT
 @app.post("/v1/deploy_generic_model", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_generic_model",
     summary="Deploy a generic model in the Kalavai compute pool",
     tags=["workload_management"],
@@ -969,11 +1127,12 @@ async def delete_template(request: TemplateDeleteRequest, can_force_namespace: b
     response_description="None")
 async def deploy_generic_model(request: GenericDeploymentRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_admin_key)):
     if can_force_namespace and request.force_namespace is not None:
-        return kube_api.deploy_generic_model(request.config, force_namespace=request.force_namespace)
+        return await executor.kube(kube_api.deploy_generic_model, request.config, force_namespace=request.force_namespace, server_side_apply=request.server_side_apply, force_conflicts=request.force_conflicts)
     else:
-        return kube_api.deploy_generic_model(request.config) 
+        return await executor.kube(kube_api.deploy_generic_model, request.config, server_side_apply=request.server_side_apply, force_conflicts=request.force_conflicts)
 
 @app.post("/v1/deploy_custom_object", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_custom_object",
     summary="Deploy a custom object in the Kalavai compute pool",
     tags=["workload_management"],
@@ -982,7 +1141,7 @@ async def deploy_generic_model(request: GenericDeploymentRequest, can_force_name
 async def deploy_custom_object(request: CustomObjectDeploymentRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_write_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    response = kube_api.kube_deploy_custom_object(
+    response = await executor.kube(kube_api.kube_deploy_custom_object,
         group=request.object.group,
         api_version=request.object.api_version,
         namespace=namespace,
@@ -991,6 +1150,7 @@ async def deploy_custom_object(request: CustomObjectDeploymentRequest, can_force
     return response
 
 @app.post("/v1/deploy_storage_claim", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_storage_claim",
     summary="Deploy a storage claim in the Kalavai compute pool",
     tags=["workload_management"],
@@ -999,12 +1159,13 @@ async def deploy_custom_object(request: CustomObjectDeploymentRequest, can_force
 async def deploy_storage_claim(request: StorageClaimRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_admin_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    response = kube_api.deploy_storage_claim(
+    response = await executor.kube(kube_api.deploy_storage_claim,
         namespace=namespace,
         **request.model_dump())
     return response
 
 @app.post("/v1/deploy_service", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="deploy_service",
     summary="Deploy a service in the Kalavai compute pool",
     tags=["workload_management"],
@@ -1013,12 +1174,13 @@ async def deploy_storage_claim(request: StorageClaimRequest, can_force_namespace
 async def deploy_service(request: ServiceRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_write_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    response = kube_api.deploy_service(
+    response = await executor.kube(kube_api.deploy_service,
         namespace=namespace,
         **request.model_dump())
     return response
 
 @app.post("/v1/delete_labeled_resources", 
+    dependencies=[Depends(invalidate_response_cache)],
     operation_id="delete_labeled_resources",
     summary="Delete resources with a given label in the Kalavai compute pool",
     tags=["workload_management"],
@@ -1027,7 +1189,41 @@ async def deploy_service(request: ServiceRequest, can_force_namespace: bool = De
 async def delete_labeled_resources(request: DeleteLabelledResourcesRequest, can_force_namespace: bool = Depends(verify_force_namespace), api_key: str = Depends(verify_write_key), namespace: str = Depends(verify_write_namespace)):
     if can_force_namespace and request.force_namespace is not None:
         namespace = request.force_namespace
-    return kube_api.delete_labeled_resources(namespace, request.label, request.value)
+    if not request.run_async:
+        return await executor.kube(kube_api.delete_labeled_resources,
+            namespace,
+            request.label,
+            request.value,
+            propagation_policy=request.propagation_policy)
+
+    async def run(operation):
+        result = await executor.kube(kube_api.delete_labeled_resources,
+            namespace,
+            request.label,
+            request.value,
+            propagation_policy=request.propagation_policy,
+            progress=operation.update)
+        # writes finishing after the response need their own invalidation
+        response_cache.invalidate()
+        return result
+    operation = operations.start(
+        "delete_labeled_resources",
+        run,
+        namespace=namespace,
+        details={"label": request.label, "value": request.value})
+    return {"operation_id": operation.id}
+
+@app.get("/v1/get_operation_status", 
+    operation_id="get_operation_status",
+    summary="Get the progress of an operation running in the background",
+    tags=["workload_info"],
+    description="Gets the state, per step progress and, once finished, the result of an operation started with run_async",
+    response_description="State and progress of the operation")
+async def get_operation_status(operation_id: str = Query(..., description="Id returned when the operation was started"), api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
+    operation = operations.get(operation_id)
+    if operation is None or operation.namespace not in namespaces:
+        raise HTTPException(status_code=404, detail=f"Operation {operation_id} not found")
+    return operation.status()
 
 @app.post("/v1/get_resources_with_label", 
     operation_id="get_resources_with_label",
@@ -1036,12 +1232,10 @@ async def delete_labeled_resources(request: DeleteLabelledResourcesRequest, can_
     description="Gets resources with a given label in the kalavai pool",
     response_description="Resources with the given label in the kalavai pool")
 async def get_resources_with_label(request: GetLabelledResourcesRequest, api_key: str = Depends(verify_read_key), namespaces: str = Depends(verify_read_namespaces)):
-    ns_resources = {}
-    for namespace in namespaces:
-        ns_resources[namespace] = kube_api.find_resources_with_label(
-            namespace=namespace,
-            labels=request.labels)
-    return ns_resources
+    ns_resources = await executor.kube(kube_api.find_resources_with_label_for_namespaces,
+        namespaces=namespaces,
+        labels=request.labels)
+    return FastJSONResponse(ns_resources)
 
 @app.post("/v1/helm_add_repo", 
     operation_id="helm_add_repo",
@@ -1050,7 +1244,7 @@ async def get_resources_with_label(request: GetLabelledResourcesRequest, api_key
     description="Add a repo to the local helm",
     response_description="Result of the operation")
 async def helm_add_repo(request: HelmRepo, api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_add_repo(name=request.name, url=request.url)
+    return await executor.helm(kube_api.helm_add_repo, name=request.name, url=request.url)
 
 @app.post("/v1/helm_update", 
     operation_id="helm_update",
@@ -1059,7 +1253,7 @@ async def helm_add_repo(request: HelmRepo, api_key: str = Depends(verify_read_ke
     description="Update the local helm repositories",
     response_description="Result of the operation")
 async def helm_update(api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_update()
+    return await executor.helm(kube_api.helm_update)
 
 @app.get("/v1/helm_repo_search", 
     operation_id="helm_repo_search",
@@ -1068,7 +1262,7 @@ async def helm_update(api_key: str = Depends(verify_read_key)):
     description="Search a helm repo",
     response_description="Result of the operation")
 async def helm_repo_search(term: str, api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_repo_search(term=term)
+    return await executor.helm(kube_api.helm_repo_search, term=term)
 
 @app.get("/v1/helm_show_values", 
     operation_id="helm_show_values",
@@ -1077,7 +1271,7 @@ async def helm_repo_search(term: str, api_key: str = Depends(verify_read_key)):
     description="Show default values for a helm repo",
     response_description="Result of the operation")
 async def helm_show_values(chart_name: str, api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_show_values(chart_name=chart_name)
+    return await executor.helm(kube_api.helm_show_values, chart_name=chart_name)
 
 @app.get("/v1/helm_show_chart", 
     operation_id="helm_show_chart",
@@ -1086,7 +1280,7 @@ async def helm_show_values(chart_name: str, api_key: str = Depends(verify_read_k
     description="Show metadata for a helm chart",
     response_description="Result of the operation")
 async def helm_show_chart(chart_name: str, api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_show_chart(chart_name=chart_name)
+    return await executor.helm(kube_api.helm_show_chart, chart_name=chart_name)
 
 @app.get("/v1/helm_pull_schema", 
     operation_id="helm_pull_schema",
@@ -1095,7 +1289,7 @@ async def helm_show_chart(chart_name: str, api_key: str = Depends(verify_read_ke
     description="Show the schema for a helm chart",
     response_description="Result of the operation")
 async def helm_pull_schema(chart_name: str, api_key: str = Depends(verify_read_key)):
-    return kube_api.helm_pull_schema(chart_name=chart_name)
+    return await executor.helm(kube_api.helm_pull_schema, chart_name=chart_name)
 
 # Endpoint to check health
 @app.get("/v1/health", 
@@ -1107,13 +1301,19 @@ async def helm_pull_schema(chart_name: str, api_key: str = Depends(verify_read_k
 async def health():
     return HTTPException(status_code=200, detail="OK")
 
+# Service metrics (scrape durations and failures) in Prometheus format
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 ### BUILD MCP WRAPPER ###
 mcp = FastApiMCP(
     app,
     name="Kalavai pool MCP",
     exclude_tags=[
         "pool_management",
-        "workload_management"
+        "workload_management",
+        "log_streaming"
     ]
 )
 mcp.mount()
@@ -0,0 +1,315 @@
+"""
+Creation of the objects of multi-document YAML manifests.
+
+Every document is mapped to its REST endpoint (group, version, plural and
+whether it is namespaced) through RESTMapper, which reads the apiserver's
+discovery documents once per group version and keeps them for
+KW_DISCOVERY_TTL_SECONDS. Built-in kinds and custom resources are created the
+same way, with one POST each, or with server-side apply: one PATCH
+(application/apply-patch+yaml, field manager KW_FIELD_MANAGER) that creates
+the object or updates the fields kube-watcher manages, so redeploying an
+unchanged manifest succeeds in a single round trip. Fields owned by another
+manager with a different value are reported as conflicts unless the apply is
+forced.
+
+Documents are created in tiers, the documents of a tier concurrently:
+namespaces and CRDs first, then what workloads refer to (service accounts,
+RBAC, config maps, secrets, volumes), then everything else. A kind that is
+unknown to discovery right after its CRD was created is looked up again
+until the CRD is served (up to KW_APPLY_DISCOVERY_WAIT_SECONDS).
+
+Callers that may need to undo a deployment pass a list to apply() to collect
+what was created, and hand it to delete() (last tier first).
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from kubernetes.client.rest import ApiException
+
+from kube_watcher import raw
+from kube_watcher.deletion import DELETE_PROPAGATION_POLICY
+
+
+DISCOVERY_TTL_SECONDS = float(os.getenv("KW_DISCOVERY_TTL_SECONDS", "600"))
+APPLY_CONCURRENCY = int(os.getenv("KW_APPLY_CONCURRENCY", "8"))
+APPLY_DISCOVERY_WAIT_SECONDS = float(os.getenv("KW_APPLY_DISCOVERY_WAIT_SECONDS", "5"))
+FIELD_MANAGER = os.getenv("KW_FIELD_MANAGER", "kube-watcher")
+
+# kinds created before the rest, in this order; anything else goes last
+APPLY_TIERS = [
+    ("Namespace", "CustomResourceDefinition", "PriorityClass", "StorageClass"),
+    (
+        "ServiceAccount", "ClusterRole", "Role", "ClusterRoleBinding", "RoleBinding",
+        "ConfigMap", "Secret", "PersistentVolume", "PersistentVolumeClaim", "ResourceQuota", "LimitRange"
+    )
+]
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownKindError(Exception):
+    pass
+
+
+class ApplyConflictError(Exception):
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+def apply_conflicts(error):
+    """[{"field", "message"}] of the field manager conflicts of a 409 apply response"""
+    try:
+        causes = raw.loads(error.body).get("details", {}).get("causes") or []
+    except Exception:
+        return []
+    return [{"field": cause.get("field"), "message": cause.get("message")} for cause in causes]
+
+
+class RESTMapping():
+    def __init__(self, api_version, kind, plural, namespaced):
+        self.api_version = api_version
+        self.kind = kind
+        self.plural = plural
+        self.namespaced = namespaced
+
+    @property
+    def group(self):
+        return self.api_version.rsplit("/", 1)[0] if "/" in self.api_version else ""
+
+    @property
+    def version(self):
+        return self.api_version.rsplit("/", 1)[-1]
+
+    def path(self, namespace=None, name=None):
+        """REST path of the collection (or of one object when name is given)"""
+        prefix = "/api/v1" if self.api_version == "v1" else f"/apis/{self.api_version}"
+        path = f"{prefix}/namespaces/{namespace}/{self.plural}" if self.namespaced else f"{prefix}/{self.plural}"
+        return path if name is None else f"{path}/{name}"
+
+
+class RESTMapper():
+    """(apiVersion, kind) -> RESTMapping, from the apiserver's discovery documents"""
+    def __init__(self, api_client, ttl=DISCOVERY_TTL_SECONDS):
+        self.api_client = api_client
+        self.ttl = ttl
+        self._group_versions = {}
+        self._lock = threading.Lock()
+
+    def _discover(self, api_version):
+        path = "/api/v1" if api_version == "v1" else f"/apis/{api_version}"
+        try:
+            response = self.api_client.call_api(
+                path,
+                "GET",
+                header_params={"Accept": "application/json"},
+                auth_settings=["BearerToken"],
+                _return_http_data_only=True,
+                _preload_content=False
+            )
+        except ApiException as e:
+            if e.status == 404:
+                return {}
+            raise
+        return {
+            resource["kind"]: RESTMapping(api_version, resource["kind"], resource["name"], resource.get("namespaced", False))
+            # subresources (pods/log, deployments/scale) share their parent's kind
+            for resource in raw.loads(response.data).get("resources") or [] if "/" not in resource["name"]
+        }
+
+    def _kinds(self, api_version, refresh=False):
+        with self._lock:
+            cached = self._group_versions.get(api_version)
+            if not refresh and cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        kinds = self._discover(api_version)
+        with self._lock:
+            self._group_versions[api_version] = (time.monotonic() + self.ttl, kinds)
+        return kinds
+
+    def resolve(self, api_version, kind, wait=0):
+        """Mapping of a kind. A kind missing from the cached discovery is looked up
+        again (custom resources created since), for up to wait seconds."""
+        mapping = self._kinds(api_version).get(kind)
+        deadline = time.monotonic() + wait
+        while mapping is None:
+            mapping = self._kinds(api_version, refresh=True).get(kind)
+            if mapping is not None or time.monotonic() >= deadline:
+                break
+            time.sleep(0.5)
+        if mapping is None:
+            raise UnknownKindError(f"{kind} is not served by the cluster under {api_version}")
+        return mapping
+
+    def invalidate(self):
+        with self._lock:
+            self._group_versions.clear()
+
+
+def drop_nulls(value):
+    """An apply configuration lists only the fields it sets: null fields are left out"""
+    if isinstance(value, dict):
+        return {key: drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [drop_nulls(item) for item in value]
+    return value
+
+
+def apply_object(api_client, mapping, document, namespace=None, force=False, field_manager=FIELD_MANAGER):
+    """Create or update an object with one server-side apply request; the applied object
+
+    Args:
+        api_client: kubernetes ApiClient
+        mapping (RESTMapping): Endpoint of the object's kind
+        document (dict): Full object (apiVersion, kind, metadata.name)
+        namespace (str): Namespace of a namespaced object
+        force (bool): Take over fields owned by other managers instead of failing
+        field_manager (str): Manager recorded for the applied fields
+    """
+    query_params = [("fieldManager", field_manager)]
+    if force:
+        query_params.append(("force", "true"))
+    try:
+        response = api_client.call_api(
+            mapping.path(namespace=namespace, name=document["metadata"]["name"]),
+            "PATCH",
+            query_params=query_params,
+            # JSON is valid YAML: the client encodes the body as JSON for this content type
+            body=drop_nulls(document),
+            header_params={"Accept": "application/json", "Content-Type": "application/apply-patch+yaml"},
+            auth_settings=["BearerToken"],
+            _return_http_data_only=True,
+            _preload_content=False
+        )
+    except ApiException as e:
+        if e.status == 409:
+            raise ApplyConflictError(str(e), apply_conflicts(e)) from e
+        raise
+    return raw.loads(response.data)
+
+
+def load_documents(yaml_strs):
+    """Objects of a multi-document YAML string, with List kinds expanded to their items"""
+    documents = []
+    for document in yaml.safe_load_all(yaml_strs):
+        if not document:
+            continue
+        if document.get("kind", "").endswith("List") and "items" in document:
+            documents.extend(item for item in document["items"] if item)
+        else:
+            documents.append(document)
+    return documents
+
+
+def apply_tier(document):
+    kind = document.get("kind")
+    for tier, kinds in enumerate(APPLY_TIERS):
+        if kind in kinds:
+            return tier
+    return len(APPLY_TIERS)
+
+
+class ManifestApplier():
+    def __init__(self, api_client, mapper, concurrency=APPLY_CONCURRENCY):
+        """
+        Args:
+            api_client: kubernetes ApiClient
+            mapper (RESTMapper): Shared, cached discovery
+            concurrency (int): Documents of a tier created at the same time
+        """
+        self.api_client = api_client
+        self.mapper = mapper
+        self.concurrency = concurrency
+
+    def _create(self, document, namespace, wait, server_side_apply=False, force_conflicts=False):
+        mapping = self.mapper.resolve(document["apiVersion"], document["kind"], wait=wait)
+        if mapping.namespaced:
+            document.setdefault("metadata", {})["namespace"] = namespace
+        # objects named by the server (generateName) can only be created
+        if server_side_apply and document.get("metadata", {}).get("name"):
+            return apply_object(self.api_client, mapping, document, namespace=namespace, force=force_conflicts)
+        response = self.api_client.call_api(
+            mapping.path(namespace=namespace),
+            "POST",
+            body=document,
+            header_params={"Accept": "application/json", "Content-Type": "application/json"},
+            auth_settings=["BearerToken"],
+            _return_http_data_only=True,
+            _preload_content=False
+        )
+        return raw.loads(response.data)
+
+    def delete(self, created, propagation_policy=None):
+        """Delete objects collected by apply(), last tier first, as {"deleted": [...], "failed": [...]}.
+        Objects already gone count as deleted."""
+        results = {"deleted": [], "failed": []}
+        for tier, mapping, namespace, name in sorted(created, key=lambda item: item[0], reverse=True):
+            try:
+                self.api_client.call_api(
+                    mapping.path(namespace=namespace, name=name),
+                    "DELETE",
+                    query_params=[("propagationPolicy", propagation_policy or DELETE_PROPAGATION_POLICY)],
+                    header_params={"Accept": "application/json"},
+                    auth_settings=["BearerToken"],
+                    _return_http_data_only=True,
+                    _preload_content=False
+                )
+                results["deleted"].append(f"{mapping.kind}/{name}")
+            except ApiException as e:
+                if e.status == 404:
+                    results["deleted"].append(f"{mapping.kind}/{name}")
+                else:
+                    results["failed"].append(f"{mapping.kind}/{name}: {str(e)}")
+        return results
+
+    def apply(self, yaml_strs, force_namespace=None, server_side_apply=False, force_conflicts=False, created=None):
+        """Create every object of a manifest, as {"successful": [...], "failed": [{"yaml", "error"}]}.
+        Failed server-side applies also list their "conflicts" ({"field", "message"}).
+
+        Args:
+            yaml_strs (str): Multi-document YAML
+            force_namespace (str): Namespace of every namespaced object, regardless
+                of its metadata (otherwise its own namespace or "default")
+            server_side_apply (bool): Create or update objects with server-side apply
+            force_conflicts (bool): Take over fields owned by other managers
+            created (list): Optional list collecting (tier, mapping, namespace, name) of each object written
+        """
+        documents = load_documents(yaml_strs)
+        tiers = {}
+        for index, document in enumerate(documents):
+            tiers.setdefault(apply_tier(document), []).append((index, document))
+        # kinds defined by CRDs of this manifest may take a moment to be served
+        wait = APPLY_DISCOVERY_WAIT_SECONDS if any(document.get("kind") == "CustomResourceDefinition" for document in documents) else 0
+
+        def create(item):
+            index, document = item
+            namespace = force_namespace or document.get("metadata", {}).get("namespace") or "default"
+            try:
+                result = self._create(document, namespace, wait, server_side_apply=server_side_apply, force_conflicts=force_conflicts)
+                if created is not None:
+                    mapping = self.mapper.resolve(document["apiVersion"], document["kind"])
+                    created.append((apply_tier(document), mapping, namespace if mapping.namespaced else None, result["metadata"]["name"]))
+                return index, result, None
+            except Exception as e:
+                logger.warning("Failed to create %s %s: %s", document.get("kind"), document.get("metadata", {}).get("name"), e)
+                return index, None, e
+
+        results = []
+        for tier in sorted(tiers):
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(tiers[tier])))) as pool:
+                results.extend(pool.map(create, tiers[tier]))
+
+        deployment_results = {"successful": [], "failed": []}
+        for index, result, error in sorted(results, key=lambda outcome: outcome[0]):
+            if error is None:
+                deployment_results["successful"].append(str(result))
+            else:
+                failure = {"yaml": yaml.safe_dump(documents[index], sort_keys=False), "error": str(error)}
+                if isinstance(error, ApplyConflictError):
+                    failure["conflicts"] = error.conflicts
+                deployment_results["failed"].append(failure)
+        return deployment_results
@@ -11,15 +11,17 @@ Full API: https://github.com/opencost/opencost/blob/develop/docs/swagger.json
 """
 import os
 import json
-import requests
 from urllib.parse import urljoin
 from collections import defaultdict
 import numbers
 
+from kube_watcher import sessions
+
 
 class OpenCostAPI():
     def __init__(self, base_url):
         self.base_url = base_url
+        self.session = sessions.session("opencost")
     
     def _form_url(self, endpoint):
         # merge base url with endpoint ensuring there's no double slash
@@ -31,7 +33,7 @@ class OpenCostAPI():
         endpoint = self._form_url(endpoint="/allocation/compute")
 
         print(f"Reaching external url: {endpoint}")
-        result = requests.get(
+        result = self.session.get(
             endpoint,
             params=kwargs
         )
@@ -55,7 +57,7 @@ class OpenCostAPI():
         kwargs["aggregate"] = "namespace"
         endpoint = self._form_url(endpoint="/allocation/compute")
         print(f"Reaching external url: {endpoint}")
-        result = requests.get(
+        result = self.session.get(
             endpoint,
             params=kwargs
         )
@@ -0,0 +1,152 @@
+"""
+Deletion of every resource carrying a label in a namespace.
+
+Each resource kind is removed with a single deletecollection call
+(DELETE on the collection with a labelSelector) instead of a list followed by
+one delete per object. The apiserver answers with the objects it deleted,
+requested as PartialObjectMetadata so only their metadata comes back.
+Kinds whose collection cannot be deleted (405, or 403 when RBAC grants delete
+but not deletecollection) fall back to listing and deleting object by object.
+
+Kinds are deleted in tiers, the kinds of a tier concurrently: the owners of
+other workloads first (custom jobs, releases, ray clusters...), then the
+built-in controllers, then everything they may have created. Deleting owners
+first keeps their controllers from recreating objects the later tiers remove.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from kubernetes.client.rest import ApiException
+
+from kube_watcher import raw
+
+
+DELETE_CONCURRENCY = int(os.getenv("KW_DELETE_CONCURRENCY", "8"))
+PROPAGATION_POLICIES = ("Background", "Foreground", "Orphan")
+DELETE_PROPAGATION_POLICY = os.getenv("KW_DELETE_PROPAGATION_POLICY", "Background")
+
+# reported type -> raw.RESOURCE_PATHS key, owners before what they own
+DELETION_TIERS = [
+    {
+        "kalavaijob": "kalavaijob",
+        "helmrelease": "helmrelease",
+        "leaderworkerset": "leaderworkerset",
+        "raycluster": "raycluster",
+        "rayservice": "rayservice",
+        "job": "vcjob"
+    },
+    {
+        "deployment": "deployment",
+        "statefulset": "statefulset",
+        "daemonset": "daemonset",
+        "replicaset": "replicaset"
+    },
+    {
+        "pod": "pod",
+        "service": "service",
+        "persistentvolumeclaim": "persistentvolumeclaim",
+        "secret": "secret",
+        "ingress": "ingress",
+        "middleware": "middleware"
+    }
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LabelledDeletion():
+    def __init__(self, api_client, namespace, label_selector, propagation_policy=None, concurrency=DELETE_CONCURRENCY, progress=None):
+        """
+        Args:
+            api_client: kubernetes ApiClient
+            namespace (str): Namespace to delete from
+            label_selector (str): Label selector of the objects to delete
+            propagation_policy (str): Background, Foreground or Orphan (KW_DELETE_PROPAGATION_POLICY by default)
+            concurrency (int): Kinds of a tier deleted at the same time
+            progress: Optional fn(resource_type, state) called as each kind is deleted
+        """
+        propagation_policy = propagation_policy or DELETE_PROPAGATION_POLICY
+        if propagation_policy not in PROPAGATION_POLICIES:
+            raise ValueError(f"Unknown propagation policy '{propagation_policy}', expected one of {PROPAGATION_POLICIES}")
+        self.api_client = api_client
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.propagation_policy = propagation_policy
+        self.concurrency = concurrency
+        self.progress = progress or (lambda resource_type, state: None)
+
+    def _call(self, method, path, query_params):
+        response = self.api_client.call_api(
+            path,
+            method,
+            query_params=query_params,
+            header_params={"Accept": raw.METADATA_ACCEPT},
+            auth_settings=["BearerToken"],
+            _return_http_data_only=True,
+            _preload_content=False
+        )
+        return raw.loads(response.data)
+
+    def _delete_collection(self, resource):
+        body = self._call(
+            "DELETE",
+            raw.resource_path(resource, self.namespace),
+            [("labelSelector", self.label_selector), ("propagationPolicy", self.propagation_policy)]
+        )
+        # a list of the deleted objects, or a Status when there was nothing to return
+        return [item["metadata"]["name"] for item in body.get("items") or []], []
+
+    def _delete_each(self, resource):
+        deleted, failed = [], []
+        path = raw.resource_path(resource, self.namespace)
+        for item in raw.list_metadata(self.api_client, resource, namespace=self.namespace, label_selector=self.label_selector):
+            name = item["metadata"]["name"]
+            try:
+                self._call("DELETE", f"{path}/{name}", [("propagationPolicy", self.propagation_policy)])
+                deleted.append(name)
+            except ApiException as e:
+                if e.status != 404:
+                    failed.append((name, e))
+        return deleted, failed
+
+    def delete_kind(self, resource_type, resource):
+        """(deleted, failures) entries for one kind"""
+        self.progress(resource_type, "deleting")
+        try:
+            try:
+                deleted, failed = self._delete_collection(resource)
+            except ApiException as e:
+                if e.status not in (403, 405):
+                    raise
+                deleted, failed = self._delete_each(resource)
+        except ApiException as e:
+            if e.status == 404:
+                # kind not served by this cluster (CRD not installed)
+                self.progress(resource_type, "skipped")
+                return [], []
+            logger.warning("Failed to delete %s with %s: %s", resource_type, self.label_selector, e)
+            self.progress(resource_type, "failed")
+            return [], [f"{resource_type}: {str(e)}"]
+        self.progress(resource_type, "failed" if failed else "done")
+        return (
+            [f"{resource_type}/{name}" for name in deleted],
+            [f"{resource_type}/{name}: {str(e)}" for name, e in failed]
+        )
+
+    def run(self):
+        deleted_resources = []
+        failed_resources = []
+        for tier in DELETION_TIERS:
+            for resource_type in tier:
+                self.progress(resource_type, "pending")
+        for tier in DELETION_TIERS:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(tier)))) as pool:
+                results = list(pool.map(lambda kind: self.delete_kind(*kind), tier.items()))
+            for deleted, failed in results:
+                deleted_resources.extend(deleted)
+                failed_resources.extend(failed)
+        return {
+            "deleted_resources": deleted_resources,
+            "failures": failed_resources
+        }
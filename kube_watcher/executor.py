@@ -0,0 +1,72 @@
+"""
+Offload of blocking upstream calls from the event loop.
+
+KubeAPI, PrometheusAPI and OpenCostAPI are synchronous (kubernetes client,
+requests, helm subprocesses). Handlers await them through this module: calls
+run on a bounded thread pool and each upstream has its own concurrency limit,
+so a burst of slow calls to one upstream neither blocks the event loop nor
+starves calls to the others. The caller's context (e.g. an active cluster
+snapshot) is carried over to the worker thread.
+"""
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Gauge
+
+
+EXECUTOR_THREADS = int(os.getenv("KW_EXECUTOR_THREADS", "32"))
+UPSTREAM_CONCURRENCY = {
+    "kube": int(os.getenv("KW_KUBE_CONCURRENCY", "16")),
+    "prometheus": int(os.getenv("KW_PROMETHEUS_CONCURRENCY", "8")),
+    "opencost": int(os.getenv("KW_OPENCOST_CONCURRENCY", "4")),
+    "helm": int(os.getenv("KW_HELM_CONCURRENCY", "2"))
+}
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "kube_watcher_upstream_calls_in_flight",
+    "Blocking upstream calls running on the executor",
+    ["upstream"]
+)
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix="upstream")
+_semaphores = {}
+
+
+def _semaphore(upstream):
+    if upstream not in _semaphores:
+        _semaphores[upstream] = asyncio.Semaphore(UPSTREAM_CONCURRENCY[upstream])
+    return _semaphores[upstream]
+
+
+async def run_blocking(upstream, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on the executor, at most UPSTREAM_CONCURRENCY[upstream] at a time"""
+    async with _semaphore(upstream):
+        context = contextvars.copy_context()
+        with UPSTREAM_IN_FLIGHT.labels(upstream=upstream).track_inprogress():
+            return await asyncio.get_running_loop().run_in_executor(
+                _executor,
+                functools.partial(context.run, fn, *args, **kwargs)
+            )
+
+
+async def kube(fn, *args, **kwargs):
+    return await run_blocking("kube", fn, *args, **kwargs)
+
+
+async def prometheus(fn, *args, **kwargs):
+    return await run_blocking("prometheus", fn, *args, **kwargs)
+
+
+async def opencost(fn, *args, **kwargs):
+    return await run_blocking("opencost", fn, *args, **kwargs)
+
+
+async def helm(fn, *args, **kwargs):
+    return await run_blocking("helm", fn, *args, **kwargs)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,91 @@
+"""
+Streaming parser for the Prometheus text exposition format.
+
+Only the families on an allow-list are parsed: other lines are rejected on
+their metric name, before labels or values are looked at. Samples come out as
+compact Sample tuples and can be indexed by one of their labels (HAMi metrics
+by device_uuid, Longhorn metrics by pvc).
+"""
+import re
+from typing import NamedTuple
+
+
+# sample name suffixes that belong to a family (counters, summaries, histograms)
+FAMILY_SUFFIXES = ("", "_total", "_created", "_count", "_sum", "_bucket")
+
+_ESCAPES = {"\\": "\\", '"': '"', "n": "\n"}
+_ESCAPE_RE = re.compile(r"\\(.)")
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+
+
+class Sample(NamedTuple):
+    family: str
+    name: str
+    labels: dict
+    value: float
+
+
+def _sample_names(families):
+    """Map every sample name a family can expose back to its family"""
+    return {f"{family}{suffix}": family for family in families for suffix in FAMILY_SUFFIXES}
+
+
+def _unescape(value):
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(0)), value)
+
+
+def _parse_labels(line, start):
+    """Parse '{k="v",...}' starting at line[start] == '{'. Returns (labels, index after '}')"""
+    # value and timestamp follow the label set, so the last brace closes it
+    close = line.rfind("}")
+    if close < start:
+        raise ValueError(f"Unterminated label set: {line}")
+    pairs = _LABEL_RE.findall(line, start + 1, close)
+    if line.find("\\", start, close) != -1:
+        pairs = [(key, _unescape(value)) for key, value in pairs]
+    return dict(pairs), close + 1
+
+
+def iter_samples(lines, families):
+    """Yield Sample records for the given families from an iterable of exposition lines (str or bytes)
+
+    Args:
+        lines: Iterable of lines, e.g. response.iter_lines() or text.splitlines()
+        families: Family names to keep; everything else is skipped
+    """
+    sample_names = _sample_names(families)
+    prefixes = tuple(families)
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        # cheap rejection of comments and other families before looking for the name
+        if not line.startswith(prefixes):
+            continue
+        brace = line.find("{")
+        space = line.find(" ")
+        end = brace if brace != -1 and (space == -1 or brace < space) else space
+        if end == -1:
+            continue
+        name = line[:end]
+        family = sample_names.get(name)
+        if family is None:
+            continue
+        if end == brace:
+            labels, end = _parse_labels(line, brace)
+        else:
+            labels = {}
+        parts = line[end:].split()
+        if not parts:
+            continue
+        yield Sample(family, name, labels, float(parts[0]))
+
+
+def index_samples(lines, families, label):
+    """Parse the given families into {family: {label value: Sample}}.
+    Samples missing the label are dropped; repeated label values keep the last sample."""
+    indexed = {family: {} for family in families}
+    for sample in iter_samples(lines, families):
+        key = sample.labels.get(label)
+        if key is not None:
+            indexed[sample.family][key] = sample
+    return indexed
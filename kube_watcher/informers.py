@@ -0,0 +1,332 @@
+"""
+Watch-backed in-memory caches for Kubernetes lists.
+
+An informer lists a resource once, then keeps a local store up to date by
+watching from the list resourceVersion. The full list is refreshed every
+resync period (or when the watch reports the resourceVersion has expired),
+so a missed event can only make the store stale for one resync window.
+
+Readers should check is_healthy() and fall back to a direct list when the
+watch is down: the store is still served, but may be out of date.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
+
+from kube_watcher import raw
+
+
+INFORMER_RESYNC_SECONDS = int(os.getenv("KW_INFORMER_RESYNC_SECONDS", "300"))
+INFORMER_WATCH_TIMEOUT_SECONDS = int(os.getenv("KW_INFORMER_WATCH_TIMEOUT_SECONDS", "60"))
+INFORMER_RETRY_SECONDS = int(os.getenv("KW_INFORMER_RETRY_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceVersionExpired(Exception):
+    """Raised when the apiserver no longer holds history for our resourceVersion (410 Gone)"""
+
+
+def object_key(obj):
+    """Store key: name for cluster scoped objects, namespace/name otherwise"""
+    metadata = obj.get("metadata", {})
+    namespace = metadata.get("namespace")
+    return f"{namespace}/{metadata.get('name')}" if namespace else metadata.get("name")
+
+
+def label_index(obj):
+    """Index objects by label key (existence) and by key=value"""
+    labels = obj.get("metadata", {}).get("labels") or {}
+    return list(labels.keys()) + [f"{key}={value}" for key, value in labels.items()]
+
+
+def matches_labels(obj, labels: dict):
+    """True if obj has all labels (key=value, or key existence when value is None)"""
+    obj_labels = obj.get("metadata", {}).get("labels") or {}
+    return all(
+        key in obj_labels if value is None else obj_labels.get(key) == value
+        for key, value in labels.items()
+    )
+
+
+class Informer():
+    def __init__(
+        self,
+        name,
+        list_func,
+        indexers=None,
+        resync_seconds=INFORMER_RESYNC_SECONDS,
+        watch_timeout_seconds=INFORMER_WATCH_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            name: Name used in logs
+            list_func: Kubernetes client list function (e.g. CoreV1Api.list_node).
+                Must accept watch, resource_version and _preload_content.
+            indexers: Optional dict of index name -> fn(obj) returning a list of index values.
+                A "labels" index is always maintained.
+        """
+        self.name = name
+        self.list_func = list_func
+        self.indexers = {"labels": label_index, **(indexers or {})}
+        self.resync_seconds = resync_seconds
+        self.watch_timeout_seconds = watch_timeout_seconds
+
+        self.resource_version = None
+        # resourceVersion of the last change applied to the store (unchanged by bookmarks and no-op resyncs)
+        self.store_version = None
+        self.synced = False
+        self.watching = False
+        self.last_sync = None
+        self.last_error = None
+
+        self._store = {}
+        self._indices = {index: defaultdict(set) for index in self.indexers}
+        self._index_values = {}
+        self._handlers = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    #############
+    ## Control ##
+    #############
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-informer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_healthy(self):
+        """True when the store holds a full list and the watch is connected"""
+        return self.synced and self.watching
+
+    def add_event_handler(self, on_add=None, on_update=None, on_delete=None):
+        """Register callbacks for store changes. Called with the store lock held, keep them cheap.
+        - on_add(obj)
+        - on_update(old_obj, new_obj)
+        - on_delete(obj)
+        """
+        with self._lock:
+            self._handlers.append((on_add, on_update, on_delete))
+            # replay current state so late subscribers start consistent
+            if on_add is not None:
+                for obj in self._store.values():
+                    on_add(obj)
+
+    @contextmanager
+    def frozen(self):
+        """Hold the store lock so no events are applied while the caller reads a consistent view"""
+        with self._lock:
+            yield self
+
+    ###########
+    ## Reads ##
+    ###########
+    def list(self):
+        with self._lock:
+            return list(self._store.values())
+
+    def get(self, key):
+        with self._lock:
+            return self._store.get(key)
+
+    def by_index(self, index, value):
+        with self._lock:
+            return [self._store[key] for key in self._indices[index].get(value, ())]
+
+    def select(self, labels: dict=None, **indexed):
+        """Objects matching all labels (key=value, or key existence when value is None)
+        and all given index values, e.g. select(labels={"app": None}, nodeName="node-1")"""
+        terms = [("labels", key if value is None else f"{key}={value}") for key, value in (labels or {}).items()]
+        terms += [(index, value) for index, value in indexed.items() if value is not None]
+        if not terms:
+            return self.list()
+        with self._lock:
+            keys = None
+            for index, value in terms:
+                matches = self._indices[index].get(value, set())
+                keys = set(matches) if keys is None else keys & matches
+                if not keys:
+                    return []
+            return [self._store[key] for key in keys]
+
+    #################
+    ## Store logic ##
+    #################
+    def _index(self, key, obj):
+        values = {index: set(fn(obj)) for index, fn in self.indexers.items()}
+        self._index_values[key] = values
+        for index, index_values in values.items():
+            for value in index_values:
+                self._indices[index][value].add(key)
+
+    def _unindex(self, key):
+        for index, index_values in self._index_values.pop(key, {}).items():
+            for value in index_values:
+                keys = self._indices[index].get(value)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del self._indices[index][value]
+
+    def _upsert(self, obj):
+        key = object_key(obj)
+        old = self._store.get(key)
+        resource_version = obj.get("metadata", {}).get("resourceVersion")
+        if old is not None:
+            self._unindex(key)
+        if old is None or old.get("metadata", {}).get("resourceVersion") != resource_version:
+            self.store_version = resource_version
+        self._store[key] = obj
+        self._index(key, obj)
+        for on_add, on_update, _ in self._handlers:
+            if old is None and on_add is not None:
+                on_add(obj)
+            elif old is not None and on_update is not None:
+                on_update(old, obj)
+
+    def _delete(self, obj):
+        key = object_key(obj)
+        old = self._store.pop(key, None)
+        if old is None:
+            return
+        self.store_version = obj.get("metadata", {}).get("resourceVersion")
+        self._unindex(key)
+        for _, _, on_delete in self._handlers:
+            if on_delete is not None:
+                on_delete(old)
+
+    def _replace(self, items, resource_version=None):
+        with self._lock:
+            new_keys = set()
+            for obj in items:
+                new_keys.add(object_key(obj))
+                self._upsert(obj)
+            deleted = [key for key in self._store if key not in new_keys]
+            for key in deleted:
+                self._delete(self._store[key])
+            if deleted:
+                # deletions found on relist carry no new resourceVersion of their own
+                self.store_version = resource_version
+
+    ##################
+    ## List / watch ##
+    ##################
+    def _relist(self):
+        response = self.list_func(_preload_content=False)
+        data = raw.loads(response.data)
+        self.resource_version = data.get("metadata", {}).get("resourceVersion")
+        self._replace(data.get("items", []), resource_version=self.resource_version)
+        self.synced = True
+        self.last_sync = time.time()
+        logger.debug("[%s] relisted %d objects at resourceVersion %s", self.name, len(data.get("items", [])), self.resource_version)
+
+    def _watch(self, timeout_seconds):
+        response = self.list_func(
+            watch=True,
+            resource_version=self.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=timeout_seconds,
+            _request_timeout=timeout_seconds + 10,
+            _preload_content=False
+        )
+        self.watching = True
+        try:
+            for line in iter_resp_lines(response):
+                if self._stop.is_set():
+                    return
+                event = raw.loads(line)
+                event_type = event.get("type")
+                obj = event.get("object", {})
+                if event_type == "ERROR":
+                    if obj.get("code") == 410:
+                        raise ResourceVersionExpired(obj.get("message"))
+                    raise ApiException(status=obj.get("code"), reason=obj.get("message"))
+                if event_type in ("ADDED", "MODIFIED"):
+                    with self._lock:
+                        self._upsert(obj)
+                elif event_type == "DELETED":
+                    with self._lock:
+                        self._delete(obj)
+                rv = obj.get("metadata", {}).get("resourceVersion")
+                if rv:
+                    self.resource_version = rv
+        finally:
+            response.release_conn()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._relist()
+                resync_at = time.monotonic() + self.resync_seconds
+                while not self._stop.is_set():
+                    remaining = int(resync_at - time.monotonic())
+                    if remaining <= 0:
+                        break
+                    self._watch(timeout_seconds=min(self.watch_timeout_seconds, remaining))
+                self.last_error = None
+            except ResourceVersionExpired as e:
+                logger.info("[%s] resourceVersion expired, relisting: %s", self.name, e)
+            except Exception as e:
+                self.watching = False
+                self.last_error = str(e)
+                logger.warning("[%s] list/watch failed, retrying in %ss: %s", self.name, INFORMER_RETRY_SECONDS, e)
+                self._stop.wait(INFORMER_RETRY_SECONDS)
+        self.watching = False
+
+    def status(self):
+        return {
+            "synced": self.synced,
+            "watching": self.watching,
+            "objects": len(self._store),
+            "resource_version": self.resource_version,
+            "store_version": self.store_version,
+            "last_sync": self.last_sync,
+            "last_error": self.last_error
+        }
+
+
+class NodeInformer(Informer):
+    def __init__(self, core_api, **kwargs):
+        super().__init__(name="nodes", list_func=core_api.list_node, **kwargs)
+
+
+def pod_node_index(pod):
+    node_name = pod.get("spec", {}).get("nodeName")
+    return [node_name] if node_name else []
+
+
+def pod_phase_index(pod):
+    phase = pod.get("status", {}).get("phase")
+    return [phase] if phase else []
+
+
+def namespace_index(obj):
+    namespace = obj.get("metadata", {}).get("namespace")
+    return [namespace] if namespace else []
+
+
+class PodInformer(Informer):
+    def __init__(self, core_api, **kwargs):
+        super().__init__(
+            name="pods",
+            list_func=core_api.list_pod_for_all_namespaces,
+            indexers={
+                "nodeName": pod_node_index,
+                "phase": pod_phase_index,
+                "namespace": namespace_index
+            },
+            **kwargs
+        )
@@ -1,14 +1,20 @@
+import os
 import yaml
 import json
 import re
 import copy
+import glob
+import hashlib
+import logging
+import functools
+import threading
 from os.path import commonprefix
 import uuid
 from collections import defaultdict
 
 from kube_watcher.models import JobTemplate
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 
 TEMPLATE_ID_FIELD = "id_field"
 TEMPLATE_ID_KEY = "deployment_id"
@@ -20,27 +26,235 @@ NODE_SELECTOR_OPS = "NODE_SELECTORS_OPS"
 USER_ID_KEY = "USER_ID"
 JOB_PRIORITY_KEY = "JOB_PRIORITY"
 
+TEMPLATES_DIR = os.getenv("KW_TEMPLATES_DIR", "templates")
+USE_TEMPLATE_BYTECODE_CACHE = not os.getenv("KW_TEMPLATE_BYTECODE_CACHE", "True").lower() in ("false", "0", "f", "no")
+# FileSystemBytecodeCache picks a per-user temporary directory when not set
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("KW_TEMPLATE_BYTECODE_CACHE_DIR", None)
+# compiled custom (request provided) templates kept, by source
+CUSTOM_TEMPLATE_CACHE_SIZE = int(os.getenv("KW_CUSTOM_TEMPLATE_CACHE_SIZE", "32"))
+# how often the templates directory is checked for changes
+TEMPLATE_CATALOG_CHECK_SECONDS = float(os.getenv("KW_TEMPLATE_CATALOG_CHECK_SECONDS", "10"))
+TEMPLATE_FILES = ("template.yaml", "values.yaml", "metadata.json")
+
+logger = logging.getLogger(__name__)
+
 
 def get_template_path(template: JobTemplate):
-    return f"templates/{template.name}/template.yaml"
+    return f"{TEMPLATES_DIR}/{template.name}/template.yaml"
 
 def get_defaults_path(template: JobTemplate):
-    return f"templates/{template.name}/values.yaml"
+    return f"{TEMPLATES_DIR}/{template.name}/values.yaml"
 
 def get_metadata_path(template: JobTemplate):
-    return f"templates/{template.name}/metadata.json"
+    return f"{TEMPLATES_DIR}/{template.name}/metadata.json"
+
+
+class TemplateRegistry():
+    """
+    Compiled job templates, their defaults (values.yaml) and metadata (metadata.json).
+
+    Templates are compiled once through a shared jinja Environment and kept
+    until their file changes on disk (auto_reload checks the modification
+    time when a template is used). Compiled bytecode is also written to a
+    FileSystemBytecodeCache, so restarts skip compilation. Defaults and
+    metadata are parsed once and re-read only when their file changes.
+    Values returned by get_defaults/get_metadata are shared: copy before
+    changing them.
+    """
+    def __init__(self, templates_dir=TEMPLATES_DIR, bytecode_cache=USE_TEMPLATE_BYTECODE_CACHE):
+        self.templates_dir = templates_dir
+        self.environment = Environment(
+            loader=FileSystemLoader(templates_dir),
+            lstrip_blocks=True,
+            trim_blocks=True,
+            auto_reload=True,
+            bytecode_cache=FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR) if bytecode_cache else None
+        )
+        self._files = {}
+        self._lock = threading.Lock()
+        self._from_string = functools.lru_cache(maxsize=CUSTOM_TEMPLATE_CACHE_SIZE)(self.environment.from_string)
+
+    def names(self):
+        """Templates found on disk (directories with a template.yaml)"""
+        return sorted(
+            os.path.basename(os.path.dirname(path))
+            for path in glob.glob(os.path.join(self.templates_dir, "*", "template.yaml"))
+        )
+
+    def preload(self):
+        """Compile every template now rather than on first use"""
+        for name in self.names():
+            try:
+                self.get_template(name)
+            except Exception as e:
+                logger.warning("Failed to compile template %s: %s", name, e)
+
+    def get_template(self, name):
+        return self.environment.get_template(f"{name}/template.yaml")
+
+    def from_string(self, template_str):
+        """Compiled custom template, reused for repeated sources (e.g. replicas of a deployment)"""
+        return self._from_string(template_str)
+
+    def render(self, name, values):
+        return self.get_template(name).render(values)
+
+    def _parsed(self, path, parse):
+        """Parsed content of a file, re-read only when its modification time or size changes"""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._files.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(path, "r") as f:
+            content = parse(f)
+        with self._lock:
+            self._files[path] = (version, content)
+        return content
+
+    def get_defaults(self, name):
+        return self._parsed(os.path.join(self.templates_dir, name, "values.yaml"), yaml.safe_load)
+
+    def get_metadata(self, name):
+        return self._parsed(os.path.join(self.templates_dir, name, "metadata.json"), json.load)
+
+
+template_registry = TemplateRegistry()
+
+
+class TemplateCatalog():
+    """
+    In-memory index of the job templates: defaults, metadata and a content
+    hash per template, and the templates of each type, with a version (hash
+    of all templates) for ETags.
+
+    Listings are answered from memory. A background thread compares the
+    modification times of the template files every
+    KW_TEMPLATE_CATALOG_CHECK_SECONDS and rebuilds the catalog when they
+    change; readers always see either the old or the new catalog.
+    """
+    def __init__(self, registry=None, check_seconds=TEMPLATE_CATALOG_CHECK_SECONDS):
+        self.registry = registry or template_registry
+        self.check_seconds = check_seconds
+        # (entries, types, version), replaced as a whole on rebuilds
+        self._catalog = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _files(self, name):
+        return [os.path.join(self.registry.templates_dir, name, file) for file in TEMPLATE_FILES]
+
+    def signature(self):
+        """(path, mtime, size) of every template file"""
+        signature = []
+        for template in JobTemplate:
+            for path in self._files(template.name):
+                try:
+                    stat = os.stat(path)
+                    signature.append((path, stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    signature.append((path, None, None))
+        return tuple(signature)
+
+    def build(self):
+        signature = self.signature()
+        entries = {}
+        types = defaultdict(list)
+        for template in JobTemplate:
+            if template == JobTemplate.custom:
+                continue
+            name = template.name
+            digest = hashlib.blake2b(digest_size=16)
+            try:
+                for path in self._files(name):
+                    # values and metadata are optional, as for Job.get_defaults/get_metadata
+                    if os.path.exists(path) or path.endswith("template.yaml"):
+                        with open(path, "rb") as f:
+                            digest.update(f.read())
+            except Exception as e:
+                logger.warning("Template %s left out of the catalog: %s", name, e)
+                continue
+            entry = {"defaults": None, "metadata": None, "hash": digest.hexdigest()}
+            for key, read in (("defaults", self.registry.get_defaults), ("metadata", self.registry.get_metadata)):
+                try:
+                    entry[key] = read(name)
+                except Exception as e:
+                    logger.warning("No %s for template %s: %s", key, name, e)
+            entries[name] = entry
+            if entry["metadata"] is not None and "type" in entry["metadata"]:
+                types[entry["metadata"]["type"]].append(name)
+        version = hashlib.blake2b(
+            json.dumps({name: entry["hash"] for name, entry in entries.items()}, sort_keys=True).encode(),
+            digest_size=16
+        ).hexdigest()
+        with self._lock:
+            self._catalog = (entries, dict(types), version)
+            self._signature = signature
+        return version
+
+    def refresh(self):
+        """Rebuild if any template file changed since the last build; True if rebuilt"""
+        if self._catalog is not None and self.signature() == self._signature:
+            return False
+        self.build()
+        return True
+
+    def _state(self):
+        if self._catalog is None:
+            with self._lock:
+                building = self._catalog is None
+            if building:
+                self.build()
+        return self._catalog
+
+    @property
+    def version(self):
+        return self._state()[2]
+
+    def get(self, name):
+        """{"defaults", "metadata", "hash"} of a template, None if unknown"""
+        return self._state()[0].get(name)
+
+    def templates(self, type=None):
+        """Names of the templates, optionally of a given type"""
+        if type is None:
+            return [template.name for template in JobTemplate]
+        return list(self._state()[1].get(type, []))
+
+    def template_types(self, filter=None):
+        """{type: [template names]}, optionally restricted to some types"""
+        return {
+            type: list(names) for type, names in self._state()[1].items()
+            if filter is None or type in filter
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.check_seconds):
+            try:
+                if self.refresh():
+                    logger.info("Templates changed on disk, catalog rebuilt (version %s)", self.version)
+            except Exception as e:
+                logger.warning("Failed to refresh the template catalog: %s", e)
+
+    def start(self):
+        self._state()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="template-catalog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+template_catalog = TemplateCatalog()
+
 
 def get_template_types(filter=None):
-    types = defaultdict(list)
-    for job in JobTemplate:
-        try:
-            with open(get_metadata_path(job)) as f:
-                meta = json.load(f)
-                if filter is None or meta["type"] in filter:
-                    types[meta["type"]].append(job.name)
-        except:
-            pass
-    return types
+    return template_catalog.template_types(filter=filter)
 
 def escape_field(text):
     return re.sub('[^0-9a-z]+', '-', text.lower())
@@ -58,42 +272,35 @@ def parse_deployment_name(name, max_len=50, random_suffix=True):
     return escaped_name
 
 class Job:
-    def __init__(self, template: JobTemplate, template_str: str=None):
+    def __init__(self, template: JobTemplate, template_str: str=None, registry: TemplateRegistry=None):
         self.job_name = None
         self.job_label = None
         self.ports = []
+        self.registry = registry or template_registry
 
+        if isinstance(template, str):
+            template = JobTemplate[template]
+        self.template = template
         if template == JobTemplate.custom:
             # for custom jobs where we pass the template itself
-            self.template_str = template_str
-            self.template = template
+            self.compiled = self.registry.from_string(template_str)
         else:
-            if isinstance(template, str):
-                self.template = JobTemplate[template]
-            self.template_str = self._load(template=self.template)
+            self.compiled = self.registry.get_template(template.name)
 
     @classmethod
     def from_yaml(cls, template_str):
         return cls(template=JobTemplate.custom, template_str=template_str)
-
-    def _load(self, template: JobTemplate):
-        with open(get_template_path(template), "r") as f:
-            return f.read()
         
     def get_defaults(self):
         try:
-            with open(get_defaults_path(template=self.template), 'r') as f:
-                default_values = yaml.safe_load(f)
-            return default_values
+            return self.registry.get_defaults(self.template.name)
         except Exception as e:
             print("Error when getting defaults:", str(e))
             return None
     
     def get_metadata(self):
         try:
-            with open(get_metadata_path(template=self.template), 'r') as f:
-                meta = json.load(f)
-            return meta
+            return self.registry.get_metadata(self.template.name)
         except Exception as e:
             print("Error when getting metadata:", str(e))
             return None
@@ -152,7 +359,7 @@ class Job:
         if priority is not None:
             local_values[JOB_PRIORITY_KEY] = priority
 
-        return Template(self.template_str, lstrip_blocks=True, trim_blocks=True).render(local_values)
+        return self.compiled.render(local_values)
 
         
 if __name__ == "__main__":
@@ -2,36 +2,87 @@ import json
 import time
 import math
 import os
-import requests
 import base64
 import yaml
 from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 from typing import Union
 import logging
 
 import tarfile
 import glob
-from kubernetes import config, client, utils
+from kubernetes import config, client
 from fastapi import HTTPException
-from prometheus_client.parser import text_string_to_metric_families
 
 from kube_watcher.utils import (
     create_flow_deployment_yaml,
     create_agent_builder_deployment_yaml,
     cast_resource_value,
     parse_resource_value,
-    force_serialisation,
-    extract_longhorn_metric_from_prometheus,
+    to_jsonable,
     HelmClient,
     sanitize_kubernetes_name
 )
+from kube_watcher.informers import NodeInformer, PodInformer, matches_labels
+from kube_watcher.ledger import ResourceLedger, AVAILABLE_RESOURCES_READS, available_resources_reads
+from kube_watcher.snapshot import ClusterSnapshot, current_snapshot, snapshot_view
+from kube_watcher.scrapers import HamiScraper
+from kube_watcher.storage import StorageUsageService
+from kube_watcher.deletion import LabelledDeletion
+from kube_watcher.apply import ManifestApplier, RESTMapper, ApplyConflictError, apply_object
+from kube_watcher import raw
+from kube_watcher.raw import Each, Apply, project
 
 
 LONGHORN_MANAGER_ENDPOINT = os.getenv("LONGHORN_MANAGER_ENDPOINT", "http://localhost:30132")
+USE_INFORMERS = not os.getenv("KW_USE_INFORMERS", "True").lower() in ("false", "0", "f", "no")
+DEPLOY_CONCURRENCY = int(os.getenv("KW_DEPLOY_CONCURRENCY", "4"))
+LOG_FETCH_CONCURRENCY = int(os.getenv("KW_LOG_FETCH_CONCURRENCY", "8"))
 
 logger = logging.getLogger(__name__)
 
+# field projections for raw reads (output keys follow the typed models' to_dict names)
+POD_STATUS_FIELDS = {
+    "metadata": {"name": "metadata.name", "namespace": "metadata.namespace", "labels": "metadata.labels"},
+    "spec": {"node_name": "spec.nodeName"},
+    "status": {"phase": "status.phase", "container_statuses": Apply("status.containerStatuses", raw.snake_case_keys)}
+}
+SERVICE_PORTS_FIELDS = {
+    "name": "metadata.name",
+    "labels": "metadata.labels",
+    "type": "spec.type",
+    "ports": Each("spec.ports", {
+        "node_port": "nodePort",
+        "port": "port",
+        "protocol": "protocol",
+        "target_port": "targetPort",
+        "name": "name"
+    })
+}
+SERVICE_IP_FIELDS = {
+    "name": "metadata.name",
+    "cluster_ip": "spec.clusterIP",
+    "ports": Each("spec.ports", {"node_port": "nodePort", "target_port": "targetPort"})
+}
+EVENT_FIELDS = {
+    "type": "type",
+    "reason": "reason",
+    "message": "message",
+    "count": "count",
+    "first_timestamp": "firstTimestamp",
+    "last_timestamp": "lastTimestamp",
+    "source": "source.component"
+}
+DEPLOYMENT_FIELDS = {
+    "replicas": "spec.replicas",
+    "available_replicas": "status.availableReplicas",
+    "unavailable_replicas": "status.unavailableReplicas",
+    "ready_replicas": "status.readyReplicas",
+    "paused": "spec.paused"
+}
+
 class KubeAPI():
     def __init__(self, in_cluster=False):
         self.in_cluster = in_cluster
@@ -41,42 +92,273 @@ class KubeAPI():
             # Only works if this script is run by K8s as a POD
             config.load_kube_config()
         self.core_api = client.CoreV1Api()
+        # one ApiClient (and connection pool) shared by every API group
+        self.apps_api = client.AppsV1Api(self.core_api.api_client)
+        self.networking_api = client.NetworkingV1Api(self.core_api.api_client)
+        self.custom_api = client.CustomObjectsApi(self.core_api.api_client)
+        self.rest_mapper = RESTMapper(self.core_api.api_client)
+        self.node_informer = None
+        self.pod_informer = None
+        self.ledger = None
+        self.gpu_scraper = HamiScraper(
+            url="http://0.0.0.0:31993/metrics" if not self.in_cluster else "http://hami-vgpu-scheduler.kalavai.svc:31993/metrics"
+        )
+        self.storage_usage = StorageUsageService(
+            core_api=self.core_api,
+            longhorn_url=f"{LONGHORN_MANAGER_ENDPOINT}/metrics"
+        )
+
+    def start_informers(self):
+        """Start background watches that keep cluster lists in memory"""
+        if not USE_INFORMERS:
+            return
+        if self.node_informer is None:
+            self.node_informer = NodeInformer(core_api=self.core_api)
+        if self.pod_informer is None:
+            self.pod_informer = PodInformer(core_api=self.core_api)
+        if self.ledger is None:
+            self.ledger = ResourceLedger()
+            self.ledger.attach(node_informer=self.node_informer, pod_informer=self.pod_informer)
+        self.node_informer.start()
+        self.pod_informer.start()
+        self.ledger.start_consistency_checks()
+
+    def stop_informers(self):
+        for informer in [self.node_informer, self.pod_informer, self.ledger]:
+            if informer is not None:
+                informer.stop()
+
+    def start_scrapers(self):
+        """Start background polling of metrics endpoints (HAMi GPU metrics, Longhorn storage usage)"""
+        self.gpu_scraper.start()
+        self.storage_usage.start()
+
+    def stop_scrapers(self):
+        self.gpu_scraper.stop()
+        self.storage_usage.stop()
+
+    def _list_partitioned(self, cluster_list, namespaced_list, namespaces, **kwargs):
+        """One cluster-scoped list (raw items), partitioned by namespace and restricted to the given namespaces.
+        Falls back to one namespaced list per namespace when RBAC forbids the cluster-scoped list.
+
+        Args:
+            cluster_list: List function for all namespaces (e.g. CoreV1Api.list_service_for_all_namespaces)
+            namespaced_list: Equivalent fn(namespace, **kwargs) for a single namespace
+            namespaces (list): Namespaces to return
+            kwargs: Passed to both list functions (label_selector, field_selector...)
+        Returns:
+            {namespace: [items]} for every requested namespace
+        """
+        return self._partition(
+            list_all=lambda: raw.read_items(cluster_list, **kwargs),
+            list_namespace=lambda namespace: raw.read_items(namespaced_list, namespace, **kwargs),
+            namespaces=namespaces
+        )
+
+    def _list_metadata_partitioned(self, resource, namespaces, label_selector=None):
+        """As _list_partitioned, with metadata-only items (raw.list_metadata)"""
+        api_client = self.core_api.api_client
+        return self._partition(
+            list_all=lambda: raw.list_metadata(api_client, resource, label_selector=label_selector),
+            list_namespace=lambda namespace: raw.list_metadata(api_client, resource, namespace=namespace, label_selector=label_selector),
+            namespaces=namespaces
+        )
+
+    @staticmethod
+    def _partition(list_all, list_namespace, namespaces):
+        try:
+            items = list_all()
+        except client.exceptions.ApiException as e:
+            if e.status != 403:
+                raise
+            logger.info("Cluster-scoped list forbidden, listing %d namespaces one by one", len(namespaces))
+            return {namespace: list_namespace(namespace) for namespace in namespaces}
+
+        partitioned = {namespace: [] for namespace in namespaces}
+        for item in items:
+            namespace = item["metadata"].get("namespace")
+            if namespace in partitioned:
+                partitioned[namespace].append(item)
+        return partitioned
+
+    def get_cache_status(self):
+        """Health of the in-memory caches and drift counters of the resource ledger"""
+        return {
+            "nodes": self.node_informer.status() if self.node_informer is not None else None,
+            "pods": self.pod_informer.status() if self.pod_informer is not None else None,
+            "ledger": self.ledger.status() if self.ledger is not None else None,
+            "available_resources_reads": available_resources_reads(),
+            "gpu_metrics": self.gpu_scraper.status(),
+            "storage_usage": self.storage_usage.status()
+        }
+
+    def source_versions(self, sources):
+        """Versions of the data sources behind a cached response, None if any of them cannot report one.
+
+        Args:
+            sources (list): Any of "nodes", "pods" (informer store resourceVersions while the
+                watch is healthy) and "gpu_metrics" (time of the last background scrape)
+        """
+        versions = []
+        for source in sources:
+            if source in ("nodes", "pods"):
+                informer = self.node_informer if source == "nodes" else self.pod_informer
+                if informer is None or not informer.is_healthy():
+                    return None
+                versions.append(informer.store_version)
+            elif source == "gpu_metrics":
+                if not self.gpu_scraper.is_running():
+                    return None
+                versions.append(self.gpu_scraper.last_scrape)
+            else:
+                raise ValueError(f"Unknown data source: {source}")
+        return versions
+
+    @contextmanager
+    def cluster_snapshot(self):
+        """Serve every read in the enclosing context from one fetch of nodes, running pods and GPU metrics.
+        Nested calls reuse the active snapshot."""
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            yield snapshot
+            return
+        snapshot = ClusterSnapshot(kube_api=self)
+        token = snapshot.activate()
+        try:
+            yield snapshot
+        finally:
+            snapshot.deactivate(token)
+
+    def _list_nodes(self, labels: dict=None, node_names=None, metadata_only=False):
+        """Raw node items, served from the active cluster snapshot, or from the node informer
+        while its watch is healthy. Falls back to listing from the apiserver otherwise.
+
+        Args:
+            labels (dict): Optional label key-value pairs to match (value None matches key existence)
+            node_names (list): Optional node names to restrict results to
+            metadata_only (bool): Callers only read metadata; apiserver lists fetch PartialObjectMetadata
+        """
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            nodes = snapshot.nodes
+            if labels:
+                nodes = [node for node in nodes if matches_labels(node, labels)]
+        elif self.node_informer is not None and self.node_informer.is_healthy():
+            if node_names is not None and not labels:
+                nodes = [self.node_informer.get(name) for name in node_names]
+                return [node for node in nodes if node is not None]
+            nodes = self.node_informer.select(labels)
+        elif metadata_only:
+            label_selector = None
+            if labels:
+                label_selector = ",".join(
+                    [f"{key}={value}" if value is not None else key for key, value in labels.items()]
+                )
+            nodes = raw.list_metadata(self.core_api.api_client, "node", label_selector=label_selector)
+        else:
+            kwargs = {"_preload_content": False}
+            if labels:
+                kwargs["label_selector"] = ",".join(
+                    [f"{key}={value}" if value is not None else key for key, value in labels.items()]
+                )
+            response = self.core_api.list_node(**kwargs)
+            nodes = raw.loads(response.data).get("items", [])
+        if node_names is not None:
+            nodes = [node for node in nodes if node.get("metadata", {}).get("name") in node_names]
+        return nodes
+
+    def _iter_nodes(self):
+        """As _list_nodes (without filters), but apiserver fallbacks are read in pages"""
+        if current_snapshot() is not None or (self.node_informer is not None and self.node_informer.is_healthy()):
+            return self._list_nodes()
+        return raw.iter_items(self.core_api.list_node)
+
+    def _list_pods(self, node_name=None, phase=None, namespace=None, labels: dict=None):
+        """Raw pod items, served from the pod informer indexes while its watch is healthy.
+        Falls back to listing from the apiserver (with field and label selectors) otherwise.
+
+        Args:
+            node_name (str): Optional node the pods are scheduled on
+            phase (str): Optional pod phase (Running, Pending, ...)
+            namespace (str): Optional namespace
+            labels (dict): Optional label key-value pairs to match (value None matches key existence)
+        """
+        pods = self._cached_pods(node_name=node_name, phase=phase, namespace=namespace, labels=labels)
+        if pods is not None:
+            return pods
+        api_call, args, kwargs = self._pod_list_call(node_name=node_name, phase=phase, namespace=namespace, labels=labels)
+        return raw.read_items(api_call, *args, **kwargs)
+
+    def _iter_pods(self, node_name=None, phase=None, namespace=None, labels: dict=None):
+        """As _list_pods, but apiserver fallbacks are read in pages and yielded one pod at a time,
+        so accounting loops over every pod of the cluster run in bounded memory"""
+        pods = self._cached_pods(node_name=node_name, phase=phase, namespace=namespace, labels=labels, paged=True)
+        if pods is not None:
+            return pods
+        api_call, args, kwargs = self._pod_list_call(node_name=node_name, phase=phase, namespace=namespace, labels=labels)
+        return raw.iter_items(api_call, *args, **kwargs)
+
+    def _cached_pods(self, node_name=None, phase=None, namespace=None, labels: dict=None, paged=False):
+        """Pods from the active cluster snapshot or the pod informer, None if neither can serve them.
+        With paged, the snapshot is only used if it already holds its running pods (the caller
+        would rather page through the apiserver than have all of them loaded)."""
+        snapshot = current_snapshot()
+        if snapshot is not None and phase == "Running" and (not paged or snapshot.has_running_pods()):
+            return [
+                pod for pod in snapshot.running_pods
+                if (node_name is None or pod.get("spec", {}).get("nodeName") == node_name)
+                and (namespace is None or pod["metadata"].get("namespace") == namespace)
+                and (not labels or matches_labels(pod, labels))
+            ]
+        if self.pod_informer is not None and self.pod_informer.is_healthy():
+            return self.pod_informer.select(
+                labels=labels,
+                nodeName=node_name,
+                phase=phase,
+                namespace=namespace
+            )
+        return None
+
+    def _pod_list_call(self, node_name=None, phase=None, namespace=None, labels: dict=None):
+        kwargs = {}
+        field_selectors = []
+        if node_name is not None:
+            field_selectors.append(f"spec.nodeName={node_name}")
+        if phase is not None:
+            field_selectors.append(f"status.phase={phase}")
+        if field_selectors:
+            kwargs["field_selector"] = ",".join(field_selectors)
+        if labels:
+            kwargs["label_selector"] = ",".join(
+                [f"{key}={value}" if value is not None else key for key, value in labels.items()]
+            )
+        if namespace is None:
+            return self.core_api.list_pod_for_all_namespaces, (), kwargs
+        return self.core_api.list_namespaced_pod, (namespace,), kwargs
 
     def _extract_resources(self, fn, node_names=None, aggregate=True):
         """Generalisation to extract values in dict form"""
-        #nodes = self.core_api.list_node()
-        response = self.core_api.list_node(_preload_content=False)
-        nodes = json.loads(response.data)
         if aggregate:
             data = {"online": defaultdict(int), "total": defaultdict(int)}
-            def _add_value(data, node, status):
-                if status:
-                    data["online"]["n_nodes"] += 1
-                    parse_resource_value(resources=fn(node), out_data_dict=data["online"])
-
-                data["total"]["n_nodes"] += 1
-                parse_resource_value(resources=fn(node), out_data_dict=data["total"])
         else:
-            data = {
-                node.get("metadata", {}).get("name"): {"online": defaultdict(int), "total": defaultdict(int)}
-                for node in nodes.get("items", [])
-            }
-            def _add_value(data, node, status):
-                if status:
-                    data[node.get("metadata", {}).get("name")]["online"]["n_nodes"] += 1
-                    parse_resource_value(resources=fn(node), out_data_dict=data[node.get("metadata", {}).get("name")]["online"])
+            data = {}
 
-                data[node.get("metadata", {}).get("name")]["total"]["n_nodes"] += 1
-                parse_resource_value(resources=fn(node), out_data_dict=data[node.get("metadata", {}).get("name")]["total"])
-        
-        for node in nodes.get("items", []):
-            if node_names is not None and node.get("metadata", {}).get("name") not in node_names:
+        for node in self._iter_nodes():
+            name = node.get("metadata", {}).get("name")
+            if aggregate:
+                values = data
+            else:
+                values = data[name] = {"online": defaultdict(int), "total": defaultdict(int)}
+            if node_names is not None and name not in node_names:
                 continue
-            status = True if self.extract_node_readiness(node).get("status") == "True" else False
-            _add_value(data=data, node=node, status=status)
+            if self.extract_node_readiness(node).get("status") == "True":
+                values["online"]["n_nodes"] += 1
+                parse_resource_value(resources=fn(node), out_data_dict=values["online"])
+
+            values["total"]["n_nodes"] += 1
+            parse_resource_value(resources=fn(node), out_data_dict=values["total"])
         return data
     
-    
     def extract_node_readiness(self, node):
         """Extract the readiness of a node from its status information (from extract_node_status)"""
         for condition in node.get("status", {}).get("conditions", []):
@@ -104,23 +386,16 @@ class KubeAPI():
                 
         return extracted
     
+    @snapshot_view
     def get_nodes_states(self, conditions=None, node_labels=None):
         """Get the status of nodes on certain conditions (default all)"""
         # 1. Fetch only the necessary fields to reduce I/O
         # Note: 'status' is excluded in PartialObjectMetadata, so we use a field selector 
         # or just raw JSON if we need the full status.
 
-        if node_labels is not None:
-            selector = ",".join([f"{key}={value}" if value is not None else key for key, value in node_labels.items()])
-        else:
-            selector = None
-
-        response = self.core_api.list_node(_preload_content=False, label_selector=selector)
-        nodes_data = json.loads(response.data)
-        
         node_status = {}
         
-        for node in nodes_data.get("items", []):
+        for node in self._list_nodes(labels=node_labels):
             metadata = node.get("metadata", {})
             name = metadata.get("name")
             spec = node.get("spec", {})
@@ -134,18 +409,11 @@ class KubeAPI():
         return node_status
     
     def get_nodes(self):
-        node_list = self.core_api.list_node(_preload_content=False)
-        nodes_data = json.loads(node_list.data)
-        nodes = []
-        for spec in nodes_data.get("items", []):
-            nodes.append(spec.get("metadata", {}).get("name"))
-        return nodes
+        return [node.get("metadata", {}).get("name") for node in self._list_nodes(metadata_only=True)]
 
     def get_node_ips(self, type="InternalIP"):
-        node_list = self.core_api.list_node(_preload_content=False)
-        nodes_data = json.loads(node_list.data)
         nodes = {}
-        for spec in nodes_data.get("items", []):
+        for spec in self._list_nodes():
             node_name = spec.get("metadata", {}).get("name")
             # parse address
             address = ""
@@ -165,15 +433,8 @@ class KubeAPI():
         Returns:
             list: List of node names that match the specified labels
         """
-        # Build label selector string for server-side filtering
-        selector = ",".join([f"{key}={value}" if value is not None else key for key, value in labels.items()])
-        
-        # Use server-side label selector - much more efficient than client-side filtering
-        nodes = self.core_api.list_node(label_selector=selector, _preload_content=False)
-        nodes_data = json.loads(nodes.data)
-        
-        # Extract just the node names
-        return [node.get("metadata", {}).get("name") for node in nodes_data.get("items", [])]
+        # label index lookup when cached, server-side label selector otherwise
+        return [node.get("metadata", {}).get("name") for node in self._list_nodes(labels=labels, metadata_only=True)]
 
     def get_services_with_labels(self, labels: dict[str, Union[str,None]], namespace: str) -> list:
         selector = ",".join([f"{key}={value}" if value is not None else key for key, value in labels.items()])
@@ -182,20 +443,26 @@ class KubeAPI():
             label_selector=selector,
             _preload_content=False
         )
-        raw_data = json.loads(services.data)
+        raw_data = raw.loads(services.data)
 
         return raw_data.get("items", [])
 
+    def get_services_with_labels_for_namespaces(self, labels: dict[str, Union[str,None]], namespaces: list) -> dict:
+        """get_services_with_labels for several namespaces from a single list"""
+        selector = ",".join([f"{key}={value}" if value is not None else key for key, value in labels.items()])
+        return self._list_partitioned(
+            cluster_list=self.core_api.list_service_for_all_namespaces,
+            namespaced_list=self.core_api.list_namespaced_service,
+            namespaces=namespaces,
+            label_selector=selector
+        )
+
     
     def get_nodes_with_pressure(self, pressures=["DiskPressure", "MemoryPressure", "PIDPressure"]):
         """Get nodes with pressure signals"""
-        # 1. Fetch raw JSON to bypass expensive object creation
-        response = self.core_api.list_node(_preload_content=False)
-        nodes_data = json.loads(response.data)
-
         all_pressures = {}
     
-        for node in nodes_data.get("items", []):
+        for node in self._list_nodes():
             name = node["metadata"]["name"]
             status = node.get("status", {})
             
@@ -208,32 +475,29 @@ class KubeAPI():
     
     def get_pods_with_status(self, node_name, statuses=["Failed", "Unknown"]): # Failed, Running, Succeeded, Pending, Unknown
         """Get pods with failing statuses (or any other specific status)"""
-        pods = self.core_api.list_pod_for_all_namespaces(watch=False)
-        pods_on_node = [pod for pod in pods.items if pod.spec.node_name == node_name]
         all_pods = {}
-        for pod in pods_on_node:
-            if pod.status.phase in statuses:
-                all_pods[pod.metadata.name] = pod.status.phase
+        for pod in self._list_pods(node_name=node_name):
+            phase = pod.get("status", {}).get("phase")
+            if phase in statuses:
+                all_pods[pod["metadata"]["name"]] = phase
         return all_pods
     
     def get_unschedulable_pods(self):
         """Get pods that cannot be scheduled due to lack of resources"""
-        pods = self.core_api.list_pod_for_all_namespaces(watch=False)
         # Filter for pending pods due to insufficient resources
         pending_pods = []
-        for pod in pods.items:
-            if pod.status.phase == 'Pending':
-                for condition in pod.status.conditions or []:
-                    if condition.reason == 'Unschedulable':
-                        if 'Insufficient' in condition.message:
-                            pending_pods.append(pod)
-                            break
+        for pod in self._list_pods(phase="Pending"):
+            for condition in pod.get("status", {}).get("conditions") or []:
+                if condition.get("reason") == 'Unschedulable':
+                    if 'Insufficient' in (condition.get("message") or ""):
+                        pending_pods.append(pod)
+                        break
         # Print the pending pods
         unschedulable = {}
         for pod in pending_pods:
-            unschedulable[pod.metadata.name] = {
-                "namespace": pod.metadata.namespace,
-                "reason": pod.status.conditions[-1].message
+            unschedulable[pod["metadata"]["name"]] = {
+                "namespace": pod["metadata"].get("namespace"),
+                "reason": pod["status"]["conditions"][-1].get("message")
             }
         return unschedulable
     
@@ -256,6 +520,7 @@ class KubeAPI():
             resources[metric] = value
         return resources
     
+    @snapshot_view
     def get_available_resources(self, node_names=None):
         """Gets available resources (not currently used) in the cluster:
         - cpu
@@ -263,17 +528,43 @@ class KubeAPI():
         - gpus
         - pods
         """
+        if self._read_from_ledger():
+            available_resources = self.ledger.available(node_names=node_names)
+        else:
+            available_resources = self._compute_available_resources(node_names=node_names)
+        
+        # aggregate gpu utilisation info (vram only)
+        gpu_utilisation = self.get_gpu_utilisation()
+        gpu_metrics = defaultdict(float)
+        for gid, metrics in gpu_utilisation.items():
+            try:
+                gpu_metrics["vram"] += metrics["hami_gpu_memory_limit_bytes"] - metrics["hami_gpu_memory_allocated_bytes"]
+            except:
+                pass
+        for metric, value in gpu_metrics.items():
+            available_resources[metric] = value
+            
+        return available_resources
+
+    def _read_from_ledger(self):
+        """Whether available resources can be read from the ledger (counted by source in
+        AVAILABLE_RESOURCES_READS). The ledger is kept up to date by the informers, so it
+        also serves reads within a cluster snapshot."""
+        source = "ledger" if self.ledger is not None and self.ledger.is_healthy() else "recompute"
+        AVAILABLE_RESOURCES_READS.labels(source=source).inc()
+        return source == "ledger"
+
+    def _compute_available_resources(self, node_names=None):
+        """Full recompute of get_available_resources (without gpus) from node and pod lists"""
         total_resources = self._extract_resources(fn=lambda node: node.get("status", {}).get("allocatable", {}), node_names=node_names)
         available_resources = total_resources["online"]
 
         # remove requested (and used) resources
-        raw_pods = self.core_api.list_pod_for_all_namespaces(_preload_content=False)
-        pods_dict = json.loads(raw_pods.data)
-        for pod in pods_dict.get("items", []):
+        for pod in self._iter_pods(phase="Running"):
             node_name = pod.get("spec", {}).get("nodeName")
             if node_names is not None and node_name not in node_names:
                 continue
-            if node_name and pod.get("status", {}).get("phase") == 'Running':
+            if node_name:
                 available_resources["pods"] -= 1
                 for container in pod.get("spec", {}).get("containers", []):
                     reqs = container.get("resources", {}).get("requests", {})
@@ -281,48 +572,27 @@ class KubeAPI():
                         for resource in available_resources.keys():
                             if resource in reqs:
                                 available_resources[resource] -= cast_resource_value(reqs[resource])
-        
-        # aggregate gpu utilisation info (vram only)
-        gpu_utilisation = self.get_gpu_utilisation()
-        gpu_metrics = defaultdict(float)
-        for gid, metrics in gpu_utilisation.items():
-            try:
-                gpu_metrics["vram"] += metrics["hami_gpu_memory_limit_bytes"] - metrics["hami_gpu_memory_allocated_bytes"]
-            except:
-                pass
-        for metric, value in gpu_metrics.items():
-            available_resources[metric] = value
-            
         return available_resources
 
+    @snapshot_view
     def get_node_labels(self, node_names=None, label_filter=None, label_prefix="kalavai"):
-        # Fetch raw JSON to avoid expensive object instantiation
-        kwargs = {"_preload_content": False}
-        if label_filter:
-            kwargs["label_selector"] = ",".join(
-                [f"{key}={value}" if value is not None else key for key, value in label_filter.items()]
-            )
-        response = self.core_api.list_node(**kwargs)
-        nodes_data = json.loads(response.data)
-        
         return {
             node["metadata"]["name"]: {
                 k: v for k, v in node["metadata"].get("labels", {}).items()
                 if label_prefix is None or k.startswith(label_prefix)
             }
-            for node in nodes_data.get("items", []) if node_names is None or node["metadata"]["name"] in node_names
+            for node in self._list_nodes(labels=label_filter, node_names=node_names)
         }
     
+    @snapshot_view
     def get_node_annotations(self, node_names=None):
-        # Fetch raw JSON to avoid expensive object instantiation
-        response = self.core_api.list_node(_preload_content=False)
-        nodes_data = json.loads(response.data)
-        
         return {
-            node["metadata"]["name"]: node["metadata"].get("annotations", {})
-            for node in nodes_data.get("items", []) if node_names is None or node["metadata"]["name"] in node_names
+            # copies: nodes may be the informer's cached objects
+            node["metadata"]["name"]: dict(node["metadata"].get("annotations", {}))
+            for node in self._list_nodes(node_names=node_names)
         }
 
+    @snapshot_view
     def get_node_available_resources(self, node_names=None):
         """Gets available resources (not currently used) in the cluster disaggregated per node:
         - cpu
@@ -331,15 +601,32 @@ class KubeAPI():
         - pods
 
         """
+        if self._read_from_ledger():
+            available_resources = self.ledger.node_available(node_names=node_names)
+        else:
+            available_resources = self._compute_node_available_resources(node_names=node_names)
+
+        # add GPU utilisation info (only vram for now)
+        gpu_utilisation = self.get_gpu_utilisation()
+        for node_name, node_resources in available_resources.items():
+            node_resources["gpus"] = []
+            for gid, values in gpu_utilisation.items():
+                if node_name == values["node"]:
+                    node_resources["gpus"].append({
+                        "name": values["name"],
+                        "gpu_id": gid,
+                        "vram": values["hami_gpu_memory_limit_bytes"] - values["hami_gpu_memory_allocated_bytes"]
+                    })
+
+        return available_resources
+
+    def _compute_node_available_resources(self, node_names=None):
+        """Full recompute of get_node_available_resources (without gpus) from node and pod lists"""
         total_resources = self._extract_resources(fn=lambda node: node.get("status", {}).get("allocatable", {}), node_names=node_names, aggregate=False)
         available_resources = {node: value["online"] for node, value in total_resources.items()}
 
-        # get raw data (more efficient)
-        raw_pods = self.core_api.list_pod_for_all_namespaces(field_selector="status.phase=Running", _preload_content=False)
-        pods_dict = json.loads(raw_pods.data)
-
         # parse resources used by running pods
-        for pod in pods_dict.get('items', []):
+        for pod in self._iter_pods(phase="Running"):
             spec = pod.get('spec', {})
             node_name = spec.get('nodeName')
             if node_name not in available_resources:
@@ -352,88 +639,60 @@ class KubeAPI():
                     for resource in available_resources[node_name].keys():
                         if resource in reqs:
                             available_resources[node_name][resource] -= cast_resource_value(reqs[resource])
-        # add GPU utilisation info (only vram for now)
-        gpu_utilisation = self.get_gpu_utilisation()
-        for node_name, node_resources in available_resources.items():
-            node_resources["gpus"] = []
-            for gid, values in gpu_utilisation.items():
-                if node_name == values["node"]:
-                    node_resources["gpus"].append({
-                        "name": values["name"],
-                        "gpu_id": gid,
-                        "vram": values["hami_gpu_memory_limit_bytes"] - values["hami_gpu_memory_allocated_bytes"]
-                    })
-
         return available_resources
 
     def get_gpu_metrics(self):
-        """Using hami metrics endpoint to get gpu metrics"""
-
-        gpu_metrics = {}
-        url = f"http://0.0.0.0:31993/metrics" if not self.in_cluster else "http://hami-vgpu-scheduler.kalavai.svc:31993/metrics"
-        try:
-            response = requests.get(url)
-            metrics = text_string_to_metric_families(response.text)
-            for family in metrics:
-                gpu_metrics[family.name] = []
-                for sample in family.samples:
-                    gpu_metrics[family.name].append({
-                        "name": sample.name,
-                        "value": sample.value,
-                        "labels": sample.labels
-                    })
-            return gpu_metrics
-        except Exception as e:
-            return {"error": f"Error when extracting GPU metrics: {str(e)}"}
+        """Using hami metrics endpoint to get gpu metrics ({family: {device_uuid: Sample}}).
+        Served from the last background scrape; see get_cache_status for its age and staleness."""
+        gpu_metrics = self.gpu_scraper.get()
+        if gpu_metrics is None:
+            return {"error": f"Error when extracting GPU metrics: {self.gpu_scraper.last_error}"}
+        return gpu_metrics
         
+    @snapshot_view
     def get_gpu_utilisation(self):
-        metrics = self.get_gpu_metrics()
+        snapshot = current_snapshot()
+        metrics = snapshot.gpu_metrics if snapshot is not None else self.get_gpu_metrics()
 
         if "error" in metrics:
             return metrics
         
         # parse GPU info
         gpu_memory_utilisation = {}
-        for metric in metrics.get("hami_node_gpu_overview", []):
-            gpu_memory_utilisation[metric["labels"].get("device_uuid", "")] = {
-                "name": metric["labels"].get("device_type", ""),
-                "node": metric["labels"].get("node", ""),
-                "workloads": metric["labels"].get("shared_containers", "")
+        for device_uuid, sample in metrics.get("hami_node_gpu_overview", {}).items():
+            gpu_memory_utilisation[device_uuid] = {
+                "name": sample.labels.get("device_type", ""),
+                "node": sample.labels.get("node", ""),
+                "workloads": sample.labels.get("shared_containers", "")
             }
 
         # parse GPU memory utilisation
         for metric in ["hami_gpu_memory_limit_bytes", "hami_gpu_memory_allocated_bytes", "hami_gpu_core_limit_ratio", "hami_gpu_core_allocated_ratio"]:
-            for values in metrics.get(metric, []):
-                gpu_memory_utilisation[values["labels"]["device_uuid"]].update(
-                    {
-                        metric: values["value"]
-                    }
-                )
+            for device_uuid, sample in metrics.get(metric, {}).items():
+                if device_uuid in gpu_memory_utilisation:
+                    gpu_memory_utilisation[device_uuid][metric] = sample.value
         
 
         return gpu_memory_utilisation
     
     def get_node_gpus(self, node_names=None, gpu_key="hami.io/node-nvidia-register"):
+        with self.cluster_snapshot():
+            return self._get_node_gpus(node_names=node_names, gpu_key=gpu_key)
 
-        nodes = [node for node in self.core_api.list_node().items if node_names is None or node.metadata.name in node_names]
+    def _get_node_gpus(self, node_names=None, gpu_key="hami.io/node-nvidia-register"):
+        nodes = self._list_nodes(node_names=node_names)
 
-        gpu_info = {n.metadata.name: {"gpus": []} for n in nodes}
-        # pre-fetch all info at once
-        import time
-        t = time.time()
+        gpu_info = {n["metadata"]["name"]: {"gpus": []} for n in nodes}
+        # all views are derived from the same cluster snapshot
         annotations = self.get_node_annotations()
-        logger.debug("---> get_node_annotations %s", time.time()-t)
         labels = self.get_node_labels(label_prefix="")
-        logger.debug("---> get_node_labels %s", time.time()-t)
         node_states = self.get_nodes_states()
-        logger.debug("---> get_nodes_states %s", time.time()-t)
         node_resources = self.get_node_available_resources()
-        logger.debug("---> get_node_available_resources %s", time.time()-t)
         for node in nodes:
             # parse different GPU backends (AMD, NVIDIA)
-            name = node.metadata.name
+            name = node["metadata"]["name"]
             for backend in ["nvidia.com/gpu", "amd.com/gpu"]:
-                gpu_capacity = node.status.capacity.get(backend, "0")
+                gpu_capacity = node.get("status", {}).get("capacity", {}).get(backend, "0")
                 if gpu_capacity == "0":
                     continue
                 gpu_info[name]["available"] = node_resources[name][backend]
@@ -442,7 +701,7 @@ class KubeAPI():
                 if backend == "nvidia.com/gpu":
                     # extract model information
                     # for n, node_annotations in annotations.items():
-                    #     if n != node.metadata.name:
+                    #     if n != node["metadata"]["name"]:
                     #         continue
                     node_annotations = annotations[name]
 
@@ -465,7 +724,7 @@ class KubeAPI():
                 if backend == "amd.com/gpu":
                     
                     # for n, node_annotations in labels.items():
-                    #     if n != node.metadata.name:
+                    #     if n != node["metadata"]["name"]:
                     #         continue
                     node_annotations = labels[name]
                         
@@ -484,14 +743,10 @@ class KubeAPI():
         return gpu_info
     
     def read_node(self, node_names: list=None):
-        nodes = self.get_nodes()
-        nodes_info = {}
-        for node in nodes:
-            if node_names is not None and node not in node_names:
-                continue
-            nodes_info[node] = self.core_api.read_node(node)
-        
-        return force_serialisation(nodes_info)
+        return {
+            node["metadata"]["name"]: raw.snake_case_keys(node)
+            for node in self._list_nodes(node_names=node_names)
+        }
 
     def get_node_resources(self, node_names: list=None):
         nodes_info = self.read_node(node_names=node_names)
@@ -509,7 +764,7 @@ class KubeAPI():
                         "gpu_id": gid,
                         "vram": values["hami_gpu_memory_limit_bytes"]
                     })
-        return force_serialisation(nodes_resources)
+        return nodes_resources
     
     def delete_node(self, node_name):
         return self.core_api.delete_node(node_name)
@@ -517,21 +772,20 @@ class KubeAPI():
     def set_node_schedulable(self, node_name, state):
         # first drain the node
         if not state:
-            pods = self.core_api.list_pod_for_all_namespaces(watch=False)
-            for pod in pods.items:
-                if pod.spec.node_name != node_name:
-                    continue
-                print(f"******* Evicting pod {pod.metadata.name} ({pod.metadata.namespace})")
+            for pod in self._list_pods(node_name=node_name):
+                pod_name = pod["metadata"]["name"]
+                pod_namespace = pod["metadata"]["namespace"]
+                print(f"******* Evicting pod {pod_name} ({pod_namespace})")
                 body = client.V1Eviction(
                     metadata=client.V1ObjectMeta(
-                        name=pod.metadata.name,
-                        namespace=pod.metadata.namespace
+                        name=pod_name,
+                        namespace=pod_namespace
                     ),
                     delete_options=client.V1DeleteOptions()
                 )
                 self.core_api.create_namespaced_pod_eviction(
-                    pod.metadata.name,
-                    pod.metadata.namespace,
+                    pod_name,
+                    pod_namespace,
                     body
                 )
 
@@ -554,12 +808,14 @@ class KubeAPI():
         Returns:
             list: List of node names that were updated
         """
-        nodes = self.core_api.list_node()
+        nodes = raw.read_items(self.core_api.list_node)
         updated_nodes = []
         
-        for node in nodes.items:
+        for node in nodes:
+            node_name = node["metadata"]["name"]
+            node_labels_ = node["metadata"].get("labels") or {}
             # Check if all specified labels match
-            if all(node.metadata.labels.get(key) == value for key, value in node_labels.items()):
+            if all(node_labels_.get(key) == value for key, value in node_labels.items()):
                 # Create a patch body with the new annotations
                 patch_body = {
                     "metadata": {
@@ -568,10 +824,10 @@ class KubeAPI():
                 }
                 try:
                     # Patch the node with the new annotations
-                    self.core_api.patch_node(node.metadata.name, patch_body)
-                    updated_nodes.append(node.metadata.name)
+                    self.core_api.patch_node(node_name, patch_body)
+                    updated_nodes.append(node_name)
                 except Exception as e:
-                    print(f"Failed to update node {node.metadata.name}: {str(e)}")
+                    print(f"Failed to update node {node_name}: {str(e)}")
                     
         return updated_nodes
 
@@ -601,83 +857,79 @@ class KubeAPI():
             return False
 
     def kube_deploy(self, yaml_strs):
-        yamls = yaml_strs.split("---")
-        result = True
-        for yaml_str in yamls:
-            print("DEPLOYING YAML")
-            yaml_obj =  yaml.safe_load(yaml_str)
-            print(yaml_obj)
-            # load kubernetes client
-            k8s_client = client.api_client.ApiClient()
-            # create pods from yaml object
-            try:
-                res = utils.create_from_yaml(
-                    k8s_client,
-                    yaml_objects=[yaml_obj],
-                )
-                print(res)
-            except Exception as e:
-                result = False
-                print(str(e))
-        return result
-    
+        """Create the objects of a manifest; True if all were created"""
+        return len(self.kube_deploy_plus(yaml_strs)["failed"]) == 0
 
-    def kube_deploy_plus(self, yaml_strs, force_namespace=None):
+    def _ensure_namespace(self, namespace):
         # create namespace if not exists, ignore if it does
         try:
-            if force_namespace is not None:
-                self.create_namespace(name=force_namespace)
+            if namespace is not None:
+                self.create_namespace(name=namespace)
         except:
             pass
-        yamls = yaml_strs.split("---")
-        deployment_results = defaultdict(list)
-        custom_api = client.CustomObjectsApi(client.api_client.ApiClient())
-        k8s_client = client.api_client.ApiClient()
-        for yaml_str in yamls:
-            if yaml_str.strip():  # Check if the yaml_str is not just whitespace
-                yaml_obj = yaml.safe_load(yaml_str)
-                try:
-                    # Attempt custom deployment
-                    group = yaml_obj["apiVersion"][:yaml_obj["apiVersion"].index("/")]
-                    api_version = yaml_obj["apiVersion"][yaml_obj["apiVersion"].index("/")+1:]
-                    if force_namespace is not None:
-                        namespace = force_namespace
-                    else:
-                        if "metadata" in yaml_obj and "namespace" in yaml_obj["metadata"]:
-                            namespace = yaml_obj["metadata"]["namespace"]
-                        else:
-                            namespace = "default"
-                    plural = yaml_obj["kind"].lower() + "s" if not yaml_obj["kind"].endswith("y") else yaml_obj["kind"].lower()[:-1] + "ies"
-                    res = custom_api.create_namespaced_custom_object(
-                        group,
-                        api_version,
-                        namespace,
-                        plural,
-                        yaml_obj)
-                    deployment_results["successful"].append(str(res))
-                except Exception as e:
-                    print(f"Failed automated deployment, trying default deployment. [{str(e)}")
-                    try:
-                        namespace = force_namespace if force_namespace is not None else "default"
-                        res = utils.create_from_yaml(
-                            k8s_client,
-                            yaml_objects=[yaml_obj],
-                            namespace=namespace
-                        )
-                        # Assuming res contains some identifiable information about the resource
-                        deployment_results["successful"].append(str(res))
-                    except Exception as e:
-                        # Append the yaml that failed and the exception message for clarity
-                        deployment_results["failed"].append({"yaml": yaml_str, "error": str(e)})
 
-        return deployment_results
+    def kube_deploy_plus(self, yaml_strs, force_namespace=None, server_side_apply=False, force_conflicts=False):
+        self._ensure_namespace(force_namespace)
+        return ManifestApplier(
+            api_client=self.core_api.api_client,
+            mapper=self.rest_mapper
+        ).apply(yaml_strs, force_namespace=force_namespace, server_side_apply=server_side_apply, force_conflicts=force_conflicts)
     
+    def deploy_replicas(self, deployments, namespace, server_side_apply=False, force_conflicts=False, rollback_on_failure=False):
+        """Deploy the manifests of several replicas of a job, at most KW_DEPLOY_CONCURRENCY at a time.
+
+        Args:
+            deployments (list): (job id, rendered manifest) of each replica
+            namespace (str): Namespace of the job
+            server_side_apply (bool): Create or update objects with server-side apply
+            force_conflicts (bool): Take over fields owned by other managers
+            rollback_on_failure (bool): If any replica fails, delete everything the batch created
+
+        Returns:
+            [{"job_id", "status", "result"}] in replica order, status being deployed, failed or rolled_back
+            (rolled back replicas also report what was deleted under "rollback")
+        """
+        if rollback_on_failure and server_side_apply:
+            # an apply may have updated objects that existed before, deleting them is not a rollback
+            raise ValueError("rollback_on_failure is not supported with server_side_apply")
+        self._ensure_namespace(namespace)
+        applier = ManifestApplier(api_client=self.core_api.api_client, mapper=self.rest_mapper)
+        created = [[] for _ in deployments]
+
+        def deploy(index):
+            _, manifest = deployments[index]
+            try:
+                return applier.apply(
+                    manifest,
+                    force_namespace=namespace,
+                    server_side_apply=server_side_apply,
+                    force_conflicts=force_conflicts,
+                    created=created[index]
+                )
+            except Exception as e:
+                # e.g. a manifest that is not valid YAML
+                return {"successful": [], "failed": [{"yaml": manifest, "error": str(e)}]}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(DEPLOY_CONCURRENCY, len(deployments)))) as pool:
+            results = list(pool.map(deploy, range(len(deployments))))
+        outcomes = [
+            {"job_id": job_id, "status": "failed" if result["failed"] else "deployed", "result": result}
+            for (job_id, _), result in zip(deployments, results)
+        ]
+        if rollback_on_failure and any(outcome["status"] == "failed" for outcome in outcomes):
+            with ThreadPoolExecutor(max_workers=max(1, min(DEPLOY_CONCURRENCY, len(deployments)))) as pool:
+                rollbacks = list(pool.map(applier.delete, created))
+            for outcome, rollback in zip(outcomes, rollbacks):
+                outcome["rollback"] = rollback
+                outcome["status"] = "rolled_back"
+        return outcomes
+
     def kube_deploy_custom_object(self, group, api_version, namespace, plural, body):
         deployment_results = {
             "successful": [],
             "failed": []
         }
-        api = client.CustomObjectsApi(client.api_client.ApiClient())
+        api = self.custom_api
         if isinstance(body, str):
             body = yaml.safe_load(body)
         try:
@@ -696,12 +948,32 @@ class KubeAPI():
 
         return deployment_results
 
+    def kube_apply_custom_object(self, namespace, body, force_conflicts=False):
+        """Server-side apply of a namespaced object, with the same result shape as kube_deploy_custom_object"""
+        deployment_results = {
+            "successful": [],
+            "failed": []
+        }
+        if isinstance(body, str):
+            body = yaml.safe_load(body)
+        try:
+            mapping = self.rest_mapper.resolve(body["apiVersion"], body["kind"])
+            body.setdefault("metadata", {})["namespace"] = namespace
+            res = apply_object(self.core_api.api_client, mapping, body, namespace=namespace, force=force_conflicts)
+            deployment_results["successful"].append(str(res))
+        except ApplyConflictError as e:
+            deployment_results["failed"].append({"yaml": body, "error": str(e), "conflicts": e.conflicts})
+        except Exception as e:
+            deployment_results["failed"].append({"yaml": body, "error": str(e)})
+
+        return deployment_results
+
     def kube_patch_custom_object(self, name, group, api_version, namespace, plural, patched_body):
         deployment_results = {
             "successful": [],
             "failed": []
         }
-        api = client.CustomObjectsApi(client.api_client.ApiClient())
+        api = self.custom_api
         if isinstance(patched_body, str):
             patched_body = yaml.safe_load(patched_body)
         try:
@@ -722,7 +994,7 @@ class KubeAPI():
 
         return deployment_results
 
-    def create_or_update_secret(self, name: str, namespace: str, data: dict, encrypt_data: bool = True):
+    def create_or_update_secret(self, name: str, namespace: str, data: dict, encrypt_data: bool = True, force_conflicts: bool = False):
         # Handle data encoding based on encrypt_data flag
         if encrypt_data:
             # Ensure data is base64 encoded for opaque secrets
@@ -743,71 +1015,51 @@ class KubeAPI():
             # Store data as-is without encoding
             encoded_data = data
         
-        try:
-            # Try to create the secret first
-            secret = self.core_api.create_namespaced_secret(
-                namespace=namespace,
-                body={
-                    "apiVersion": "v1",
-                    "kind": "Secret",
-                    "metadata": {
-                        "name": name,
-                        "namespace": namespace
-                    },
-                    "type": "Opaque",
-                    "data": encoded_data
-                }
-            )
-        except client.exceptions.ApiException as e:
-            if e.status == 409:  # Conflict - secret already exists
-                # Update the existing secret
-                secret = self.core_api.patch_namespaced_secret(
-                    name=name,
-                    namespace=namespace,
-                    body={
-                        "data": encoded_data
-                    }
-                )
-            else:
-                raise
-        return secret
+        # server-side apply creates or updates in one request. Keys we applied
+        # before and left out now are removed; conflicts raise ApplyConflictError
+        return apply_object(
+            self.core_api.api_client,
+            self.rest_mapper.resolve("v1", "Secret"),
+            {
+                "apiVersion": "v1",
+                "kind": "Secret",
+                "metadata": {
+                    "name": name,
+                    "namespace": namespace
+                },
+                "type": "Opaque",
+                "data": encoded_data
+            },
+            namespace=namespace,
+            force=force_conflicts
+        )
     
-    def create_or_update_configmap(self, name: str, namespace: str, data: dict):
-        try:
-            # Try to create the ConfigMap first
-            configmap = self.core_api.create_namespaced_config_map(
-                namespace=namespace,
-                body={
-                    "apiVersion": "v1",
-                    "kind": "ConfigMap",
-                    "metadata": {
-                        "name": name,
-                        "namespace": namespace
-                    },
-                    "data": data
-                }
-            )
-        except client.exceptions.ApiException as e:
-            if e.status == 409:  # Conflict - ConfigMap already exists
-                # Update the existing ConfigMap
-                configmap = self.core_api.patch_namespaced_config_map(
-                    name=name,
-                    namespace=namespace,
-                    body={
-                        "data": data
-                    }
-                )
-            else:
-                raise
-        return configmap
+    def create_or_update_configmap(self, name: str, namespace: str, data: dict, force_conflicts: bool = False):
+        # server-side apply creates or updates in one request. Keys we applied
+        # before and left out now are removed; conflicts raise ApplyConflictError
+        return apply_object(
+            self.core_api.api_client,
+            self.rest_mapper.resolve("v1", "ConfigMap"),
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {
+                    "name": name,
+                    "namespace": namespace
+                },
+                "data": data
+            },
+            namespace=namespace,
+            force=force_conflicts
+        )
     
-    def create_or_update_user_data(self, name: str, namespace: str, data: dict, encrypted: bool = True):
+    def create_or_update_user_data(self, name: str, namespace: str, data: dict, encrypted: bool = True, force_conflicts: bool = False):
         if encrypted:
             # Create or update Secret
-            return self.create_or_update_secret(name, namespace, data, encrypt_data=True)
+            return self.create_or_update_secret(name, namespace, data, encrypt_data=True, force_conflicts=force_conflicts)
         else:
             # Create or update ConfigMap
-            return self.create_or_update_configmap(name, namespace, data)
+            return self.create_or_update_configmap(name, namespace, data, force_conflicts=force_conflicts)
     
     def get_user_data(self, name: str, namespace: str, encrypted: bool = True):
         try:
@@ -855,14 +1107,19 @@ class KubeAPI():
         template_version=None,
         is_update=False,
         random_suffix=True,
-        resources=None
+        resources=None,
+        server_side_apply=False,
+        force_conflicts=False
     ):
         """
         Deploy KalavaiJob (templated jobs)
         
-        Use the is_update flag to apply an update to an existing job
+        Use the is_update flag to apply an update to an existing job, or
+        server_side_apply to create or update it in one request (the name is
+        then used as given, so redeploys target the same job)
         """
-        name = sanitize_kubernetes_name(name + "-" + str(uuid.uuid4())[:6]) if not is_update and random_suffix else name
+        if not is_update and random_suffix and not server_side_apply:
+            name = sanitize_kubernetes_name(name + "-" + str(uuid.uuid4())[:6])
 
         body = {
             "apiVersion": "kalavai.net/v1",
@@ -884,15 +1141,22 @@ class KubeAPI():
                 "resources": resources
             }
         }
-        result = self.kube_deploy_custom_object(
-            group="kalavai.net",
-            api_version="v1",
-            namespace=namespace,
-            plural="kalavaijobs",
-            body=body
-        )
+        if server_side_apply:
+            result = self.kube_apply_custom_object(
+                namespace=namespace,
+                body=body,
+                force_conflicts=force_conflicts
+            )
+        else:
+            result = self.kube_deploy_custom_object(
+                group="kalavai.net",
+                api_version="v1",
+                namespace=namespace,
+                plural="kalavaijobs",
+                body=body
+            )
 
-        return force_serialisation(result)
+        return to_jsonable(result)
 
     def patch_template(
         self,
@@ -920,12 +1184,12 @@ class KubeAPI():
             patched_body=patched_body
         )
 
-        return force_serialisation(result)
+        return to_jsonable(result)
     
     def kube_get_custom_objects(self, group, api_version, namespace, plural, label_selector=None):
 
         try:
-            objects =  client.CustomObjectsApi().list_namespaced_custom_object(
+            objects =  self.custom_api.list_namespaced_custom_object(
                 group,
                 api_version,
                 namespace,
@@ -936,10 +1200,38 @@ class KubeAPI():
         except Exception as e:
             print(f"[WARNING]: Error when getting custom objects: {str(e)}")
             return []
+
+    def kube_get_custom_objects_for_namespaces(self, group, api_version, namespaces, plural, label_selector=None, field_selector=None):
+        """kube_get_custom_objects for several namespaces from a single list: {namespace: object list}"""
+        api = self.custom_api
+        kwargs = {"label_selector": label_selector}
+        if field_selector is not None:
+            kwargs["field_selector"] = field_selector
+        try:
+            partitioned = self._list_partitioned(
+                cluster_list=lambda **kw: api.list_cluster_custom_object(group, api_version, plural, **kw),
+                namespaced_list=lambda namespace, **kw: api.list_namespaced_custom_object(group, api_version, namespace, plural, **kw),
+                namespaces=namespaces,
+                **kwargs
+            )
+        except Exception as e:
+            print(f"[WARNING]: Error when getting custom objects: {str(e)}")
+            return {}
+        # custom resources carry their kind, use it to rebuild the list envelope
+        kind = next((f"{items[0]['kind']}List" for items in partitioned.values() if items), None)
+        return {
+            namespace: {
+                "apiVersion": f"{group}/{api_version}",
+                "items": items,
+                "kind": kind,
+                "metadata": {}
+            }
+            for namespace, items in partitioned.items()
+        }
     
     def kube_get_status_custom_object(self, name, group, api_version, namespace, plural):
         try:
-            api = client.CustomObjectsApi(client.api_client.ApiClient())
+            api = self.custom_api
             res = api.get_namespaced_custom_object_status(
                 group,
                 api_version,
@@ -951,8 +1243,26 @@ class KubeAPI():
         except:
             return None
 
+    def kube_get_status_custom_object_for_namespaces(self, name, group, api_version, namespaces, plural):
+        """kube_get_status_custom_object for several namespaces from a single list.
+        Namespaces without the object (or without status conditions) are left out."""
+        ns_objects = self.kube_get_custom_objects_for_namespaces(
+            group=group,
+            api_version=api_version,
+            namespaces=namespaces,
+            plural=plural,
+            field_selector=f"metadata.name={name}"
+        )
+        statuses = {}
+        for namespace, objects in ns_objects.items():
+            for item in objects["items"]:
+                conditions = item.get("status", {}).get("conditions")
+                if item["metadata"]["name"] == name and conditions is not None:
+                    statuses[namespace] = conditions
+        return statuses
+
     def kube_delete_custom_object(self, name, group, api_version, plural, namespace):
-        api = client.CustomObjectsApi(client.api_client.ApiClient())
+        api = self.custom_api
         res = api.delete_namespaced_custom_object(
             group,
             api_version,
@@ -971,34 +1281,41 @@ class KubeAPI():
         return response
 
     def describe_pod(self, pod, namespace):
-        response = self.core_api.read_namespaced_pod(
+        response = raw.read(
+            self.core_api.read_namespaced_pod,
             name=pod,
             namespace=namespace
         )
-        return force_serialisation(response)
+        return raw.snake_case_keys(response)
     
     def find_pods_with_label(self, labels: dict, namespace: str=None):
 
         resources_found = defaultdict(dict)
-        resource_types = {
-            'pod': self.core_api.list_pod_for_all_namespaces if namespace is None else self.core_api.list_namespaced_pod
-        }
+        try:
+            resources_found.update(self._group_pods_by_label(self._read_pods_with_label(labels, namespace=namespace), labels=labels))
+        except Exception as e:
+            print(f"Exception when checking for pod: {e}")
+
+        return resources_found
+
+    def _read_pods_with_label(self, labels: dict, namespace: str=None):
+        """Raw pods matching labels, listed from the apiserver"""
         label_selector = ",".join(
             [f"{label_key}={label_value}" if label_value is not None else label_key for label_key, label_value in labels.items()]
         )
-        label_key = "-".join(labels.keys())
-        for resource_type, list_func in resource_types.items():
-            try:
-                resources = list_func(label_selector=label_selector) if namespace is None else list_func(namespace, label_selector=label_selector)
-                if resources.items:
-                    for resource in resources.items:
-                        # place pod under the label value it matched against
-                        resources_found[resource.metadata.labels[label_key]][resource.metadata.name] = resource.to_dict()
-                        #resources_found[resource.metadata.name] = resource.to_dict()
-            except Exception as e:
-                print(f"Exception when checking for {resource_type}: {e}")
+        if namespace is None:
+            return raw.read_items(self.core_api.list_pod_for_all_namespaces, label_selector=label_selector)
+        return raw.read_items(self.core_api.list_namespaced_pod, namespace, label_selector=label_selector)
 
-        return force_serialisation(resources_found)
+    @staticmethod
+    def _group_pods_by_label(pods, labels: dict, projection=POD_STATUS_FIELDS):
+        """{label value: {pod name: projected pod}} for raw pods (whole pods when projection is None)"""
+        label_key = "-".join(labels.keys())
+        grouped = defaultdict(dict)
+        for pod in pods:
+            # place pod under the label value it matched against
+            grouped[pod["metadata"]["labels"][label_key]][pod["metadata"]["name"]] = pod if projection is None else project(pod, projection)
+        return grouped
     
     def get_specs_for_pod(self, pod_name, namespace):
         return self.core_api.read_namespaced_pod(
@@ -1007,37 +1324,54 @@ class KubeAPI():
         )
     
     def get_logs_for_labels(self, labels, namespace=None, tail_lines=100):
-        """Get logs for all pods that match a label key:value"""
+        """Get logs for all pods that match a label key:value.
+        Logs are fetched concurrently, at most KW_LOG_FETCH_CONCURRENCY at a time."""
         match = self.find_pods_with_label(
             namespace=namespace,
             labels=labels
         )
+        pods = [
+            (pod["metadata"].get("namespace") or namespace, pod_name)
+            for label_pods in match.values()
+            for pod_name, pod in label_pods.items()
+        ]
+        fetched = self._fetch_logs(pods, tail_lines=tail_lines)
         logs = defaultdict(dict)
-        for label_match, pods in match.items():
-            for pod_name in pods.keys():
-                logs[label_match][pod_name] = self.get_logs_for_pod(pod=pod_name, namespace=namespace, tail_lines=tail_lines)
-                # {
-                #     "logs": self.get_logs_for_pod(pod=pod_name, namespace=namespace, tail_lines=tail_lines),
-                #     "pod": force_serialisation(self.get_specs_for_pod(pod_name=pod_name, namespace=namespace))
-                # }
-        
+        for label_match, label_pods in match.items():
+            for pod_name, pod in label_pods.items():
+                pod_logs = fetched[(pod["metadata"].get("namespace") or namespace, pod_name)]
+                if isinstance(pod_logs, Exception):
+                    raise pod_logs
+                logs[label_match][pod_name] = pod_logs
         return logs
+
+    def _fetch_logs(self, pods, tail_lines=100):
+        """Logs of (namespace, pod name) pairs, fetched concurrently (at most KW_LOG_FETCH_CONCURRENCY
+        at a time), as {(namespace, pod name): logs, or the exception raised fetching them}"""
+        if not pods:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(LOG_FETCH_CONCURRENCY, len(pods)), thread_name_prefix="pod-logs") as pool:
+            fetches = {
+                (pod_namespace, pod_name): pool.submit(self.get_logs_for_pod, pod=pod_name, namespace=pod_namespace, tail_lines=tail_lines)
+                for pod_namespace, pod_name in pods
+            }
+        return {key: fetch.exception() or fetch.result() for key, fetch in fetches.items()}
     
     def describe_pods_for_labels(self, labels, namespace):
-        """Get describe for all pods that match a label key:value"""
-        match = self.find_pods_with_label(
-            namespace=namespace,
-            labels=labels
-        )
+        """Get describe for all pods that match a label key:value (the listed pods, not re-read one by one)"""
         logs = defaultdict(dict)
-        for label_match, pods in match.items():
-            for pod_name, pod in pods.items():
-                logs[label_match][pod_name] = self.describe_pod(pod=pod_name, namespace=namespace)
+        try:
+            grouped = self._group_pods_by_label(self._read_pods_with_label(labels, namespace=namespace), labels=labels, projection=None)
+        except Exception as e:
+            print(f"Exception when checking for pod: {e}")
+            return logs
+        for label_match, label_pods in grouped.items():
+            for pod_name, pod in label_pods.items():
+                logs[label_match][pod_name] = raw.snake_case_keys(pod)
         return logs
     
     def list_namespaces(self):
-        namespaces = self.core_api.list_namespace()
-        return [ns["metadata"]["name"] for ns in force_serialisation(namespaces.items)]
+        return [ns["metadata"]["name"] for ns in raw.read_items(self.core_api.list_namespace)]
     
     def list_namespaced_lws(self, namespace, label_selector):
         resources = self.kube_get_custom_objects(
@@ -1125,6 +1459,15 @@ class KubeAPI():
         )
         return resources
 
+    def list_kalavaijobs_for_namespaces(self, namespaces, label_selector=None):
+        return self.kube_get_custom_objects_for_namespaces(
+            group="kalavai.net",
+            api_version="v1",
+            plural="kalavaijobs",
+            namespaces=namespaces,
+            label_selector=label_selector
+        )
+
     def delete_namespaced_kalavaijob(self, name, namespace):
         return self.kube_delete_custom_object(
             group="kalavai.net",
@@ -1177,6 +1520,34 @@ class KubeAPI():
             labels=labels,
             namespace=namespace
         )
+        return self._pod_statuses(res)
+
+    def get_pods_status_for_label_for_namespaces(self, labels, namespaces):
+        """get_pods_status_for_label for several namespaces from a single pod list"""
+        label_selector = ",".join(
+            [f"{label_key}={label_value}" if label_value is not None else label_key for label_key, label_value in labels.items()]
+        )
+        try:
+            partitioned = self._list_partitioned(
+                cluster_list=self.core_api.list_pod_for_all_namespaces,
+                namespaced_list=self.core_api.list_namespaced_pod,
+                namespaces=namespaces,
+                label_selector=label_selector
+            )
+            grouped = {
+                namespace: self._group_pods_by_label(partitioned.get(namespace, []), labels=labels)
+                for namespace in namespaces
+            }
+        except Exception as e:
+            print(f"Exception when checking for pod: {e}")
+            grouped = {}
+        return {
+            namespace: self._pod_statuses(grouped.get(namespace, {}))
+            for namespace in namespaces
+        }
+
+    @staticmethod
+    def _pod_statuses(res):
         pod_statuses = defaultdict(dict)
         for match_label_value, pods in res.items():
 
@@ -1187,7 +1558,7 @@ class KubeAPI():
                     status = pod["status"]["phase"]
                 pod_statuses[match_label_value][pod["metadata"]["name"]] = {
                     "status": status,
-                    "conditions": force_serialisation(pod["status"]["container_statuses"]),
+                    "conditions": to_jsonable(pod["status"]["container_statuses"]),
                     "node_name": pod["spec"]["node_name"],
                     "namespace": pod["metadata"]["namespace"]
                 }
@@ -1198,26 +1569,18 @@ class KubeAPI():
         # pull only the service with the given label
         label_selector = label_key if label_value is None else f"{label_key}={label_value}"
         if namespace is None:
-            resources = self.core_api.list_service_for_all_namespaces(watch=False, label_selector=label_selector)
+            resources = raw.read_items(self.core_api.list_service_for_all_namespaces, watch=False, label_selector=label_selector)
         else:
-            resources = self.core_api.list_namespaced_service(watch=False, namespace=namespace, label_selector=label_selector)
+            resources = raw.read_items(self.core_api.list_namespaced_service, watch=False, namespace=namespace, label_selector=label_selector)
         service_ports = defaultdict(dict)
-        def to_dict(service_port):
-            return {
-                "node_port": service_port.node_port,
-                "port": service_port.port,
-                "protocol": service_port.protocol,
-                "target_port": service_port.target_port,
-                "name": service_port.name
+        for service in resources:
+            service = project(service, SERVICE_PORTS_FIELDS)
+            if types is not None and service["type"] not in types:
+                continue
+            service_ports[service["labels"][label_key]][service["name"]] = {
+                "type": service["type"],
+                "ports": service["ports"]
             }
-        if resources.items:
-            for service in resources.items:
-                if types is not None and service.spec.type not in types:
-                    continue
-                service_ports[service.metadata.labels[label_key]][service.metadata.name] = {
-                    "type": service.spec.type,
-                    "ports": [to_dict(p) for p in service.spec.ports]
-                }
                 # service_ports[service.metadata.name] = {
                 #     "type": service.spec.type,
                 #     "ports": [to_dict(p) for p in service.spec.ports]
@@ -1252,7 +1615,7 @@ class KubeAPI():
             namespace,
             body
         )
-        return force_serialisation(result)
+        return to_jsonable(result)
     
     def deploy_service(
         self,
@@ -1279,7 +1642,7 @@ class KubeAPI():
             namespace,
             body
         )
-        return force_serialisation(result)
+        return to_jsonable(result)
     
     def create_namespace(self, name, labels: dict=None):
         """
@@ -1307,7 +1670,7 @@ class KubeAPI():
         
         # Create namespace if not exists, otherwise patch with labels
         if name in self.list_namespaces():
-            results["namespace"] = force_serialisation(
+            results["namespace"] = to_jsonable(
                 self.core_api.patch_namespace(
                     name=name,
                     body={
@@ -1318,7 +1681,7 @@ class KubeAPI():
                 )
             )
         else:
-            results["namespace"] = force_serialisation(
+            results["namespace"] = to_jsonable(
                 self.core_api.create_namespace(
                     body=client.V1Namespace(
                         metadata=client.V1ObjectMeta(name=name, labels=labels))
@@ -1333,7 +1696,7 @@ class KubeAPI():
         result = self.core_api.delete_namespace(
             name=name
         )
-        return force_serialisation(result)
+        return to_jsonable(result)
     
     def create_rbac_for_namespace(self, namespace: str):
         """
@@ -1429,84 +1792,61 @@ class KubeAPI():
             gateway = {"Error": str(e)}
         
         return {
-            "cluster_role": force_serialisation(cluster_role),
-            "cluster_role_binding": force_serialisation(cluster_role_binding),
-            "service_account": force_serialisation(service_account),
-            "gateway": force_serialisation(gateway)
+            "cluster_role": to_jsonable(cluster_role),
+            "cluster_role_binding": to_jsonable(cluster_role_binding),
+            "service_account": to_jsonable(service_account),
+            "gateway": to_jsonable(gateway)
         }
 
+    def list_deployments_for_namespaces(self, namespaces):
+        """list_deployments for several namespaces from a single list"""
+        k8s_apps = self.apps_api
+        partitioned = self._list_partitioned(
+            cluster_list=k8s_apps.list_deployment_for_all_namespaces,
+            namespaced_list=k8s_apps.list_namespaced_deployment,
+            namespaces=namespaces
+        )
+        return {namespace: self._summarise_deployments(deployments) for namespace, deployments in partitioned.items()}
+
     def list_deployments(self, namespace, inspect_services=False):
         """ List deployments in a namespace"""
-        k8s_apps = client.AppsV1Api()
-        deployments = k8s_apps.list_namespaced_deployment(namespace)
-        model_deployments = defaultdict(dict)
-        for deployment in deployments.items:
-            model_deployments[deployment.metadata.name] = {
-                "replicas": deployment.spec.replicas,
-                "available_replicas": deployment.status.available_replicas,
-                "unavailable_replicas": deployment.status.unavailable_replicas,
-                "ready_replicas": deployment.status.ready_replicas,
-                "paused": deployment.spec.paused
-            }
+        k8s_apps = self.apps_api
+        deployments = raw.read_items(k8s_apps.list_namespaced_deployment, namespace)
+        model_deployments = self._summarise_deployments(deployments)
         
         if inspect_services:
-            services = self.core_api.list_namespaced_service(namespace)
-            for service in services.items:
-                model_deployments[service.metadata.name]["cluster_ip"] = service.spec.cluster_ip
-                model_deployments[service.metadata.name]["ports"] = [(port.node_port, port.target_port) for port in service.spec.ports]
+            for service in raw.read_items(self.core_api.list_namespaced_service, namespace):
+                service = project(service, SERVICE_IP_FIELDS)
+                model_deployments[service["name"]]["cluster_ip"] = service["cluster_ip"]
+                model_deployments[service["name"]]["ports"] = [(port["node_port"], port["target_port"]) for port in service["ports"] or []]
 
         return model_deployments
 
-    def delete_labeled_resources(self, namespace, label_key: str, label_value: str = None):
-        """Delete all resources in a namespace with a given label"""
-
-        core_api = client.CoreV1Api()
-        apps_api = client.AppsV1Api()
-        networking_api = client.NetworkingV1Api()
+    @staticmethod
+    def _summarise_deployments(deployments):
+        model_deployments = defaultdict(dict)
+        for deployment in deployments:
+            model_deployments[deployment["metadata"]["name"]] = project(deployment, DEPLOYMENT_FIELDS)
+        return model_deployments
 
-        deleted_resources = []
-        failed_resources = []
+    def delete_labeled_resources(self, namespace, label_key: str, label_value: str = None, propagation_policy: str = None, progress=None):
+        """Delete all resources in a namespace with a given label
 
+        Args:
+            namespace (str): Namespace to delete from
+            label_key (str): Label the resources carry
+            label_value (str): Optional value of the label
+            propagation_policy (str): Background, Foreground or Orphan (KW_DELETE_PROPAGATION_POLICY by default)
+            progress: Optional fn(resource_type, state) called as each kind is deleted
+        """
         label_selector = label_key if label_value is None else f"{label_key}={label_value}"
-
-        resource_types = {
-            'pod': (core_api.list_namespaced_pod, core_api.delete_namespaced_pod),
-            'service': (core_api.list_namespaced_service, core_api.delete_namespaced_service),
-            'daemonset': (apps_api.list_namespaced_daemon_set, apps_api.delete_namespaced_daemon_set),
-            'deployment': (apps_api.list_namespaced_deployment, apps_api.delete_namespaced_deployment),
-            'replicaset': (apps_api.list_namespaced_replica_set, apps_api.delete_namespaced_replica_set),
-            'statefulset': (apps_api.list_namespaced_stateful_set, apps_api.delete_namespaced_stateful_set),
-            'persistentvolumeclaim': (core_api.list_namespaced_persistent_volume_claim, core_api.delete_namespaced_persistent_volume_claim),
-            'leaderworkerset': (self.list_namespaced_lws, self.delete_namespaced_lws),
-            'raycluster': (self.list_namespaced_raycluster, self.delete_namespaced_raycluster),
-            'rayservice': (self.list_namespaced_rayservice, self.delete_namespaced_rayservice),
-            'helmrelease': (self.list_namespaced_helmrelease, self.delete_namespaced_helmrelease),
-            'job': (self.list_namespaced_vcjob, self.delete_namespaced_vcjob),
-            'secret': (core_api.list_namespaced_secret, core_api.delete_namespaced_secret),
-            "ingress": (networking_api.list_namespaced_ingress, networking_api.delete_namespaced_ingress),
-            "kalavaijob": (self.list_namespaced_kalavaijob, self.delete_namespaced_kalavaijob),
-            "middleware": (self.list_namespaced_middleware, self.delete_namespaced_middleware)
-        }
-
-        for resource_type, (list_func, delete_func) in resource_types.items():
-            try:
-                resources = list_func(namespace, label_selector=label_selector)
-                is_dict = isinstance(resources, dict)
-                items = resources["items"] if is_dict else resources.items
-                for resource in items:
-                    name = resource["metadata"]["name"] if is_dict else resource.metadata.name
-                    try:
-                        delete_func(name=name, namespace=namespace)
-                        deleted_resources.append(f"{resource_type}/{name}")
-                    except Exception as e:
-                        failed_resources.append(f"{resource_type}/{name}: {str(e)}")
-            except Exception as e:
-                print(f"Exception when listing {resource_type}: {e}")
-
-        return {
-            "deleted_resources": deleted_resources,
-            "failures": failed_resources
-        }
+        return LabelledDeletion(
+            api_client=self.core_api.api_client,
+            namespace=namespace,
+            label_selector=label_selector,
+            propagation_policy=propagation_policy,
+            progress=progress
+        ).run()
 
     def create_userspace(self,
         name: str, 
@@ -1524,14 +1864,14 @@ class KubeAPI():
         ns = self.create_namespace(
             name=name,
             labels=extra_labels)
-        results.update({"namespace": force_serialisation(ns)})
+        results.update({"namespace": to_jsonable(ns)})
 
         # apply optional resource quotas
         if resource_quota is not None:
             rq = self.set_resource_quota(
                 namespace=name,
                 quotas=resource_quota)
-            results.update({"resourcequota": force_serialisation(rq)})
+            results.update({"resourcequota": to_jsonable(rq)})
         return results
 
     def set_resource_quota(self, namespace: str, quotas: str, labels: dict=None):
@@ -1566,7 +1906,7 @@ class KubeAPI():
                 )
             )
         )
-        return force_serialisation(result)
+        return to_jsonable(result)
 
     def get_resource_quotas(self, namespace: str):
         """
@@ -1574,7 +1914,7 @@ class KubeAPI():
         """
         try:
             resource_quotas = self.core_api.list_namespaced_resource_quota(namespace=namespace)
-            return force_serialisation(resource_quotas.items)
+            return to_jsonable(resource_quotas.items)
         except:
             return []
         
@@ -1681,43 +2021,20 @@ class KubeAPI():
             # service
             self.core_api.delete_namespaced_service(name=f"{deployment_name}-service", namespace=namespace)
             # deployment
-            client.AppsV1Api().delete_namespaced_deployment(name=f"{deployment_name}", namespace=namespace)
+            self.apps_api.delete_namespaced_deployment(name=f"{deployment_name}", namespace=namespace)
             # ingress
-            client.NetworkingV1Api().delete_namespaced_ingress(name=f"{deployment_name}-ingress", namespace=namespace)
+            self.networking_api.delete_namespaced_ingress(name=f"{deployment_name}-ingress", namespace=namespace)
             return True
         except Exception as e:
             print(f"Exception when calling CoreV1Api->delete_namespace: {str(e)}")
 
     def get_storage_usage(self, namespace, target_storages: list=None):
+        """Storage usage (status, used and total capacity in MB) of the PVCs in a namespace"""
+        return self.storage_usage.get(namespaces=[namespace], names=target_storages)[namespace]
 
-        storages = defaultdict(dict)
-
-        # get pvc statuses
-        pvc_list = self.core_api.list_namespaced_persistent_volume_claim(namespace)
-
-        for pvc in pvc_list.items:
-            storages[pvc.metadata.name] = {
-                "status": pvc.status.phase
-            }
-
-        # Fetch metrics
-        response = requests.get(f"{LONGHORN_MANAGER_ENDPOINT}/metrics")
-        if response.status_code != 200:
-            print("Failed to fetch metrics:", response.text)
-            exit()
-
-        # Parse metrics to extract longhorn PVC details
-        storage_capacity = extract_longhorn_metric_from_prometheus(
-            metric_keys=["longhorn_volume_actual_size", "longhorn_volume_capacity_bytes"],
-            map_fields={"longhorn_volume_actual_size": "used_capacity", "longhorn_volume_capacity_bytes": "total_capacity"},
-            metrics=response.text
-        )
-        for pvc in storages:
-            if pvc not in storage_capacity:
-                storage_capacity[pvc] = {"used_capacity": 0, "total_capacity": 0}
-            storages[pvc] = {**storages[pvc], **storage_capacity[pvc]}
-            
-        return {name: data for name, data in storages.items() if target_storages is None or name in target_storages}
+    def get_storage_usage_for_namespaces(self, namespaces: list, target_storages: list=None):
+        """Storage usage of the PVCs in several namespaces, as {namespace: {pvc: usage}}"""
+        return self.storage_usage.get(namespaces=namespaces, names=target_storages)
 
     def deploy_agent_builder(
         self,
@@ -1757,50 +2074,60 @@ class KubeAPI():
             # service
             self.core_api.delete_namespaced_service(name=f"{deployment_name}-agent-builder-service", namespace=namespace)
             # deployment
-            client.AppsV1Api().delete_namespaced_deployment(name=f"{deployment_name}-agent-builder", namespace=namespace)
+            self.apps_api.delete_namespaced_deployment(name=f"{deployment_name}-agent-builder", namespace=namespace)
             # ingress
-            client.NetworkingV1Api().delete_namespaced_ingress(name=f"{deployment_name}-agent-builder-ingress", namespace=namespace)
+            self.networking_api.delete_namespaced_ingress(name=f"{deployment_name}-agent-builder-ingress", namespace=namespace)
             # pvc
             self.core_api.delete_namespaced_persistent_volume_claim(name=f"{deployment_name}-agent-builder-pvc", namespace=namespace)
             return True
         except Exception as e:
             print(f"Exception when calling delete agent builder: {str(e)}")
         
-    def deploy_generic_model(self, config: str, force_namespace: str="default"):
+    def deploy_generic_model(self, config: str, force_namespace: str="default", server_side_apply=False, force_conflicts=False):
         # Deploy a generic config
         return self.kube_deploy_plus(
             yaml_strs=config,
-            force_namespace=force_namespace)
+            force_namespace=force_namespace,
+            server_side_apply=server_side_apply,
+            force_conflicts=force_conflicts)
 
     def find_resources_with_label(self, namespace:str, labels: dict):
-        core_api = client.CoreV1Api()
-        apps_api = client.AppsV1Api()
-        batch_v1_api = client.BatchV1Api()
-        #batch_v1beta1_api = client.BatchV1beta1Api()
+        return self.find_resources_with_label_for_namespaces(namespaces=[namespace], labels=labels)[namespace]
 
-        resources_found = {}
+    def find_resources_with_label_for_namespaces(self, namespaces: list, labels: dict):
+        """Resources of common types matching labels, as {namespace: {type: {name: metadata}}}.
+        One cluster-scoped, metadata-only list per type (namespaced lists if RBAC forbids it)."""
+        resources_found = {namespace: {} for namespace in namespaces}
 
+        # type -> raw.RESOURCE_PATHS key
         resource_types = {
-            'pod': core_api.list_namespaced_pod,
-            'service': core_api.list_namespaced_service,
-            'daemonset': apps_api.list_namespaced_daemon_set,
-            'deployment': apps_api.list_namespaced_deployment,
-            'replicaset': apps_api.list_namespaced_replica_set,
-            'statefulset': apps_api.list_namespaced_stateful_set,
-            'job': batch_v1_api.list_namespaced_job,
-            'persistentvolumeclaim': core_api.list_namespaced_persistent_volume_claim,
-            'secret': core_api.list_namespaced_secret
+            'pod': "pod",
+            'service': "service",
+            'daemonset': "daemonset",
+            'deployment': "deployment",
+            'replicaset': "replicaset",
+            'statefulset': "statefulset",
+            'job': "batchjob",
+            'persistentvolumeclaim': "persistentvolumeclaim",
+            'secret': "secret"
         }
 
         label_selector = ",".join(
             [f"{label_key}={label_value}" if label_value is not None else label_key for label_key, label_value in labels.items()]
         )
 
-        for resource_type, list_func in resource_types.items():
+        for resource_type, resource in resource_types.items():
             try:
-                resources = list_func(namespace, label_selector=label_selector)
-                if resources.items:
-                    resources_found[resource_type] = {resource.metadata.name: resource.metadata.to_dict() for resource in resources.items}
+                partitioned = self._list_metadata_partitioned(
+                    resource=resource,
+                    namespaces=namespaces,
+                    label_selector=label_selector
+                )
+                for namespace, resources in partitioned.items():
+                    if resources:
+                        resources_found[namespace][resource_type] = {
+                            resource["metadata"]["name"]: raw.snake_case_keys(resource["metadata"]) for resource in resources
+                        }
             except Exception as e:
                 print(f"Exception when checking for {resource_type}: {e}")
 
@@ -1815,51 +2142,73 @@ class KubeAPI():
 
         service_ports = {}        
 
-        resources = self.core_api.list_namespaced_service(namespace, label_selector=label_selector)
-        if resources.items:
-            for service in resources.items:
-                node_ports = []
-                if service.spec.type == "NodePort":
-                    for port in service.spec.ports:
-                        # Check if the port is a NodePort and add it to the list
-                        if port.node_port:
-                            node_ports.append(port.node_port)
-                service_ports[service.metadata.name] = max(node_ports)
+        for service in raw.read_items(self.core_api.list_namespaced_service, namespace, label_selector=label_selector):
+            service = project(service, SERVICE_PORTS_FIELDS)
+            node_ports = []
+            if service["type"] == "NodePort":
+                for port in service["ports"]:
+                    # Check if the port is a NodePort and add it to the list
+                    if port["node_port"]:
+                        node_ports.append(port["node_port"])
+            service_ports[service["name"]] = max(node_ports)
 
         return service_ports
     
-    def get_job_info_for_labels(self, labels, namespace, tail_lines=100):
-        """Aggregates kubectl describe and kubectl logs when available"""
+    def get_job_info_for_labels(self, labels, namespace, tail_lines=100, include_events=False):
+        """Aggregates kubectl describe and kubectl logs (and optionally events) when available.
+        Pods are listed once and double as the describe output; logs are fetched concurrently
+        and events come from one list per request."""
         job_info = defaultdict(dict)
         try:
-            match = self.get_logs_for_labels(
-                labels=labels,
-                namespace=namespace,
-                tail_lines=tail_lines
-            )
-            for label_match, info in match.items():
-                job_info[label_match] = defaultdict(dict)
-                for pod_name, logs in info.items():
-                    job_info[label_match][pod_name]["logs"] = logs
-        except Exception as e:
-            print(f"Error in get log for labels: {str(e)}")
-            pass
-        try:
-            match = self.describe_pods_for_labels(
-                labels=labels,
-                namespace=namespace
-            )
-            for label_match, descriptions in match.items():
-                for pod_name, description in descriptions.items():
-                    if pod_name not in job_info[label_match]:
-                        job_info[label_match] = {pod_name: {}}
-                    job_info[label_match][pod_name]["describe"] = description
+            pods = self._read_pods_with_label(labels, namespace=namespace)
+            grouped = self._group_pods_by_label(pods, labels=labels, projection=None)
         except Exception as e:
-            print(f"Error in describe pods for labels: {str(e)}")
-            pass
+            print(f"Error in listing pods for labels: {str(e)}")
+            return job_info
+
+        logs = self._fetch_logs(
+            [(pod["metadata"].get("namespace") or namespace, pod["metadata"]["name"]) for pod in pods],
+            tail_lines=tail_lines
+        )
+        events = {}
+        if include_events:
+            try:
+                events = self._pod_events(namespace=namespace)
+            except Exception as e:
+                print(f"Error in listing events: {str(e)}")
+
+        for label_match, label_pods in grouped.items():
+            job_info[label_match] = defaultdict(dict)
+            for pod_name, pod in label_pods.items():
+                key = (pod["metadata"].get("namespace") or namespace, pod_name)
+                if isinstance(logs[key], Exception):
+                    print(f"Error in get log for {pod_name}: {str(logs[key])}")
+                else:
+                    job_info[label_match][pod_name]["logs"] = logs[key]
+                job_info[label_match][pod_name]["describe"] = raw.snake_case_keys(pod)
+                if include_events:
+                    job_info[label_match][pod_name]["events"] = events.get(key, [])
 
         return job_info
 
+    def _pod_events(self, namespace=None):
+        """Pod events of a namespace (all namespaces if None) from one list, as
+        {(namespace, pod name): [events, oldest first]}"""
+        field_selector = "involvedObject.kind=Pod"
+        if namespace is None:
+            items = raw.read_items(self.core_api.list_event_for_all_namespaces, field_selector=field_selector)
+        else:
+            items = raw.read_items(self.core_api.list_namespaced_event, namespace, field_selector=field_selector)
+        events = defaultdict(list)
+        for event in items:
+            involved = event.get("involvedObject", {})
+            projected = project(event, EVENT_FIELDS)
+            # events.k8s.io-style events only carry eventTime
+            projected["last_timestamp"] = projected["last_timestamp"] or event.get("eventTime")
+            events[(involved.get("namespace"), involved.get("name"))].append(projected)
+        for pod_events in events.values():
+            pod_events.sort(key=lambda event: event["last_timestamp"] or "")
+        return events
 
 if __name__ == "__main__":
     
@@ -0,0 +1,267 @@
+"""
+Per-node resource ledger kept up to date from node and pod informer events.
+
+For every node it holds allocatable amounts (and readiness), and the amounts
+requested by running pods scheduled on it, so available resources can be read
+without re-parsing every node and pod. A periodic consistency check rebuilds
+the ledger from the informer stores, records how far it had drifted and
+repairs it.
+"""
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from prometheus_client import Counter
+
+from kube_watcher.utils import cast_resource_value, parse_resource_value
+
+
+LEDGER_CHECK_SECONDS = int(os.getenv("KW_LEDGER_CHECK_SECONDS", "300"))
+# drift below this (absolute) is float noise from fractional cpu requests
+LEDGER_DRIFT_TOLERANCE = 1e-6
+
+AVAILABLE_RESOURCES_READS = Counter(
+    "kube_watcher_available_resources_reads",
+    "Reads of available resources by source (ledger, recompute)",
+    ["source"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def available_resources_reads():
+    """source -> reads of available resources so far, from AVAILABLE_RESOURCES_READS"""
+    return {
+        sample.labels["source"]: int(sample.value)
+        for metric in AVAILABLE_RESOURCES_READS.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    }
+
+
+def node_entry(node):
+    """(online, allocatable) for a raw node object"""
+    online = False
+    for condition in node.get("status", {}).get("conditions", []):
+        if condition.get("type") == "Ready":
+            online = condition.get("status") == "True"
+    allocatable = {
+        resource: value
+        for resource, value in parse_resource_value(resources=node.get("status", {}).get("allocatable", {})).items()
+        if isinstance(value, (int, float))
+    }
+    return online, allocatable
+
+
+def pod_entry(pod):
+    """(node_name, requests) for a raw pod object, or None if it does not hold resources"""
+    node_name = pod.get("spec", {}).get("nodeName")
+    if not node_name or pod.get("status", {}).get("phase") != "Running":
+        return None
+    requests = defaultdict(int)
+    requests["pods"] = 1
+    for container in pod.get("spec", {}).get("containers", []):
+        for resource, value in (container.get("resources", {}).get("requests") or {}).items():
+            amount = cast_resource_value(value)
+            if isinstance(amount, (int, float)):
+                requests[resource] += amount
+    return node_name, dict(requests)
+
+
+class ResourceLedger():
+    def __init__(self):
+        self._lock = threading.RLock()
+        # node name -> (online, allocatable)
+        self._nodes = {}
+        # node name -> resource -> requested amount (nodes may be unknown, e.g. deleted before their pods)
+        self._requested = defaultdict(lambda: defaultdict(int))
+        # pod key -> (node name, requests)
+        self._pods = {}
+        self._node_informer = None
+        self._pod_informer = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.drift = {
+            "checks": 0,
+            "drifted_checks": 0,
+            "drifted_entries": 0,
+            "max_abs_drift": 0,
+            "last_check": None,
+            "last_drift": None
+        }
+
+    ############
+    ## Events ##
+    ############
+    def upsert_node(self, node):
+        with self._lock:
+            self._nodes[node["metadata"]["name"]] = node_entry(node)
+
+    def remove_node(self, node):
+        with self._lock:
+            self._nodes.pop(node["metadata"]["name"], None)
+
+    def upsert_pod(self, pod):
+        key = f"{pod['metadata'].get('namespace')}/{pod['metadata']['name']}"
+        entry = pod_entry(pod)
+        with self._lock:
+            self._release(key)
+            if entry is not None:
+                node_name, requests = entry
+                self._pods[key] = entry
+                for resource, amount in requests.items():
+                    self._requested[node_name][resource] += amount
+
+    def remove_pod(self, pod):
+        with self._lock:
+            self._release(f"{pod['metadata'].get('namespace')}/{pod['metadata']['name']}")
+
+    def _release(self, key):
+        entry = self._pods.pop(key, None)
+        if entry is None:
+            return
+        node_name, requests = entry
+        node_requested = self._requested[node_name]
+        for resource, amount in requests.items():
+            node_requested[resource] -= amount
+        if not self._pods_on(node_name):
+            # drop accumulated float error along with the empty entry
+            del self._requested[node_name]
+
+    def _pods_on(self, node_name):
+        return self._requested[node_name].get("pods", 0) > 0
+
+    def attach(self, node_informer, pod_informer):
+        """Subscribe to informer events (replays their current stores)"""
+        self._node_informer = node_informer
+        self._pod_informer = pod_informer
+        node_informer.add_event_handler(
+            on_add=self.upsert_node,
+            on_update=lambda old, new: self.upsert_node(new),
+            on_delete=self.remove_node
+        )
+        pod_informer.add_event_handler(
+            on_add=self.upsert_pod,
+            on_update=lambda old, new: self.upsert_pod(new),
+            on_delete=self.remove_pod
+        )
+
+    def is_healthy(self):
+        return (
+            self._node_informer is not None and self._node_informer.is_healthy()
+            and self._pod_informer is not None and self._pod_informer.is_healthy()
+        )
+
+    ###########
+    ## Reads ##
+    ###########
+    def available(self, node_names=None):
+        """Aggregated available resources, same shape as KubeAPI.get_available_resources:
+        allocatable of online nodes (plus n_nodes) minus requests of running pods"""
+        available_resources = defaultdict(int)
+        with self._lock:
+            for name, (online, allocatable) in self._nodes.items():
+                if not online or (node_names is not None and name not in node_names):
+                    continue
+                available_resources["n_nodes"] += 1
+                for resource, amount in allocatable.items():
+                    available_resources[resource] += amount
+            for name, requested in self._requested.items():
+                if node_names is not None and name not in node_names:
+                    continue
+                for resource, amount in requested.items():
+                    if resource in available_resources:
+                        available_resources[resource] -= amount
+        return available_resources
+
+    def node_available(self, node_names=None):
+        """Available resources per node, same shape as KubeAPI.get_node_available_resources
+        (without gpus). Nodes that are not ready report no resources."""
+        available_resources = {}
+        with self._lock:
+            for name, (online, allocatable) in self._nodes.items():
+                if node_names is not None and name not in node_names:
+                    continue
+                node_resources = defaultdict(int)
+                if online:
+                    node_resources["n_nodes"] = 1
+                    requested = self._requested.get(name, {})
+                    for resource, amount in allocatable.items():
+                        node_resources[resource] = amount - requested.get(resource, 0)
+                available_resources[name] = node_resources
+        return available_resources
+
+    #################
+    ## Consistency ##
+    #################
+    def check_consistency(self, repair=True):
+        """Rebuild the ledger from the informer stores and compare with the incremental state.
+        Returns the entries that drifted as {node: {resource: ledger - recomputed}}."""
+        if not self.is_healthy():
+            return None
+        # lock order matches event dispatch: node store, pod store, ledger
+        with self._node_informer.frozen(), self._pod_informer.frozen():
+            fresh = ResourceLedger()
+            for node in self._node_informer.list():
+                fresh.upsert_node(node)
+            for pod in self._pod_informer.list():
+                fresh.upsert_pod(pod)
+            with self._lock:
+                drifted = self._diff(fresh)
+                self.drift["checks"] += 1
+                self.drift["last_check"] = time.time()
+                if drifted:
+                    n_entries = sum(len(resources) for resources in drifted.values())
+                    self.drift["drifted_checks"] += 1
+                    self.drift["drifted_entries"] += n_entries
+                    self.drift["max_abs_drift"] = max(
+                        [self.drift["max_abs_drift"]] + [abs(value) for resources in drifted.values() for value in resources.values()]
+                    )
+                    self.drift["last_drift"] = drifted
+                    logger.warning("Resource ledger drifted on %d entries: %s", n_entries, drifted)
+                    if repair:
+                        self._nodes = fresh._nodes
+                        self._requested = fresh._requested
+                        self._pods = fresh._pods
+        return drifted
+
+    def _diff(self, other):
+        drifted = defaultdict(dict)
+        for name in set(self._nodes) | set(other._nodes):
+            if self._nodes.get(name) != other._nodes.get(name):
+                drifted[name]["node"] = 1
+        for name in set(self._requested) | set(other._requested):
+            mine = self._requested.get(name, {})
+            theirs = other._requested.get(name, {})
+            for resource in set(mine) | set(theirs):
+                delta = mine.get(resource, 0) - theirs.get(resource, 0)
+                if abs(delta) > LEDGER_DRIFT_TOLERANCE:
+                    drifted[name][resource] = delta
+        return dict(drifted)
+
+    def start_consistency_checks(self, interval=LEDGER_CHECK_SECONDS):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_consistency()
+                except Exception as e:
+                    logger.warning("Resource ledger consistency check failed: %s", e)
+        self._thread = threading.Thread(target=_loop, name="ledger-check", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        with self._lock:
+            return {
+                "healthy": self.is_healthy(),
+                "nodes": len(self._nodes),
+                "running_pods": len(self._pods),
+                "drift": dict(self.drift)
+            }
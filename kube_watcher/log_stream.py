@@ -0,0 +1,183 @@
+"""
+Followed logs of several pods multiplexed into one response stream.
+
+Each pod's log is followed (follow=True) on its own thread and its lines are
+handed to the event loop through a bounded queue. When the client reads
+slower than the pods log, the queue fills up, the threads block and the
+apiserver streams are throttled by TCP; nothing accumulates in memory beyond
+the queue. The stream ends when every pod's log has ended, when the byte
+budget is spent or when the client disconnects, and all upstream streams are
+closed on the way out.
+
+Each followed pod holds a thread and a connection of the kubernetes client's
+pool for as long as its stream is open, so the number of pods followed by all
+streams together is capped (KW_LOG_STREAM_MAX_FOLLOWED_PODS); requests that
+would go over it are turned away rather than starving other kube calls.
+
+Lines are written as "[pod] line" text, or as server-sent events:
+
+    event: log
+    data: {"pod": "...", "line": "..."}
+"""
+import os
+import json
+import asyncio
+import logging
+import threading
+import concurrent.futures
+
+from kubernetes.watch.watch import iter_resp_lines
+
+
+LOG_STREAM_MAX_BYTES = int(os.getenv("KW_LOG_STREAM_MAX_BYTES", str(16 * 1024 ** 2)))
+LOG_STREAM_QUEUE_LINES = int(os.getenv("KW_LOG_STREAM_QUEUE_LINES", "1000"))
+LOG_STREAM_MAX_PODS = int(os.getenv("KW_LOG_STREAM_MAX_PODS", "64"))
+# pods followed by all open streams of the process
+LOG_STREAM_MAX_FOLLOWED_PODS = int(os.getenv("KW_LOG_STREAM_MAX_FOLLOWED_PODS", "64"))
+
+logger = logging.getLogger(__name__)
+
+
+class FollowLimit():
+    """Process-wide count of followed pods"""
+    def __init__(self, limit=LOG_STREAM_MAX_FOLLOWED_PODS):
+        self.limit = limit
+        self.followed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, pods):
+        """Reserve pods to follow; False if that would go over the limit"""
+        with self._lock:
+            if self.followed + pods > self.limit:
+                return False
+            self.followed += pods
+            return True
+
+    def release(self, pods):
+        with self._lock:
+            self.followed -= pods
+
+
+follow_limit = FollowLimit()
+
+
+class LogMultiplexer():
+    def __init__(self, core_api, pods, tail_lines=100, max_bytes=LOG_STREAM_MAX_BYTES, sse=False, queue_lines=LOG_STREAM_QUEUE_LINES, limit=None):
+        """
+        Args:
+            core_api: kubernetes CoreV1Api
+            pods (list): (namespace, pod name) pairs to follow
+            tail_lines (int): Lines of history to start each pod's log with
+            max_bytes (int): Bytes to send before the stream is ended
+            sse (bool): Write server-sent events instead of prefixed text lines
+            queue_lines (int): Lines buffered between the pod threads and the client
+            limit (FollowLimit): Limit the pods were acquired from; released on close()
+        """
+        self.core_api = core_api
+        self.pods = pods
+        self.tail_lines = tail_lines
+        self.max_bytes = max_bytes
+        self.sse = sse
+        self.queue_lines = queue_lines
+        self.media_type = "text/event-stream" if sse else "text/plain"
+
+        self.limit = limit
+
+        self._closed = threading.Event()
+        self._responses = []
+        self._lock = threading.Lock()
+
+    def _format(self, pod, line):
+        if self.sse:
+            return f"event: log\ndata: {json.dumps({'pod': pod, 'line': line})}\n\n".encode()
+        return f"[{pod}] {line}\n".encode()
+
+    def _event(self, event, data):
+        """Stream level event (SSE only), e.g. the end of a pod's log"""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+    def _put(self, loop, queue, item):
+        """Hand an item to the event loop, blocking while the queue is full (backpressure)"""
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while not self._closed.is_set():
+            try:
+                future.result(timeout=1)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def _follow(self, loop, queue, namespace, name):
+        response = None
+        try:
+            response = self.core_api.read_namespaced_pod_log(
+                name=name,
+                namespace=namespace,
+                follow=True,
+                tail_lines=self.tail_lines,
+                _preload_content=False
+            )
+            with self._lock:
+                self._responses.append(response)
+            if self._closed.is_set():
+                return
+            for line in iter_resp_lines(response):
+                if not self._put(loop, queue, (name, line)):
+                    return
+        except Exception as e:
+            if not self._closed.is_set():
+                logger.warning("Log stream of %s/%s failed: %s", namespace, name, e)
+                self._put(loop, queue, (name, f"error: {e}"))
+        finally:
+            if response is not None:
+                response.release_conn()
+            # end of this pod's log
+            self._put(loop, queue, (name, None))
+
+    def close(self):
+        """Stop following: unblock the pod threads, close the upstream streams and
+        give the pods back to the limit. Safe to call more than once."""
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            if self.limit is not None:
+                self.limit.release(len(self.pods))
+            for response in self._responses:
+                try:
+                    response.close()
+                except Exception:
+                    pass
+
+    async def stream(self):
+        """Multiplexed log lines as bytes chunks"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_lines)
+        for namespace, name in self.pods:
+            threading.Thread(
+                target=self._follow,
+                args=(loop, queue, namespace, name),
+                name=f"log-{name}",
+                daemon=True
+            ).start()
+
+        sent = 0
+        following = len(self.pods)
+        try:
+            while following:
+                pod, line = await queue.get()
+                if line is None:
+                    following -= 1
+                    if self.sse:
+                        yield self._event("end", {"pod": pod})
+                    continue
+                chunk = self._format(pod, line)
+                if sent + len(chunk) > self.max_bytes:
+                    message = f"log stream truncated after {sent} bytes"
+                    yield self._event("truncated", {"message": message}) if self.sse else f"[kube-watcher] {message}\n".encode()
+                    return
+                sent += len(chunk)
+                yield chunk
+        finally:
+            self.close()
@@ -130,6 +130,8 @@ class HelmRepo(BaseModel):
 class GenericDeploymentRequest(BaseModel):
     config: str
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
+    server_side_apply: bool = Field(False, description="Create or update the objects with server-side apply, so redeploying an existing job updates it")
+    force_conflicts: bool = Field(False, description="With server_side_apply, take over fields managed by others instead of reporting conflicts")
 
 class UserWorkspaceRequest(BaseModel):
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
@@ -155,6 +157,8 @@ class DeleteLabelledResourcesRequest(BaseModel):
     label: str
     value: Optional[Union[str, None]] = Field(None, description="Optional value to match label")
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
+    propagation_policy: Optional[Literal["Background", "Foreground", "Orphan"]] = Field(None, description="How dependents are deleted; Background unless the server is configured otherwise")
+    run_async: bool = Field(False, description="Return an operation id straight away instead of waiting for the deletion")
 
 class GetJobsOverviewRequest(BaseModel):
     labels: List[str]
@@ -164,7 +168,15 @@ class GetLabelledResourcesRequest(BaseModel):
     labels: Dict[str, Union[str, None]]
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
     tail_lines: int = 100
+    include_events: bool = Field(False, description="Include recent pod events (job details only)")
     
+class StreamLogsRequest(BaseModel):
+    labels: Dict[str, Union[str, None]]
+    force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
+    tail_lines: int = 100
+    format: Literal["text", "sse"] = Field("text", description="Prefixed text lines or server-sent events")
+    max_bytes: Optional[int] = Field(None, description="Bytes to send before the stream is ended (capped by the server limit)")
+
 class UserRequest(BaseModel):
     email: str
     password: str
@@ -182,7 +194,9 @@ class TemplateDeploymentRequest(BaseModel):
     priority: Literal["kalavai-system-priority", "user-high-priority", "user-spot-priority", "test-low-priority", "test-high-priority"] = "user-spot-priority"
     resources: Optional[Union[None, dict]] = Field(None, description="Optional resources to override template values")
     is_update: Optional[bool] = Field(False, description="If True, update existing deployment")
-    random_suffix: Optional[bool] = Field(True, description="If True, add a random suffix to the job name")
+    random_suffix: Optional[bool] = Field(True, description="If True, add a random suffix to the job name (ignored with server_side_apply)")
+    server_side_apply: bool = Field(False, description="Create or update the objects with server-side apply, so redeploying an existing job updates it. Job names are used as given (no random suffix)")
+    force_conflicts: bool = Field(False, description="With server_side_apply, take over fields managed by others instead of reporting conflicts")
 
 class TemplateUpdateRequest(BaseModel):
     name: str
@@ -203,6 +217,9 @@ class JobTemplateRequest(BaseModel):
     replicas: int = 1
     random_suffix: bool = True
     priority: Literal["kalavai-system-priority", "user-high-priority", "user-spot-priority", "test-low-priority", "test-high-priority"] = "user-spot-priority"
+    server_side_apply: bool = Field(False, description="Create or update the objects with server-side apply, so redeploying an existing job updates it. Job names are used as given (no random suffix)")
+    force_conflicts: bool = Field(False, description="With server_side_apply, take over fields managed by others instead of reporting conflicts")
+    rollback_on_failure: bool = Field(False, description="If any replica fails to deploy, delete what was created for every replica")
 
 class CustomJobTemplateRequest(BaseModel):
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
@@ -214,6 +231,9 @@ class CustomJobTemplateRequest(BaseModel):
     replicas: int = 1
     random_suffix: bool = True
     priority: Literal["kalavai-system-priority", "user-high-priority", "user-spot-priority", "test-low-priority", "test-high-priority"] = "user-spot-priority"
+    server_side_apply: bool = Field(False, description="Create or update the objects with server-side apply, so redeploying an existing job updates it. Job names are used as given (no random suffix)")
+    force_conflicts: bool = Field(False, description="With server_side_apply, take over fields managed by others instead of reporting conflicts")
+    rollback_on_failure: bool = Field(False, description="If any replica fails to deploy, delete what was created for every replica")
 
 
 class NodeLabelsRequest(BaseModel):
@@ -236,9 +256,11 @@ class UserDataRequest(BaseModel):
         data (Dict[str, str]): Dictionary of data (key-value pairs)
         encrypted (bool): Whether to create a Secret (True) or ConfigMap (False)
         force_namespace (Optional[str]): Optional namespace override
+        force_conflicts (bool): Take over keys managed by others instead of reporting conflicts
     """
     name: str
-    data: Optional[Union[None, Dict[str, str]]] = None
+    data: Optional[Union[None, Dict[str, str]]] = Field(None, description="Full data of the resource: keys written by a previous update and left out are removed")
     encrypted: bool = Field(True, description="Whether to create a Secret (True) or ConfigMap (False)")
     force_namespace: Optional[Union[str, None]] = Field(None, description="Optional namespace override")
+    force_conflicts: bool = Field(False, description="Take over keys managed by others (e.g. set with kubectl) instead of reporting conflicts")
      
\ No newline at end of file
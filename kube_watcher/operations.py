@@ -0,0 +1,98 @@
+"""
+Long running operations started by an endpoint that returns immediately.
+
+The endpoint registers the operation, gets back its id for the client and the
+work runs as a task on the event loop (usually awaiting the executor). Clients
+poll the operation's status; finished operations are kept for
+KW_OPERATION_TTL_SECONDS.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+
+
+OPERATION_TTL_SECONDS = float(os.getenv("KW_OPERATION_TTL_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+
+class Operation():
+    def __init__(self, kind, namespace=None, details=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.namespace = namespace
+        self.details = details or {}
+        self.state = "running"
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def update(self, key, value):
+        """Record progress; safe to call from worker threads"""
+        self.progress[key] = value
+
+    def status(self):
+        return {
+            "operation_id": self.id,
+            "kind": self.kind,
+            "namespace": self.namespace,
+            "details": self.details,
+            "state": self.state,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class OperationRegistry():
+    def __init__(self, ttl=OPERATION_TTL_SECONDS):
+        self.ttl = ttl
+        self._operations = {}
+        self._tasks = set()
+
+    def start(self, kind, run, namespace=None, details=None):
+        """Register an operation and run it in the background.
+
+        Args:
+            kind (str): Operation name (e.g. the endpoint)
+            run: Coroutine function called with the Operation, returning its result
+            namespace (str): Namespace the operation acts on, for access checks
+            details (dict): Request details reported with the status
+        """
+        self._purge()
+        operation = Operation(kind=kind, namespace=namespace, details=details)
+        self._operations[operation.id] = operation
+        task = asyncio.create_task(self._run(operation, run))
+        # keep a reference until done, the loop only holds weak ones
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return operation
+
+    async def _run(self, operation, run):
+        try:
+            operation.result = await run(operation)
+            operation.state = "succeeded"
+        except Exception as e:
+            logger.warning("Operation %s (%s) failed: %s", operation.id, operation.kind, e)
+            operation.error = str(e)
+            operation.state = "failed"
+        finally:
+            operation.finished_at = time.time()
+
+    def get(self, operation_id):
+        self._purge()
+        return self._operations.get(operation_id)
+
+    def _purge(self):
+        now = time.time()
+        for operation_id in [
+            operation_id for operation_id, operation in self._operations.items()
+            if operation.finished_at is not None and operation.finished_at + self.ttl <= now
+        ]:
+            del self._operations[operation_id]
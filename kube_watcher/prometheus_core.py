@@ -12,9 +12,11 @@ PROMETHEUS QUERIES:
 - List pods in a specific node: kube_pod_info{node="carlosfm-desktop-1"}
 
 """
+import os
 import time
 import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.parser import parse as parse_datetime
 import math
 
@@ -22,10 +24,16 @@ from prometheus_api_client import PrometheusConnect, MetricRangeDataFrame
 from prometheus_api_client.utils import parse_datetime
 import pandas as pd
 
+from kube_watcher import sessions
+from kube_watcher.promql import plan_node_filters, merge_series
+
 
 logger = logging.getLogger("prometheus_api")
 logging.basicConfig(level=logging.INFO)
 
+# range queries of one batch sent to Prometheus at the same time
+PROMETHEUS_QUERY_PARALLELISM = int(os.getenv("KW_PROMETHEUS_QUERY_PARALLELISM", "4"))
+
 
 def safe_prometheus_to_df(result):
     # Prometheus API returns [] if no data matches
@@ -39,13 +47,90 @@ def safe_prometheus_to_df(result):
 
 
 class PrometheusAPI():
-    def __init__(self, url, **kwargs):
+    def __init__(self, url, disable_ssl=False, **kwargs):
       self.url = url
-      self.prom = PrometheusConnect(url=url, headers={"X-Scope-OrgID": "anonymous"}, **kwargs)
+      self.prom = PrometheusConnect(url=url, headers={"X-Scope-OrgID": "anonymous"}, disable_ssl=disable_ssl, **kwargs)
+      # requests go through the process-wide pooled session (passing it as session= would
+      # mount a pool-less adapter of prometheus_api_client on it)
+      self.prom._session = sessions.session("prometheus", verify=not disable_ssl)
 
     def query(self, query):
         return self.prom.custom_query(query=query)
 
+    def query_range_batch(self, queries, start_time, end_time, step, parallelism=PROMETHEUS_QUERY_PARALLELISM, timings=None):
+        """Run independent range queries concurrently; returns once all of them have.
+
+        Args:
+            queries (dict): name -> PromQL
+            start_time, end_time (datetime): Query range
+            step (str): Step of the range queries (e.g. '1h', '300s')
+            parallelism (int): Queries in flight at the same time
+            timings (dict): Optional dict filled with name -> seconds taken by each query
+
+        Returns:
+            dict: name -> result of custom_query_range. The first failure is raised
+            once every query has finished.
+        """
+        def run(item):
+            name, query = item
+            t = time.time()
+            try:
+                return name, self.prom.custom_query_range(
+                    query=query,
+                    start_time=start_time,
+                    end_time=end_time,
+                    step=step
+                ), None
+            except Exception as e:
+                return name, None, e
+            finally:
+                elapsed = time.time() - t
+                if timings is not None:
+                    timings[name] = elapsed
+                logger.debug(f"{name} query: {query}")
+                logger.info(f"{name} query took {elapsed} seconds")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(queries)))) as pool:
+            results = list(pool.map(run, queries.items()))
+        for _, _, error in results:
+            if error is not None:
+                raise error
+        return {name: metric for name, metric, _ in results}
+
+    def query_range_nodes(self, queries, node_filters, start_time, end_time, step, timings=None):
+        """Run queries once per node filter (see promql.plan_node_filters), all of them
+        concurrently, and merge the results of each query across filters.
+
+        Args:
+            queries (dict): name -> fn(NodeFilter) building the query's PromQL
+            node_filters (list): NodeFilter of each chunk of nodes
+            start_time, end_time (datetime): Query range
+            step (str): Step of the range queries
+            timings (dict): Optional dict filled with the seconds taken by each query
+                (name, or name_<chunk> when there are several filters)
+
+        Returns:
+            dict: name -> merged result
+        """
+        def key(name, index):
+            return name if len(node_filters) == 1 else f"{name}_{index}"
+
+        results = self.query_range_batch(
+            queries={
+                key(name, index): build(node_filter)
+                for name, build in queries.items()
+                for index, node_filter in enumerate(node_filters)
+            },
+            start_time=start_time,
+            end_time=end_time,
+            step=step,
+            timings=timings
+        )
+        return {
+            name: merge_series([results[key(name, index)] for index in range(len(node_filters))])
+            for name in queries
+        }
+
     def get_nodes_stats(
         self,
         node_ids,
@@ -55,7 +140,9 @@ class PrometheusAPI():
         step="1h",
         phase="Running",
         aggregate_node_results=False,
-        namespaces=None
+        namespaces=None,
+        timings=None,
+        node_labels=None
     ):
         """
         Retrieves both node status (Ready condition) and comprehensive resource metrics 
@@ -69,6 +156,8 @@ class PrometheusAPI():
         :param phase: Pod phase to filter (default "Running").
         :param aggregate_node_results: If True, aggregates the node status result into a single sum.
         :param namespaces: List of namespaces to filter workloads by (default None for all namespaces).
+        :param timings: Optional dict filled with the seconds taken by each query (node_status, capacity, used).
+        :param node_labels: Node labels matched through kube_node_labels instead of node_ids.
         :return: Dictionary containing the merged time series data with fields:
                  - node_status_ready: Node readiness status over time
                  - total_resources: Total allocatable resources in the cluster
@@ -80,84 +169,72 @@ class PrometheusAPI():
             # 1. Prepare time and query arguments
             start_time_dt = parse_datetime(start_time)
             end_time_dt = parse_datetime(end_time)
+            # one filter, or one per chunk of node names when the list is long
+            node_filters = plan_node_filters(names=node_ids, labels=node_labels)
 
             # --- 2. Node Status Query ---
-            node_str = "|".join(node_ids)
-            node_status_query = f"""
-            avg_over_time(
-                kube_node_status_condition{{condition="Ready", status="true", node=~"{node_str}"}}
-                [{step}]
-            )
-            """
-            if aggregate_node_results:
-                node_status_query = f"sum({node_status_query})"
-                
-            # Execute Node Status Query
-            t = time.time()
-            node_metric = self.prom.custom_query_range(
-                query=node_status_query,
-                start_time=start_time_dt,
-                end_time=end_time_dt,
-                step=step
-            )
-            logger.debug(f"Node status query: {node_status_query}")
-            logger.info(f"Node status query took {time.time() - t} seconds")
-            # Convert to DataFrame
-            node_df = safe_prometheus_to_df(node_metric)
+            def node_status_query(nodes):
+                query = nodes.restrict(f"""
+                avg_over_time(
+                    kube_node_status_condition{nodes.selector('condition="Ready"', 'status="true"')}
+                    [{step}]
+                )
+                """)
+                return f"sum({query})" if aggregate_node_results else query
 
             # --- 3. Resource Capacity and Utilization Queries ---
             resources_str = "|".join(resources)
+            resource_matcher = f'resource=~"{resources_str}"'
             
             # 3a. Total resource capacity (what the cluster has)
-            capacity_query = f"""
-            sum(
-                kube_node_status_allocatable{{resource=~"{resources_str}", node=~"{node_str}"}}
-            )
-            """
-
-            # Execute Resource Capacity Query
-            t = time.time()
-            capacity_metric = self.prom.custom_query_range(
-                query=capacity_query,
-                start_time=start_time_dt,
-                end_time=end_time_dt,
-                step=step
-            )
-            logger.debug(f"Capacity query: {capacity_query}")
-            logger.info(f"Capacity query took {time.time() - t} seconds")
-            capacity_df = safe_prometheus_to_df(capacity_metric)
+            def capacity_query(nodes):
+                allocatable = f"kube_node_status_allocatable{nodes.selector(resource_matcher)}"
+                return f"""
+                sum(
+                    {nodes.restrict(allocatable)}
+                )
+                """
 
-            # Execute Resource Used Query
             # 3b. Used resources (what's currently requested by running pods)
             # Note: I've added phase="Running" to the kube_pod_status_phase selector 
             # as it's common to only look at resources requested by running pods. 
             # You may adjust this phase if needed (e.g., to "").
             
             # Build namespace filter if specified
-            namespace_filter = ""
+            request_matchers = [resource_matcher]
             if namespaces:
                 namespaces_str = "|".join(namespaces)
-                namespace_filter = f',namespace=~"{namespaces_str}"'
-            
-            used_query = f"""
-            sum(
-                max by (namespace, pod) (
-                    kube_pod_container_resource_requests{{resource=~"{resources_str}", node=~"{node_str}"{namespace_filter}}}
+                request_matchers.append(f'namespace=~"{namespaces_str}"')
+
+            def used_query(nodes):
+                requests = f"kube_pod_container_resource_requests{nodes.selector(*request_matchers)}"
+                return f"""
+                sum(
+                    max by (namespace, pod) (
+                        {nodes.restrict(requests)}
+                    )
+                    * on(namespace, pod) group_left()
+                    (max by (namespace, pod) (kube_pod_status_phase{{phase="{phase}"}} == 1))
                 )
-                * on(namespace, pod) group_left()
-                (max by (namespace, pod) (kube_pod_status_phase{{phase="{phase}"}} == 1))
-            )
-            """
-            t = time.time()
-            used_metric = self.prom.custom_query_range(
-                query=used_query,
+                """
+
+            # Execute the independent queries (of every chunk of nodes) concurrently
+            metrics = self.query_range_nodes(
+                queries={
+                    "node_status": node_status_query,
+                    "capacity": capacity_query,
+                    "used": used_query
+                },
+                node_filters=node_filters,
                 start_time=start_time_dt,
                 end_time=end_time_dt,
-                step=step
+                step=step,
+                timings=timings
             )
-            logger.debug(f"Used query: {used_query}")
-            logger.info(f"Used query took {time.time() - t} seconds")
-            used_df = safe_prometheus_to_df(used_metric)
+            # Convert to DataFrames
+            node_df = safe_prometheus_to_df(metrics["node_status"])
+            capacity_df = safe_prometheus_to_df(metrics["capacity"])
+            used_df = safe_prometheus_to_df(metrics["used"])
 
             # --- 4. Merge DataFrames ---
             # All DataFrames share the 'index' (which is the timestamp).
@@ -257,6 +334,7 @@ class PrometheusAPI():
         namespaces=None,
         node_ids=None,
         pod_labels=None,
+        node_labels=None,
     ):
         """
         Collapse a Prometheus range query into resource-hours for selected pods.
@@ -270,6 +348,8 @@ class PrometheusAPI():
             namespaces: list[str] of namespaces to include
             node_ids: list[str] of node names to include
             pod_labels: dict[str, str] of label key=value pairs to filter pods
+            node_labels: dict[str, str] of node labels matched through kube_node_labels
+                instead of node_ids
         Returns:
             dict[resource] -> hours (total) or average (per hour)
         """
@@ -315,38 +395,36 @@ class PrometheusAPI():
             resource_selector = ",".join(filters)
             base = f'kube_pod_container_resource_requests{{{resource_selector}}}'
 
-            # Node filtering (requires join with kube_pod_info)
-            # kube_pod_info exposes pod->node mapping
-            if node_ids:
-                nodes_str = "|".join(node_ids)
-                node_filter = f'node=~"{nodes_str}"'
-                # Use max() to deduplicate kube_pod_info entries for the same pod
-                pod_info = f'max by (namespace, pod, node) (kube_pod_info{{{node_filter}}})'
-                # Join the resource requests with pod_info to limit to selected nodes
-                left_expr = f'({base}) * on(namespace, pod) group_left(node) ({pod_info})'
-            else:
-                left_expr = base
-
             # Filter to only Running pods
             # Use max() to deduplicate kube_pod_status_phase entries from multiple kube-state-metrics instances
             running = f'max by (namespace, pod) (kube_pod_status_phase{{phase="{phase}"}} == 1)'
 
-            query = f"""
-            max by (namespace, pod, resource) (
-                {left_expr}
-            )
-            * on(namespace, pod) group_left()
-            {running}
-            """
-            t = time.time()
-            logger.debug(f"Full query: {query}")
-            metric = self.prom.custom_query_range(
-                query=query,
+            def usage_query(nodes):
+                # Node filtering (requires join with kube_pod_info)
+                # kube_pod_info exposes pod->node mapping
+                if nodes.names is None and not nodes.labels:
+                    left_expr = base
+                else:
+                    # Use max() to deduplicate kube_pod_info entries for the same pod
+                    pod_info = nodes.restrict(f'max by (namespace, pod, node) (kube_pod_info{nodes.selector()})')
+                    # Join the resource requests with pod_info to limit to selected nodes
+                    left_expr = f'({base}) * on(namespace, pod) group_left(node) ({pod_info})'
+                return f"""
+                max by (namespace, pod, resource) (
+                    {left_expr}
+                )
+                * on(namespace, pod) group_left()
+                {running}
+                """
+
+            # long node lists are queried in chunks, concurrently
+            metric = self.query_range_nodes(
+                queries={"usage": usage_query},
+                node_filters=plan_node_filters(names=node_ids or None, labels=node_labels),
                 start_time=start_time,
                 end_time=end_time,
-                step=f"{step_seconds}s",
-            )
-            logger.info(f"Node filter Query took {time.time() - t} seconds")
+                step=f"{step_seconds}s"
+            )["usage"]
             
             resource_hours = {resource: 0.0 for resource in resources}
 
@@ -0,0 +1,101 @@
+"""
+Planning of the node filter of PromQL queries.
+
+Restricting a query to a set of nodes with node=~"n1|n2|...|nN" grows the
+query (and the regex Prometheus matches against every series) with the pool.
+The planner picks one of two constant-size forms instead:
+
+- nodes given by labels are matched with a join against kube_node_labels
+  (`<vector> and on(node) kube_node_labels{label_<key>="<value>"}`).
+  kube-state-metrics only exports the node labels allowed by its
+  --metric-labels-allowlist, so the API only does this when
+  KW_PROMQL_NODE_LABEL_JOIN is set (and resolves labels to names otherwise).
+  The join is evaluated at every step: nodes count while they carried the labels.
+- explicit node names are split into chunks of KW_PROMQL_NODE_CHUNK_SIZE,
+  one query per chunk. Chunks are run concurrently and their results summed
+  series by series (merge_series), which is exact for queries whose series
+  are per node or sums over nodes.
+"""
+import os
+
+
+NODE_CHUNK_SIZE = int(os.getenv("KW_PROMQL_NODE_CHUNK_SIZE", "20"))
+NODE_LABEL_JOIN = os.getenv("KW_PROMQL_NODE_LABEL_JOIN", "False").lower() in ("true", "1", "t", "yes")
+
+REGEX_METACHARACTERS = set(".^$*+?()[]{}|\\")
+
+
+def quote_regex(values):
+    """Alternation matching exactly the given values, escaped for a PromQL string"""
+    escaped = ("".join(f"\\{char}" if char in REGEX_METACHARACTERS else char for char in value) for value in values)
+    # the PromQL string literal needs its own escaping of the backslashes
+    return "|".join(escaped).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def label_name(key):
+    """Name of a kubernetes label in kube_node_labels (e.g. kalavai.node/gpu -> label_kalavai_node_gpu)"""
+    return "label_" + "".join(char if char.isalnum() or char == "_" else "_" for char in key)
+
+
+class NodeFilter():
+    """Restriction of a query to some nodes: names matched in the selectors, or labels joined on"""
+    def __init__(self, names=None, labels=None):
+        self.names = names
+        self.labels = labels
+
+    @property
+    def matchers(self):
+        return [] if self.names is None else [f'node=~"{quote_regex(self.names)}"']
+
+    def selector(self, *matchers):
+        """{matchers} of a series selector, node matcher included"""
+        return "{" + ", ".join([*matchers, *self.matchers]) + "}"
+
+    def restrict(self, vector):
+        """Vector limited to the labelled nodes (unchanged when filtering by name)"""
+        if not self.labels:
+            return vector
+        labels = ", ".join(f'{label_name(key)}="{value}"' for key, value in self.labels.items())
+        return f"({vector}) and on(node) kube_node_labels{{{labels}}}"
+
+
+def plan_node_filters(names=None, labels=None, chunk_size=NODE_CHUNK_SIZE):
+    """Node filters of the queries to run (their results are merged with merge_series)
+
+    Args:
+        names (list): Node names, or None for every node
+        labels (dict): Node labels, joined against kube_node_labels (names are then ignored)
+        chunk_size (int): Names per query
+    """
+    if labels:
+        return [NodeFilter(labels=labels)]
+    if names is None:
+        return [NodeFilter()]
+    if len(names) <= chunk_size:
+        return [NodeFilter(names=names)]
+    return [NodeFilter(names=names[i:i + chunk_size]) for i in range(0, len(names), chunk_size)]
+
+
+def merge_series(results):
+    """Sum range query results sample by sample, matching series by their labels"""
+    if len(results) == 1:
+        return results[0]
+    grouped = {}
+    for result in results:
+        for series in result:
+            grouped.setdefault(tuple(sorted(series["metric"].items())), []).append(series)
+    merged = []
+    for group in grouped.values():
+        # per node series come from a single chunk: only sums need adding up
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        values = {}
+        for series in group:
+            for timestamp, value in series.get("values") or []:
+                values[timestamp] = values.get(timestamp, 0.0) + float(value)
+        merged.append({
+            "metric": group[0]["metric"],
+            "values": [[timestamp, str(value)] for timestamp, value in sorted(values.items())]
+        })
+    return merged
@@ -0,0 +1,305 @@
+"""
+Raw JSON reads from the kubernetes API.
+
+Typed reads build a client model for every field of every object and are then
+turned back into dicts (to_dict / force_serialisation). Raw reads skip both:
+the response body is parsed straight into dicts (with orjson when installed)
+and callers keep only the fields they need through a declarative projection:
+
+    PORT = {"name": "name", "node_port": "nodePort", "target_port": "targetPort"}
+    SERVICE = {
+        "name": "metadata.name",
+        "type": "spec.type",
+        "ports": Each("spec.ports", PORT)
+    }
+    services = [project(item, SERVICE) for item in read_items(core_api.list_namespaced_service, namespace)]
+
+Where the whole object is returned to clients, snake_case_keys gives it the
+same key names as the typed model's to_dict().
+
+Large lists (all pods of a cluster) are read page by page with iter_items,
+which yields one item at a time and keeps at most one page in memory (with
+ijson installed, not even that: each page is parsed as it streams in).
+
+Queries that only need names and labels use list_metadata, which asks the
+apiserver for PartialObjectMetadata instead of full objects (no node status,
+no secret data, no pod specs).
+"""
+import os
+import re
+import json
+import time
+import logging
+import functools
+
+from prometheus_client import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = int(os.getenv("KW_LIST_PAGE_SIZE", "500"))
+
+LIST_BYTES = Counter(
+    "kube_watcher_list_bytes",
+    "Bytes of list responses read through list_metadata",
+    ["resource", "representation"]
+)
+
+
+def loads(data):
+    """Parse a JSON document (bytes or str), using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read(api_call, *args, **kwargs):
+    """Call a kubernetes client method and return its response body as plain dicts"""
+    response = api_call(*args, _preload_content=False, **kwargs)
+    return loads(response.data)
+
+
+def read_items(api_call, *args, **kwargs):
+    """Items of a list call as plain dicts"""
+    return read(api_call, *args, **kwargs).get("items") or []
+
+
+def iter_items(api_call, *args, page_size=None, **kwargs):
+    """Items of a list call as plain dicts, one at a time, requesting pages of
+    page_size items (KW_LIST_PAGE_SIZE) with limit/continue"""
+    page_size = page_size or LIST_PAGE_SIZE
+    token = None
+    while True:
+        if token:
+            kwargs["_continue"] = token
+        response = api_call(*args, limit=page_size, _preload_content=False, **kwargs)
+        try:
+            if ijson is not None:
+                page = _StreamedPage(response)
+                yield from page
+                token = page.token
+            else:
+                body = loads(response.data)
+                token = body.get("metadata", {}).get("continue")
+                items = body.pop("items", None) or []
+                del body
+                # drop references as items are consumed so the page is freed progressively
+                items.reverse()
+                while items:
+                    yield items.pop()
+        finally:
+            response.release_conn()
+        if not token:
+            return
+
+
+class _StreamedPage():
+    """Items of a list response parsed incrementally with ijson. The apiserver
+    writes the list metadata before the items, so the continue token is picked
+    from the head of the stream as it is read."""
+    _CONTINUE = re.compile(rb'"continue"\s*:\s*"([^"]*)"')
+
+    def __init__(self, response):
+        self.response = response
+        self.head = b""
+        self.token = None
+
+    def read(self, size=-1):
+        chunk = self.response.read(size)
+        if self.head is not None:
+            self.head += chunk
+            end = self.head.find(b'"items"')
+            if end >= 0 or (not chunk and size != 0):
+                match = self._CONTINUE.search(self.head, 0, end if end >= 0 else len(self.head))
+                self.token = match.group(1).decode() if match else None
+                self.head = None
+        return chunk
+
+    def __iter__(self):
+        return ijson.items(self, "items.item", use_float=True)
+
+
+#########################
+## Metadata-only lists ##
+#########################
+# plain JSON stays acceptable for servers (or aggregated APIs) without metadata-only support
+METADATA_ACCEPT = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+# resource -> (api prefix, plural, namespaced)
+RESOURCE_PATHS = {
+    "node": ("/api/v1", "nodes", False),
+    "namespace": ("/api/v1", "namespaces", False),
+    "pod": ("/api/v1", "pods", True),
+    "service": ("/api/v1", "services", True),
+    "secret": ("/api/v1", "secrets", True),
+    "configmap": ("/api/v1", "configmaps", True),
+    "persistentvolumeclaim": ("/api/v1", "persistentvolumeclaims", True),
+    "daemonset": ("/apis/apps/v1", "daemonsets", True),
+    "deployment": ("/apis/apps/v1", "deployments", True),
+    "replicaset": ("/apis/apps/v1", "replicasets", True),
+    "statefulset": ("/apis/apps/v1", "statefulsets", True),
+    "batchjob": ("/apis/batch/v1", "jobs", True),
+    "ingress": ("/apis/networking.k8s.io/v1", "ingresses", True),
+    "leaderworkerset": ("/apis/leaderworkerset.x-k8s.io/v1", "leaderworkersets", True),
+    "raycluster": ("/apis/ray.io/v1", "rayclusters", True),
+    "rayservice": ("/apis/ray.io/v1", "rayservices", True),
+    "helmrelease": ("/apis/helm.toolkit.fluxcd.io/v2", "helmreleases", True),
+    "vcjob": ("/apis/batch.volcano.sh/v1alpha1", "jobs", True),
+    "kalavaijob": ("/apis/kalavai.net/v1", "kalavaijobs", True),
+    "middleware": ("/apis/traefik.io/v1alpha1", "middlewares", True)
+}
+
+
+def resource_path(resource, namespace=None):
+    """REST path listing a resource, cluster-wide when namespace is None"""
+    prefix, plural, namespaced = RESOURCE_PATHS[resource]
+    if namespaced and namespace is not None:
+        return f"{prefix}/namespaces/{namespace}/{plural}"
+    return f"{prefix}/{plural}"
+
+
+def list_metadata(api_client, resource, namespace=None, label_selector=None, field_selector=None):
+    """Objects of a resource reduced to {"metadata": {...}}, listed as PartialObjectMetadata.
+    Servers that ignore the metadata-only Accept header return full objects, which
+    are reduced to their metadata here.
+
+    Args:
+        api_client: kubernetes ApiClient (e.g. CoreV1Api().api_client)
+        resource (str): Key of RESOURCE_PATHS
+        namespace (str): Optional namespace, cluster-wide list otherwise
+        label_selector (str): Optional label selector
+        field_selector (str): Optional field selector
+    """
+    query_params = []
+    if label_selector:
+        query_params.append(("labelSelector", label_selector))
+    if field_selector:
+        query_params.append(("fieldSelector", field_selector))
+    response = api_client.call_api(
+        resource_path(resource, namespace),
+        "GET",
+        query_params=query_params,
+        header_params={"Accept": METADATA_ACCEPT},
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
+        _preload_content=False
+    )
+    t = time.perf_counter()
+    data = response.data
+    body = loads(data)
+    representation = "metadata" if body.get("kind") == "PartialObjectMetadataList" else "full"
+    items = [{"metadata": item.get("metadata", {})} for item in body.get("items") or []]
+    LIST_BYTES.labels(resource=resource, representation=representation).inc(len(data))
+    logger.debug(
+        "Listed %d %s (%s): %d bytes, parsed in %.1f ms",
+        len(items), resource, representation, len(data), (time.perf_counter() - t) * 1000
+    )
+    return items
+
+
+################
+## Projection ##
+################
+class Each():
+    """Project every element of the list found at path with a sub-projection"""
+    def __init__(self, path, projection):
+        self.path = path
+        self.projection = projection
+
+
+class Apply():
+    """Value at path passed through fn (fn receives None when the path is missing)"""
+    def __init__(self, path, fn):
+        self.path = path
+        self.fn = fn
+
+
+@functools.lru_cache(maxsize=None)
+def _split(path):
+    return tuple(path.split("."))
+
+
+def get_path(obj, path):
+    """Value at a dotted path (e.g. "spec.nodeName"), None if any step is missing"""
+    for key in _split(path):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+        if obj is None:
+            return None
+    return obj
+
+
+def project(obj, projection):
+    """Build a dict from obj following projection: {output key: spec}, where spec is
+    - a dotted path into obj (missing fields are None, as in to_dict())
+    - a nested projection dict
+    - Each(path, projection) for lists of objects
+    - Apply(path, fn) to post-process a value
+    """
+    result = {}
+    for key, spec in projection.items():
+        if isinstance(spec, str):
+            result[key] = get_path(obj, spec)
+        elif isinstance(spec, dict):
+            result[key] = project(obj, spec)
+        elif isinstance(spec, Each):
+            items = get_path(obj, spec.path)
+            result[key] = None if items is None else [project(item, spec.projection) for item in items]
+        elif isinstance(spec, Apply):
+            result[key] = spec.fn(get_path(obj, spec.path))
+        else:
+            raise ValueError(f"Unsupported projection for {key}: {spec}")
+    return result
+
+
+################
+## Key casing ##
+################
+# fields whose values are user maps: their keys are data, not attribute names
+MAP_FIELDS = {
+    "labels", "annotations", "nodeSelector", "data", "binaryData", "stringData",
+    "limits", "requests", "capacity", "allocatable", "matchLabels", "hard", "used",
+    "fieldsV1", "volumeAttributes", "parameters", "allocatedResources"
+}
+
+_FIRST_CAP = re.compile(r"(.)([A-Z][a-z]+)")
+_ALL_CAP = re.compile(r"([a-z0-9])([A-Z])")
+
+
+@functools.lru_cache(maxsize=4096)
+def to_snake_case(key):
+    """camelCase attribute name to the client's snake_case name (podIP -> pod_ip)"""
+    return _ALL_CAP.sub(r"\1_\2", _FIRST_CAP.sub(r"\1_\2", key)).lower()
+
+
+def snake_case_keys(obj):
+    """Recursively rename keys of a raw object to match the typed model's to_dict().
+    Keys inside map fields (labels, annotations, resources...) are left untouched.
+    Unlike to_dict(), fields that are not set are absent rather than None."""
+    if isinstance(obj, list):
+        return [snake_case_keys(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    converted = {}
+    for key, value in obj.items():
+        if key in MAP_FIELDS or (key == "selector" and _is_label_map(value)):
+            converted[to_snake_case(key)] = value
+        else:
+            converted[to_snake_case(key)] = snake_case_keys(value)
+    return converted
+
+
+def _is_label_map(value):
+    # service selectors are plain label maps, workload selectors are LabelSelector objects
+    return isinstance(value, dict) and "matchLabels" not in value and "matchExpressions" not in value
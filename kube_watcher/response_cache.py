@@ -0,0 +1,172 @@
+"""
+TTL cache of encoded responses for endpoints that clients poll.
+
+Entries are keyed by endpoint, request body and the caller's namespace scope,
+and live for a per-endpoint TTL. Each entry carries an ETag: when every source
+behind an endpoint can report a version (the informers' store resourceVersions,
+the time of the last GPU scrape) the ETag is derived from those versions, so a
+client sending If-None-Match gets a 304 without the response being computed at
+all. Otherwise the ETag is a hash of the encoded body.
+
+Writes through the API's own mutating endpoints call invalidate(), which drops
+every entry and changes every version-derived ETag.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+from prometheus_client import Counter
+
+
+USE_RESPONSE_CACHE = not os.getenv("KW_RESPONSE_CACHE", "True").lower() in ("false", "0", "f", "no")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("KW_RESPONSE_CACHE_TTL_SECONDS", "5"))
+# expired entries are dropped once the cache holds more than this
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("KW_RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+# per endpoint overrides, e.g. "fetch_nodes=10,get_jobs_overview=2"
+RESPONSE_CACHE_TTLS = {
+    endpoint.strip(): float(ttl)
+    for endpoint, ttl in (
+        item.split("=", 1) for item in os.getenv("KW_RESPONSE_CACHE_TTLS", "").split(",") if "=" in item
+    )
+}
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "kube_watcher_response_cache_requests",
+    "Requests to cached endpoints by outcome (hit, miss, not_modified)",
+    ["endpoint", "result"]
+)
+
+
+class CachedResponse():
+    def __init__(self, body, etag, versions, generation, expires_at):
+        self.body = body
+        self.etag = etag
+        self.versions = versions
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+def request_key(body=None, scope=None):
+    """Stable key for a request body (dict or pydantic model) and namespace scope"""
+    if hasattr(body, "model_dump"):
+        body = body.model_dump()
+    return json.dumps([body, sorted(scope) if scope is not None else None], sort_keys=True, default=str)
+
+
+def etag_matches(if_none_match, etag):
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+class ResponseCache():
+    def __init__(self, default_ttl=RESPONSE_CACHE_TTL_SECONDS, ttls=None, enabled=USE_RESPONSE_CACHE):
+        self.default_ttl = default_ttl
+        self.ttls = {**RESPONSE_CACHE_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self.generation = 0
+        self._entries = {}
+        self._locks = {}
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def invalidate(self):
+        """Drop all entries; version-derived ETags change with the generation.
+        Computes in flight keep their locks, and do not store their (stale)
+        result since the generation changed."""
+        self.generation += 1
+        self._entries.clear()
+
+    def _version_etag(self, endpoint, key, versions):
+        digest = hashlib.blake2b(
+            json.dumps([endpoint, key, versions, self.generation], default=str).encode(),
+            digest_size=16
+        ).hexdigest()
+        return f'W/"{digest}"'
+
+    async def get(self, endpoint, key, compute, encode, versions=None, if_none_match=None):
+        """Cached (status, body, etag) for endpoint and key. body is None for a 304.
+
+        Args:
+            endpoint (str): Endpoint name (TTL lookup, metrics)
+            key (str): request_key() of the request
+            compute: Coroutine function returning the response content
+            encode: fn(content) -> bytes
+            versions (list): Versions of the sources behind the endpoint, None if any is unknown
+            if_none_match (str): If-None-Match header of the request
+        """
+        if not self.enabled:
+            return 200, encode(await compute()), None
+
+        version_etag = None if versions is None else self._version_etag(endpoint, key, versions)
+        if version_etag is not None and etag_matches(if_none_match, version_etag):
+            RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="not_modified").inc()
+            return 304, None, version_etag
+
+        # concurrent misses for the same key compute once. A key's lock lives as
+        # long as requests use it, so locks do not pile up with distinct bodies.
+        lock_key = (endpoint, key)
+        if lock_key not in self._locks:
+            self._locks[lock_key] = [asyncio.Lock(), 0]
+        self._locks[lock_key][1] += 1
+        lock = self._locks[lock_key][0]
+        try:
+            async with lock:
+                entry = self._entries.get(lock_key)
+                if entry is None or not self._fresh(entry, versions):
+                    RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="miss").inc()
+                    generation = self.generation
+                    body = encode(await compute())
+                    etag = version_etag or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+                    entry = CachedResponse(
+                        body=body,
+                        etag=etag,
+                        versions=versions,
+                        generation=generation,
+                        expires_at=time.monotonic() + self.ttl(endpoint)
+                    )
+                    if generation == self.generation:
+                        self._entries[lock_key] = entry
+                        self._purge()
+                elif etag_matches(if_none_match, entry.etag):
+                    RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="not_modified").inc()
+                    return 304, None, entry.etag
+                else:
+                    RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="hit").inc()
+        finally:
+            self._locks[lock_key][1] -= 1
+            if self._locks[lock_key][1] == 0:
+                del self._locks[lock_key]
+
+        if etag_matches(if_none_match, entry.etag):
+            return 304, None, entry.etag
+        return 200, entry.body, entry.etag
+
+    def _purge(self):
+        if len(self._entries) <= RESPONSE_CACHE_MAX_ENTRIES:
+            return
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            del self._entries[key]
+
+    def _fresh(self, entry, versions):
+        return (
+            entry.generation == self.generation
+            and entry.expires_at > time.monotonic()
+            and entry.versions == versions
+        )
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "locks": len(self._locks),
+            "generation": self.generation,
+            "default_ttl": self.default_ttl,
+            "ttls": self.ttls
+        }
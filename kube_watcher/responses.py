@@ -0,0 +1,29 @@
+"""
+Response classes for large JSON payloads.
+
+FastAPI runs whatever a handler returns through jsonable_encoder before
+encoding it, which walks every value of a large payload once more. Handlers
+whose results are already JSON-ready (raw reads, to_jsonable) return
+FastJSONResponse instead: the content is encoded once, straight to bytes,
+with orjson when installed.
+"""
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """Encode JSON-ready content to bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,169 @@
+"""
+Background scrapers for Prometheus exposition endpoints.
+
+A scraper polls its endpoint on an interval and keeps the last parsed result in
+memory with the time it was scraped, so readers never block on the upstream.
+If a scrape fails the previous result is kept and flagged as stale once it is
+older than the stale period. Scrape durations and failures are exported as
+prometheus_client metrics (see the /metrics endpoint).
+"""
+import os
+import abc
+import time
+import logging
+import threading
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from kube_watcher import sessions
+from kube_watcher.exposition import index_samples
+from kube_watcher.utils import extract_longhorn_metric_from_prometheus
+
+
+HAMI_SCRAPE_SECONDS = int(os.getenv("KW_HAMI_SCRAPE_SECONDS", "15"))
+HAMI_SCRAPE_TIMEOUT_SECONDS = float(os.getenv("KW_HAMI_SCRAPE_TIMEOUT_SECONDS", "5"))
+# results older than this are flagged stale (default: three missed scrapes)
+HAMI_STALE_SECONDS = int(os.getenv("KW_HAMI_STALE_SECONDS", str(3 * HAMI_SCRAPE_SECONDS)))
+# families read by KubeAPI.get_gpu_utilisation, the rest of the scrape is skipped
+HAMI_FAMILIES = (
+    "hami_node_gpu_overview",
+    "hami_gpu_memory_limit_bytes",
+    "hami_gpu_memory_allocated_bytes",
+    "hami_gpu_core_limit_ratio",
+    "hami_gpu_core_allocated_ratio"
+)
+LONGHORN_SCRAPE_SECONDS = int(os.getenv("KW_LONGHORN_SCRAPE_SECONDS", "60"))
+LONGHORN_SCRAPE_TIMEOUT_SECONDS = float(os.getenv("KW_LONGHORN_SCRAPE_TIMEOUT_SECONDS", "10"))
+LONGHORN_STALE_SECONDS = int(os.getenv("KW_LONGHORN_STALE_SECONDS", str(3 * LONGHORN_SCRAPE_SECONDS)))
+
+SCRAPE_DURATION = Histogram(
+    "kube_watcher_scrape_duration_seconds",
+    "Duration of metrics endpoint scrapes",
+    ["scraper"]
+)
+SCRAPE_FAILURES = Counter(
+    "kube_watcher_scrape_failures",
+    "Failed metrics endpoint scrapes",
+    ["scraper"]
+)
+SCRAPE_LAST_SUCCESS = Gauge(
+    "kube_watcher_scrape_last_success_timestamp_seconds",
+    "Unix time of the last successful scrape",
+    ["scraper"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsScraper(abc.ABC):
+    def __init__(self, name, url, interval=60, timeout=5, stale_seconds=180):
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_seconds = stale_seconds
+
+        self.data = None
+        self.last_scrape = None
+        self.last_error = None
+        self._last_attempt = None
+
+        self._session = sessions.session(name)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @abc.abstractmethod
+    def parse(self, lines):
+        """Turn the exposition lines (streamed from the response) into the value served to readers"""
+
+    def scrape(self):
+        """Fetch and parse once. Keeps the previous result if the scrape fails."""
+        self._last_attempt = time.time()
+        with SCRAPE_DURATION.labels(scraper=self.name).time():
+            try:
+                with self._session.get(self.url, timeout=self.timeout, stream=True) as response:
+                    response.raise_for_status()
+                    data = self.parse(response.iter_lines())
+            except Exception as e:
+                SCRAPE_FAILURES.labels(scraper=self.name).inc()
+                self.last_error = str(e)
+                logger.warning("[%s] scrape of %s failed: %s", self.name, self.url, e)
+                return False
+        with self._lock:
+            self.data = data
+            self.last_scrape = time.time()
+            self.last_error = None
+        SCRAPE_LAST_SUCCESS.labels(scraper=self.name).set(self.last_scrape)
+        return True
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_stale(self):
+        return self.last_scrape is None or time.time() - self.last_scrape > self.stale_seconds
+
+    def get(self):
+        """Last scraped result, or None if nothing could be scraped yet.
+        Without the background thread, results are refreshed on read at most once per interval."""
+        if not self.is_running() and (self._last_attempt is None or time.time() - self._last_attempt > self.interval):
+            self.scrape()
+        with self._lock:
+            return self.data
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        def _loop():
+            while not self._stop.is_set():
+                self.scrape()
+                self._stop.wait(self.interval)
+        self._thread = threading.Thread(target=_loop, name=f"{self.name}-scraper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            "url": self.url,
+            "running": self.is_running(),
+            "last_scrape": self.last_scrape,
+            "stale": self.is_stale(),
+            "last_error": self.last_error
+        }
+
+
+class HamiScraper(MetricsScraper):
+    """HAMi scheduler metrics as {family: {device_uuid: Sample}}"""
+    def __init__(
+        self,
+        url,
+        interval=HAMI_SCRAPE_SECONDS,
+        timeout=HAMI_SCRAPE_TIMEOUT_SECONDS,
+        stale_seconds=HAMI_STALE_SECONDS
+    ):
+        super().__init__(name="hami", url=url, interval=interval, timeout=timeout, stale_seconds=stale_seconds)
+
+    def parse(self, lines):
+        return index_samples(lines, families=HAMI_FAMILIES, label="device_uuid")
+
+
+class LonghornScraper(MetricsScraper):
+    """Longhorn manager volume sizes (MB) as {pvc: {"used_capacity", "total_capacity"}}"""
+    def __init__(
+        self,
+        url,
+        interval=LONGHORN_SCRAPE_SECONDS,
+        timeout=LONGHORN_SCRAPE_TIMEOUT_SECONDS,
+        stale_seconds=LONGHORN_STALE_SECONDS
+    ):
+        super().__init__(name="longhorn", url=url, interval=interval, timeout=timeout, stale_seconds=stale_seconds)
+
+    def parse(self, lines):
+        return dict(extract_longhorn_metric_from_prometheus(
+            metric_keys=["longhorn_volume_actual_size", "longhorn_volume_capacity_bytes"],
+            map_fields={"longhorn_volume_actual_size": "used_capacity", "longhorn_volume_capacity_bytes": "total_capacity"},
+            metrics=lines
+        ))
@@ -0,0 +1,153 @@
+"""
+Process-wide HTTP sessions for the services kube-watcher reads from
+(Prometheus, OpenCost, the HAMi and Longhorn metrics endpoints).
+
+Each upstream gets one requests adapter, i.e. one keep-alive connection pool
+per host, shared by every client of that upstream: a PrometheusAPI built per
+request still reuses the TCP (and TLS) connections of the previous ones.
+Requests without an explicit timeout get the upstream's default (connect,
+read) timeouts, and idempotent requests are retried on connection errors and
+502/503/504 with exponential backoff plus random jitter, so clients retrying
+together do not hit a recovering upstream in lockstep.
+
+Per upstream latency, outcomes, retries and pool usage are exported as
+prometheus_client metrics (see the /metrics endpoint).
+
+HTTP/2 is not available: requests (which prometheus_api_client is built on)
+only speaks HTTP/1.1, so connection reuse comes from keep-alive pools.
+"""
+import os
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from prometheus_client import Counter, Gauge, Histogram
+
+
+def _overrides(variable):
+    """upstream -> value of a "prometheus=120,opencost=30" environment variable"""
+    return {
+        upstream.strip(): float(value)
+        for upstream, value in (
+            item.split("=", 1) for item in os.getenv(variable, "").split(",") if "=" in item
+        )
+    }
+
+
+HTTP_POOL_MAXSIZE = int(os.getenv("KW_HTTP_POOL_MAXSIZE", "16"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("KW_HTTP_CONNECT_TIMEOUT_SECONDS", "3"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("KW_HTTP_READ_TIMEOUT_SECONDS", "60"))
+# per upstream overrides of the read timeout, e.g. prometheus=120,opencost=30
+HTTP_READ_TIMEOUTS = _overrides("KW_HTTP_READ_TIMEOUTS")
+HTTP_RETRIES = int(os.getenv("KW_HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.getenv("KW_HTTP_RETRY_BACKOFF_SECONDS", "0.2"))
+HTTP_RETRY_JITTER_SECONDS = float(os.getenv("KW_HTTP_RETRY_JITTER_SECONDS", "0.2"))
+RETRY_ON_STATUS = (502, 503, 504)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "kube_watcher_http_request_duration_seconds",
+    "Duration of requests to upstream services, retries included",
+    ["upstream"]
+)
+HTTP_REQUESTS = Counter(
+    "kube_watcher_http_requests",
+    "Requests to upstream services by outcome (2xx, 4xx, 5xx, error)",
+    ["upstream", "outcome"]
+)
+HTTP_RETRIES_TOTAL = Counter(
+    "kube_watcher_http_retries",
+    "Retried requests to upstream services",
+    ["upstream"]
+)
+HTTP_POOL_CONNECTIONS = Gauge(
+    "kube_watcher_http_pool_connections",
+    "Connections of the upstream pools: opened since the pool was created, idle as of the last request",
+    ["upstream", "state"]
+)
+
+
+def retry_policy(retries=HTTP_RETRIES, backoff=HTTP_RETRY_BACKOFF_SECONDS, jitter=HTTP_RETRY_JITTER_SECONDS):
+    kwargs = {
+        "total": retries,
+        "backoff_factor": backoff,
+        "status_forcelist": RETRY_ON_STATUS,
+        "raise_on_status": False
+    }
+    try:
+        return Retry(backoff_jitter=jitter, **kwargs)
+    except TypeError:
+        # urllib3 < 2 has no jitter
+        return Retry(**kwargs)
+
+
+class UpstreamAdapter(HTTPAdapter):
+    """Pooled adapter of one upstream, with default timeouts and metrics"""
+    def __init__(self, upstream, timeout=None, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=None):
+        self.upstream = upstream
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUTS.get(upstream, HTTP_READ_TIMEOUT_SECONDS))
+        super().__init__(pool_maxsize=pool_maxsize, max_retries=max_retries or retry_policy())
+
+    def send(self, request, timeout=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+        except Exception:
+            HTTP_REQUESTS.labels(upstream=self.upstream, outcome="error").inc()
+            raise
+        finally:
+            HTTP_REQUEST_DURATION.labels(upstream=self.upstream).observe(time.perf_counter() - start)
+            self._observe_pools()
+        HTTP_REQUESTS.labels(upstream=self.upstream, outcome=f"{response.status_code // 100}xx").inc()
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            HTTP_RETRIES_TOTAL.labels(upstream=self.upstream).inc(len(retries.history))
+        return response
+
+    def _observe_pools(self):
+        opened, idle = 0, 0
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            # the queue is pre-filled with None placeholders for connections not opened yet
+            idle += sum(1 for connection in list(pool.pool.queue) if connection is not None) if pool.pool is not None else 0
+        HTTP_POOL_CONNECTIONS.labels(upstream=self.upstream, state="opened").set(opened)
+        HTTP_POOL_CONNECTIONS.labels(upstream=self.upstream, state="idle").set(idle)
+
+
+_adapters = {}
+_sessions = {}
+_lock = threading.Lock()
+
+
+def adapter(upstream):
+    """The shared adapter (connection pools) of an upstream"""
+    with _lock:
+        if upstream not in _adapters:
+            _adapters[upstream] = UpstreamAdapter(upstream)
+        return _adapters[upstream]
+
+
+def session(upstream, verify=True):
+    """The shared session of an upstream. Sessions with and without TLS verification
+    are separate (verify is a session setting) but use the same pools."""
+    upstream_adapter = adapter(upstream)
+    with _lock:
+        if (upstream, verify) not in _sessions:
+            upstream_session = requests.Session()
+            upstream_session.verify = verify
+            upstream_session.mount("http://", upstream_adapter)
+            upstream_session.mount("https://", upstream_adapter)
+            _sessions[(upstream, verify)] = upstream_session
+        return _sessions[(upstream, verify)]
+
+
+def close():
+    with _lock:
+        for upstream_session in _sessions.values():
+            upstream_session.close()
+        _sessions.clear()
+        _adapters.clear()
@@ -0,0 +1,80 @@
+"""
+Request-scoped view of the cluster.
+
+A ClusterSnapshot fetches nodes and GPU metrics once (in parallel) and is
+made current for the enclosing context, so every KubeAPI read inside
+`with kube_api.cluster_snapshot():` is answered from the same data. Running
+pods are fetched on first use only: resource accounting reads pods from the
+ledger, the informer or paged apiserver lists rather than loading all of them
+into the snapshot. Derived views (labels, readiness, availability...) are
+memoised on the snapshot, so calling the same KubeAPI method twice in a
+request computes it once; callers get copies they are free to modify.
+"""
+import copy
+import time
+import logging
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+_current_snapshot = contextvars.ContextVar("cluster_snapshot", default=None)
+
+
+def current_snapshot():
+    return _current_snapshot.get()
+
+
+class ClusterSnapshot():
+    def __init__(self, kube_api):
+        t = time.time()
+        self._kube_api = kube_api
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot") as pool:
+            nodes = pool.submit(kube_api._list_nodes)
+            gpu_metrics = pool.submit(kube_api.get_gpu_metrics)
+            self.nodes = nodes.result()
+            self.gpu_metrics = gpu_metrics.result()
+        self.fetch_seconds = time.time() - t
+        self._running_pods = None
+        self._pods_lock = threading.Lock()
+        self._views = {}
+        logger.debug("Cluster snapshot fetched in %.3fs (%d nodes)", self.fetch_seconds, len(self.nodes))
+
+    @property
+    def running_pods(self):
+        with self._pods_lock:
+            if self._running_pods is None:
+                # fetched outside of this snapshot, which would otherwise serve the read itself
+                self._running_pods = contextvars.Context().run(self._kube_api._list_pods, phase="Running")
+            return self._running_pods
+
+    def has_running_pods(self):
+        return self._running_pods is not None
+
+    def activate(self):
+        return _current_snapshot.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_snapshot.reset(token)
+
+    def view(self, key, compute):
+        if key not in self._views:
+            self._views[key] = compute()
+        return self._views[key]
+
+
+def snapshot_view(fn):
+    """Memoise a KubeAPI read on the current snapshot (no-op outside a snapshot)"""
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return fn(self, *args, **kwargs)
+        key = (fn.__name__, repr(args), repr(sorted(kwargs.items())))
+        # the memoised value is shared by later calls
+        return copy.deepcopy(snapshot.view(key, lambda: fn(self, *args, **kwargs)))
+    return wrapper
@@ -0,0 +1,123 @@
+"""
+Storage usage of every PVC in the cluster, refreshed in the background.
+
+Each refresh does one Longhorn metrics scrape and one cluster-wide PVC list,
+and joins them by PVC name into a per-namespace index, so storage queries for
+any number of namespaces are answered without touching the apiserver or
+Longhorn. If either source fails the previous data is kept and the affected
+entries are flagged as stale.
+"""
+import time
+import logging
+import threading
+
+from kube_watcher import raw
+from kube_watcher.scrapers import LonghornScraper
+
+
+logger = logging.getLogger(__name__)
+
+
+class StorageUsageService():
+    def __init__(self, core_api, longhorn_url):
+        self.core_api = core_api
+        self.scraper = LonghornScraper(url=longhorn_url)
+        self.interval = self.scraper.interval
+
+        self.last_refresh = None
+        self.last_pvc_list = None
+        self.last_error = None
+
+        # namespace -> pvc name -> phase
+        self._pvcs = {}
+        # namespace -> pvc name -> usage entry
+        self._index = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _list_pvcs(self):
+        pvcs = {}
+        for pvc in raw.read_items(self.core_api.list_persistent_volume_claim_for_all_namespaces):
+            metadata = pvc["metadata"]
+            pvcs.setdefault(metadata["namespace"], {})[metadata["name"]] = pvc.get("status", {}).get("phase")
+        return pvcs
+
+    def refresh(self):
+        """Scrape Longhorn and list PVCs once, then rebuild the index"""
+        with self._refresh_lock:
+            self.scraper.scrape()
+            try:
+                self._pvcs = self._list_pvcs()
+                self.last_pvc_list = time.time()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Failed to list persistent volume claims: %s", e)
+
+            capacities = self.scraper.data or {}
+            stale = self.scraper.is_stale() or self.last_error is not None
+            index = {}
+            for namespace, pvcs in self._pvcs.items():
+                index[namespace] = {
+                    name: {
+                        "status": phase,
+                        "used_capacity": capacities.get(name, {}).get("used_capacity", 0),
+                        "total_capacity": capacities.get(name, {}).get("total_capacity", 0),
+                        "stale": stale
+                    }
+                    for name, phase in pvcs.items()
+                }
+            with self._lock:
+                self._index = index
+                self.last_refresh = time.time()
+
+    def get(self, namespaces, names=None):
+        """Storage usage as {namespace: {pvc: {status, used_capacity, total_capacity, stale}}}
+
+        Args:
+            namespaces (list): Namespaces to report (missing namespaces return {})
+            names (list): Optional PVC names to restrict results to
+        """
+        if not self.is_running() and (self.last_refresh is None or time.time() - self.last_refresh > self.interval):
+            self.refresh()
+        with self._lock:
+            index = self._index
+        return {
+            namespace: {
+                name: dict(entry)
+                for name, entry in index.get(namespace, {}).items()
+                if names is None or name in names
+            }
+            for namespace in namespaces
+        }
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        def _loop():
+            while not self._stop.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Storage usage refresh failed: %s", e)
+                self._stop.wait(self.interval)
+        self._thread = threading.Thread(target=_loop, name="storage-usage", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            "running": self.is_running(),
+            "last_refresh": self.last_refresh,
+            "last_pvc_list": self.last_pvc_list,
+            "last_error": self.last_error,
+            "longhorn": self.scraper.status()
+        }
@@ -5,6 +5,8 @@ import datetime
 from collections import defaultdict
 import subprocess
 
+from kube_watcher.exposition import iter_samples
+
 
 DEEPSPARSE_DEFAULT_VALUES = {
     'num_cores': '4',
@@ -73,21 +75,24 @@ def extract_auth_token(headers):
 
 
 def extract_longhorn_metric_from_prometheus(metric_keys, metrics, map_fields):
+    """Longhorn volume metrics (in MB) per pvc: {pvc: {field: size}}
+
+    Args:
+        metric_keys (list): Metric families to extract, e.g. longhorn_volume_actual_size
+        metrics: Exposition text, or an iterable of its lines (e.g. response.iter_lines())
+        map_fields (dict): Optional family -> output field name
+    """
+    if isinstance(metrics, str):
+        metrics = metrics.splitlines()
     objects = defaultdict(dict)
-    lines = metrics.splitlines()
-    for line in lines:
-        for m_key in metric_keys:
-            if line.startswith(m_key):
-                # Example: longhorn_volume_actual_size{volume="volume-name"} 1073741824
-                parts = line.split()
-                key = parts[0]
-                size = float(parts[1]) / (1024 ** 2)  # Actual size in MB
-                volume_name = key.split('pvc="')[1].split('"')[0]
-                if map_fields:
-                    objects[volume_name][map_fields[m_key]] = size
-                else:
-                    objects[volume_name][m_key] = size
-    
+    for sample in iter_samples(metrics, families=metric_keys):
+        # Example: longhorn_volume_actual_size{pvc="pvc-name",volume="volume-name"} 1073741824
+        volume_name = sample.labels.get("pvc")
+        if volume_name is None:
+            continue
+        field = map_fields[sample.family] if map_fields else sample.family
+        objects[volume_name][field] = sample.value / (1024 ** 2)  # Actual size in MB
+
     return objects
 
 def serialize_datetime(obj): 
@@ -99,8 +104,40 @@ def serialize_datetime(obj):
             return obj.to_dict()
     raise TypeError("Type not serializable") 
 
+def to_jsonable(data):
+    """JSON-ready copy of data in a single pass: kubernetes client models become
+    dicts keyed like to_dict(), datetimes ISO strings, tuples lists and dict keys
+    strings (as a json.dumps/json.loads round trip would, without encoding twice)"""
+    if isinstance(data, dict):
+        return {_jsonable_key(key): to_jsonable(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_jsonable(value) for value in data]
+    if data is None or isinstance(data, (str, int, float)):
+        return data
+    if isinstance(data, (datetime.datetime, datetime.date)):
+        return data.isoformat()
+    openapi_types = getattr(data, "openapi_types", None)
+    if isinstance(openapi_types, dict):
+        # kubernetes client model: read attributes directly rather than building to_dict() first
+        return {attr: to_jsonable(getattr(data, attr)) for attr in openapi_types}
+    to_dict = getattr(data, "to_dict", None)
+    if callable(to_dict):
+        return to_jsonable(to_dict())
+    raise TypeError("Type not serializable")
+
+
+def _jsonable_key(key):
+    if isinstance(key, str):
+        return key
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    if key is None:
+        return "null"
+    return str(key)
+
+
 def force_serialisation(data):
-    return json.loads(json.dumps(data, default=serialize_datetime))
+    return to_jsonable(data)
 
 
 def cast_resource_value(value):